@@ -0,0 +1,590 @@
+#!uv run
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "fonttools",
+#     "lxml",
+#     "nltk",
+#     "pillow",
+#     "pypdf",
+#     "wordfreq",
+# ]
+# ///
+"""
+Micro-benchmarks for epub2print.py hot paths.
+
+# Run every benchmark
+uv run bench_epub2print.py
+
+# Run selected benchmarks
+uv run bench_epub2print.py ink index_markers
+"""
+
+import argparse
+import io
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+import warnings
+import zipfile
+from collections.abc import Callable
+from pathlib import Path
+
+import epub2print
+
+BENCHMARKS: dict[str, Callable[[], None]] = {}
+
+
+def benchmark(func: Callable[[], None]) -> Callable[[], None]:
+    """Register a benchmark under its function name (minus ``bench_``)."""
+    BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def _time(func: Callable[[], object], repeat: int = 3) -> float:
+    """Best-of-*repeat* wall time of func() in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(label: str, old: float, new: float) -> None:
+    print(f"  {label:<28s} old {old * 1000:9.1f} ms   new {new * 1000:8.1f} ms"
+          f"   {old / new:6.1f}x")
+
+
+def _synthetic_photo(width: int, height: int, fmt: str) -> bytes:
+    """A noisy colour gradient, encoded as *fmt* (PNG/JPEG)."""
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 48)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (noise, gradient, Image.blend(noise, gradient, 0.5)))
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _ink_coverage_per_pixel(img_data: bytes) -> float:
+    """The original ink-coverage implementation (Python sum over all pixels)."""
+    from PIL import Image
+
+    gray = Image.open(io.BytesIO(img_data)).convert("L")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # getdata()
+        pixels = list(gray.getdata())
+    return 1.0 - (sum(pixels) / len(pixels) / 255.0)
+
+
+@benchmark
+def bench_ink() -> None:
+    """Ink coverage: per-pixel Python sum vs native stats on a thumbnail."""
+    print("ink coverage (3000x4000 scans)")
+    for fmt in ("PNG", "JPEG"):
+        data = _synthetic_photo(3000, 4000, fmt)
+        old = _time(lambda: _ink_coverage_per_pixel(data), repeat=1)
+        new = _time(lambda: epub2print._measure_ink_coverage(data))
+        _report(f"{fmt} ({len(data) // 1024} KiB)", old, new)
+        drift = abs(_ink_coverage_per_pixel(data) - epub2print._measure_ink_coverage(data))
+        print(f"  {'':<28s} coverage drift {drift:.4f}")
+
+    # The same image in every chapter only gets analyzed once
+    data = _synthetic_photo(3000, 4000, "JPEG")
+    parser = epub2print.EPUBParser.__new__(epub2print.EPUBParser)
+    parser._ink_cache = {}
+    repeats = 300
+    cached = _time(lambda: [parser._calculate_ink_coverage(data) for _ in range(repeats)],
+                   repeat=1)
+    uncached = _time(lambda: epub2print._measure_ink_coverage(data)) * repeats
+    _report(f"{repeats} repeats (cached)", uncached, cached)
+
+
+def _postprocess_per_entry(chapters, selected) -> None:
+    """The original pass 2: one regex and one string rebuild per entry."""
+    for word_lower, (display, chapter_idxs) in selected.items():
+        pattern = re.compile(
+            rf'(?<![#\[])(\b{re.escape(word_lower)}\b)(?![^\[]*\])', re.IGNORECASE,
+        )
+        for ch_idx in chapter_idxs:
+            chapter = chapters[ch_idx]
+            m = pattern.search(chapter.content)
+            if m:
+                chapter.content = (chapter.content[:m.end()] + f"#index[{display}]"
+                                   + chapter.content[m.end():])
+
+
+def _synthetic_book(words: int, chapters: int, entries: int):
+    """Typst-ish chapters of random words plus an index selection over them."""
+    rng = random.Random(0)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+             for _ in range(5000)]
+    per_chapter = words // chapters
+    contents = []
+    for _ in range(chapters):
+        chunk = rng.choices(vocab, k=per_chapter)
+        for i in range(0, len(chunk), 40):
+            chunk[i] = "#emph[" + chunk[i] + "]"
+        contents.append(" ".join(chunk))
+    selected = {
+        word: (word.title(), set(rng.sample(range(chapters), 3)))
+        for word in rng.sample(vocab, entries)
+    }
+    return contents, selected
+
+
+@benchmark
+def bench_index_markers() -> None:
+    """Pass 2: one regex per index entry vs a single combined scan."""
+    print("index marker insertion (200k words, 40 chapters)")
+    contents, selected = _synthetic_book(200_000, 40, 120)
+
+    def run(func):
+        chapters = [epub2print.Chapter(title="", content=c) for c in contents]
+        func(chapters, selected)
+        return chapters
+
+    old = _time(lambda: run(_postprocess_per_entry))
+    new = _time(lambda: run(epub2print.postprocess_index_markers))
+    _report(f"{len(selected)} entries", old, new)
+    same = run(_postprocess_per_entry) == run(epub2print.postprocess_index_markers)
+    print(f"  {'':<28s} identical output: {same}")
+
+
+def _rare_chapters_by_scan(tracker, all_scored, budget: int) -> dict[str, set[int]]:
+    """The original rare-word chapter lookup: one candidate-list scan per entry."""
+    chapters = {}
+    for score, cat, display, lower, zipf, spread in all_scored[:budget]:
+        if cat == "word":
+            chapters[lower] = {c.chapter_idx for c in tracker.rare_candidates
+                               if c.lower == lower}
+    return chapters
+
+
+@benchmark
+def bench_index_select() -> None:
+    """Index selection: candidate-list scans vs the per-word chapter index."""
+    from wordfreq import top_n_list
+
+    vocab = top_n_list("en", 60000)[20000:]
+    rng = random.Random(0)
+    tracker = epub2print.IndexTracker()
+    for _ in range(60):
+        tracker.new_chapter()
+        for _ in range(500):
+            text = " ".join(rng.choices(vocab, k=12))
+            tracker.annotate_text(text, text)
+    all_scored = tracker.score_all()
+    print(f"index selection ({len(tracker.rare_candidates)} rare candidates)")
+    old = _time(lambda: _rare_chapters_by_scan(tracker, all_scored, 120), repeat=1)
+    new = _time(lambda: tracker.select(all_scored, 120))
+    _report("select top 120", old, new)
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    """Peak bytes allocated while func() runs (result kept alive)."""
+    tracemalloc.start()
+    try:
+        result = func()  # noqa: F841 -- measured while alive
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@benchmark
+def bench_candidate_memory() -> None:
+    """Rare-word pool: one CandidateWord per occurrence vs shared forms + arrays."""
+    from wordfreq import top_n_list, zipf_frequency
+
+    rng = random.Random(0)
+    vocab = [w for w in top_n_list("en", 60000)[20000:]
+             if w.isalpha() and len(w) >= 4][:8000]
+    forms = [(w, w, w[:-1] if w.endswith("s") else w, zipf_frequency(w, "en")) for w in vocab]
+    occurrences = [(rng.choice(forms), ch, rng.randrange(2000))
+                   for ch in range(200) for _ in range(2500)]
+
+    def as_objects():
+        # Fresh strings per occurrence, as the tokenizer produces them
+        return [epub2print.CandidateWord("".join(f[0]), "".join(f[1]), "".join(f[2]),
+                                         f[3], ch, pos)
+                for f, ch, pos in occurrences]
+
+    def as_arrays():
+        rare = epub2print.RareCandidates()
+        for f, ch, pos in occurrences:
+            rare.add("".join(f[0]), "".join(f[1]), "".join(f[2]), f[3], ch, pos)
+        return rare
+
+    print(f"rare candidate pool ({len(occurrences)} occurrences, {len(forms)} forms)")
+    old = _peak_memory(as_objects)
+    new = _peak_memory(as_arrays)
+    print(f"  {'peak memory':<28s} old {old / 2**20:9.1f} MiB  new {new / 2**20:8.1f} MiB"
+          f"   {old / new:6.1f}x")
+
+
+@benchmark
+def bench_word_lookups() -> None:
+    """zipf/stem per token: direct wordfreq + Snowball calls vs the shared LRU."""
+    from nltk.stem.snowball import SnowballStemmer
+    from wordfreq import top_n_list, zipf_frequency
+
+    rng = random.Random(0)
+    tokens = rng.choices(top_n_list("en", 30000), k=200_000)
+    stemmer = SnowballStemmer("english")
+    print(f"word lookups ({len(tokens)} tokens, {len(set(tokens))} distinct)")
+
+    def direct():
+        for t in tokens:
+            zipf_frequency(t, "en")
+            stemmer.stem(t)
+
+    def cached():
+        lookups = epub2print.WordLookups("en")
+        for t in tokens:
+            lookups.zipf(t)
+            lookups.stem(t)
+
+    _report("zipf + stem", _time(direct, repeat=1), _time(cached, repeat=1))
+
+
+@benchmark
+def bench_tokenizer() -> None:
+    """Tokens/sec through IndexTracker: scene scan + annotate vs one shared pass."""
+    from wordfreq import top_n_list
+
+    rng = random.Random(0)
+    vocab = top_n_list("en", 30000) + ["don't", "Sorcha's", "we'll", "breath"]
+    weights = [1 / rank for rank in range(1, len(vocab) + 1)]  # Zipf's law
+    paragraphs = [" ".join(rng.choices(vocab, weights, k=rng.randint(5, 60)))
+                  for _ in range(20_000)]
+    tokens = sum(len(re.findall(r"[A-Za-z'\u2019]+", p)) for p in paragraphs)
+    # Warm the shared zipf/stem caches so both runs measure tokenizing
+    epub2print.IndexTracker().annotate_text(" ".join(paragraphs), "")
+
+    def separate():
+        tracker = epub2print.IndexTracker()
+        for p in paragraphs:
+            tracker.check_scene_signals(p)
+            tracker.annotate_text(p, p)
+
+    def shared():
+        tracker = epub2print.IndexTracker()
+        for p in paragraphs:
+            tracker.begin_paragraph()
+            tracker.annotate_text(p, p)
+            tracker.end_paragraph()
+
+    print(f"paragraph tokenizing ({tokens} tokens)")
+    old, new = _time(separate), _time(shared)
+    _report("scene + index tokens", old, new)
+    print(f"  {'':<28s} {tokens / old / 1e6:.2f} -> {tokens / new / 1e6:.2f} M tokens/s")
+
+
+def _synthetic_epub(path: Path, chapters: int, words: int, image_bytes: int) -> None:
+    """An EPUB of *chapters* random-word chapters, each with its own image."""
+    rng = random.Random(0)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 9)))
+             for _ in range(5000)]
+    image = _synthetic_photo(int((image_bytes / 3) ** 0.5), int((image_bytes / 3) ** 0.5), "PNG")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("META-INF/container.xml", """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf"
+    media-type="application/oebps-package+xml"/></rootfiles>
+</container>""")
+        items, refs = [], []
+        for i in range(chapters):
+            paragraphs = "".join(
+                f"<p>{' '.join(rng.choices(vocab, k=100))}</p>" for _ in range(words // 100)
+            )
+            zf.writestr(f"OEBPS/ch{i}.xhtml", f"""<?xml version="1.0"?>
+<html xmlns="http://www.w3.org/1999/xhtml"><body>
+<h1>Chapter {i + 1}</h1>{paragraphs}<img src="img{i}.png"/></body></html>""")
+            zf.writestr(f"OEBPS/img{i}.png", image + i.to_bytes(4))
+            items.append(f'<item id="ch{i}" href="ch{i}.xhtml" '
+                         'media-type="application/xhtml+xml"/>')
+            refs.append(f'<itemref idref="ch{i}"/>')
+        zf.writestr("OEBPS/content.opf", f"""<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title>Synthetic</dc:title><dc:creator>Bench</dc:creator>
+  </metadata>
+  <manifest>{"".join(items)}</manifest>
+  <spine>{"".join(refs)}</spine>
+</package>""")
+
+
+@benchmark
+def bench_streaming() -> None:
+    """Parse + Typst emission: whole book in memory vs streamed to the build dir."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        epub_path = tmppath / "book.epub"
+        _synthetic_epub(epub_path, chapters=120, words=8000, image_bytes=200_000)
+
+        def in_memory():
+            build_dir = tmppath / "memory"
+            build_dir.mkdir(exist_ok=True)
+            book = epub2print.EPUBParser(epub_path).parse()
+            (build_dir / "book.typ").write_text(
+                epub2print.TypstGenerator(book).generate(), encoding="utf-8")
+            for name, data in book.images.items():
+                (build_dir / name).write_bytes(data)
+
+        def streamed():
+            build_dir = tmppath / "streamed"
+            book = epub2print.EPUBParser(epub_path).parse(build_dir)
+            with open(build_dir / "book.typ", "w", encoding="utf-8") as f:
+                epub2print.TypstGenerator(book).write(f)
+
+        print(f"parse + emit ({epub_path.stat().st_size // 2**20} MiB EPUB, 120 chapters)")
+        _report("wall time", _time(in_memory, repeat=1), _time(streamed, repeat=1))
+        old, new = _peak_memory(in_memory), _peak_memory(streamed)
+        print(f"  {'peak memory':<28s} old {old / 2**20:9.1f} MiB  new {new / 2**20:8.1f} MiB"
+              f"   {old / new:6.1f}x")
+        assert ((tmppath / "memory" / "book.typ").read_bytes()
+                == (tmppath / "streamed" / "book.typ").read_bytes())
+
+
+def _synthetic_pdf(path: Path, pages: int) -> None:
+    """An A5 PDF of *pages* text pages sharing one embedded font."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    rng = random.Random(0)
+    writer = PdfWriter()
+    font_file = DecodedStreamObject()
+    font_file.set_data(rng.randbytes(60_000))
+    descriptor = DictionaryObject({
+        NameObject("/Type"): NameObject("/FontDescriptor"),
+        NameObject("/FontName"): NameObject("/Synth"),
+        NameObject("/FontFile2"): writer._add_object(font_file),
+    })
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/TrueType"),
+        NameObject("/BaseFont"): NameObject("/Synth"),
+        NameObject("/FontDescriptor"): writer._add_object(descriptor),
+    }))
+    vocab = ["".join(rng.choice("abcdefghij") for _ in range(rng.randint(2, 9)))
+             for _ in range(500)]
+    for n in range(pages):
+        page = writer.add_blank_page(419.5, 595.3)
+        lines = [f"BT /F1 10 Tf 50 {560 - 13 * i} Td ({' '.join(rng.choices(vocab, k=9))}) Tj ET"
+                 for i in range(40)]
+        lines.append(f"BT /F1 9 Tf 200 20 Td ({n + 1}) Tj ET")
+        content = DecodedStreamObject()
+        content.set_data("\n".join(lines).encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        page.compress_content_streams()
+    writer.write(path)
+
+
+def _impose_booklet_whole(input_pdf: Path, output_pdf: Path) -> None:
+    """The original booklet imposition: every sheet held uncompressed until one write."""
+    from pypdf import PageObject, PdfReader, PdfWriter, Transformation
+
+    reader = PdfReader(input_pdf)
+    writer = PdfWriter()
+    width = float(reader.pages[0].mediabox.width)
+    height = float(reader.pages[0].mediabox.height)
+    pages = list(reader.pages)
+    pages += [None] * (-len(pages) % 16)
+    order = epub2print.ImpositionPlan._booklet_order(16)
+    for sig_start in range(0, len(pages), 16):
+        for i in range(0, len(order), 2):
+            sheet = PageObject.create_blank_page(width=width * 2, height=height)
+            for slot, tx in ((order[i], 0), (order[i + 1], width)):
+                if pages[sig_start + slot] is not None:
+                    sheet.merge_transformed_page(pages[sig_start + slot],
+                                                 Transformation().translate(tx=tx))
+            writer.add_page(sheet)
+    with open(output_pdf, "wb") as f:
+        writer.write(f)
+
+
+def _impose_booklet_streamed(input_pdf: Path, output_pdf: Path) -> None:
+    # The merge backend, as the whole-document version uses: this isolates
+    # signature streaming from the Form XObject backend (bench_imposition_backend)
+    epub2print.Impositioner(16, backend="merge").impose_booklet(input_pdf, output_pdf)
+
+
+def _run_for_peak_rss(func: Callable[..., object], *args) -> tuple[float, int]:
+    """(seconds, peak RSS bytes) of func(*args) in a fresh interpreter.
+
+    tracemalloc slows pypdf down too much at this size, so imposition is
+    measured by the child's high-water mark instead (which includes the
+    interpreter and pypdf themselves).
+    """
+    import multiprocessing
+
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_timed_rss, (func, *args))
+
+
+def _timed_rss(func: Callable[..., object], *args) -> tuple[float, int]:
+    import resource
+
+    import pypdf  # noqa: F401 -- imported before the clock starts
+
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    try:
+        # ru_maxrss survives exec, so it would include the parent's peak
+        status = Path("/proc/self/status").read_text()
+        return elapsed, int(re.search(r"VmHWM:\s+(\d+) kB", status)[1]) * 1024
+    except OSError:
+        return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@benchmark
+def bench_imposition() -> None:
+    """Booklet imposition: one writer of uncompressed sheets vs signature by signature."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        for pages in (250, 1000):
+            source = tmppath / f"{pages}.pdf"
+            _synthetic_pdf(source, pages)
+            old_out, new_out = tmppath / f"{pages}-old.pdf", tmppath / f"{pages}-new.pdf"
+            old_time, old_rss = _run_for_peak_rss(_impose_booklet_whole, source, old_out)
+            new_time, new_rss = _run_for_peak_rss(_impose_booklet_streamed, source, new_out)
+            print(f"booklet imposition ({pages} pages, {source.stat().st_size // 1024} KiB)")
+            _report("wall time", old_time, new_time)
+            print(f"  {'peak RSS':<28s} old {old_rss / 2**20:9.1f} MiB  new {new_rss / 2**20:8.1f} MiB"
+                  f"   {old_rss / new_rss:6.1f}x")
+            old_size, new_size = old_out.stat().st_size, new_out.stat().st_size
+            print(f"  {'output size':<28s} old {old_size / 2**10:9.0f} KiB  new {new_size / 2**10:8.0f} KiB"
+                  f"   {old_size / new_size:6.1f}x")
+
+
+@benchmark
+def bench_imposition_backend() -> None:
+    """Sheet assembly: merging page content vs placing shared Form XObjects."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        source = tmppath / "1000.pdf"
+        _synthetic_pdf(source, 1000)
+        print(f"imposition backends (1000 pages, {source.stat().st_size // 1024} KiB)")
+        for mode in ("impose_booklet", "impose_a5_to_a3"):
+            outputs = {}
+            times = {}
+            for backend in ("merge", "xobject"):
+                outputs[backend] = tmppath / f"{mode}-{backend}.pdf"
+                impositioner = epub2print.Impositioner(16, backend)
+                times[backend] = _time(
+                    lambda: getattr(impositioner, mode)(source, outputs[backend]), repeat=1)
+            _report(mode, times["merge"], times["xobject"])
+            old_size, new_size = (outputs[b].stat().st_size for b in ("merge", "xobject"))
+            print(f"  {'output size':<28s} old {old_size / 2**10:9.0f} KiB  new {new_size / 2**10:8.0f} KiB"
+                  f"   {old_size / new_size:6.1f}x")
+
+
+@benchmark
+def bench_imposition_jobs() -> None:
+    """A3 imposition: one process vs signature ranges on a process pool."""
+    jobs = max(2, os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = Path(tmpdir)
+        source = tmppath / "1000.pdf"
+        _synthetic_pdf(source, 1000)
+        print(f"parallel A3 imposition (1000 pages, {jobs} jobs, {os.cpu_count()} CPUs)")
+        for backend in epub2print.IMPOSITION_BACKENDS:
+            serial, parallel = (epub2print.Impositioner(16, backend, n) for n in (1, jobs))
+            _report(backend,
+                    _time(lambda: serial.impose_a5_to_a3(source, tmppath / "1.pdf"), repeat=1),
+                    _time(lambda: parallel.impose_a5_to_a3(source, tmppath / "n.pdf"), repeat=1))
+
+
+MURDERBOT_EPUB = (Path(__file__).parent
+                  / "(The Murderbot Diaries 1) Wells, Martha - All Systems Red.epub")
+
+
+def _book_texts() -> tuple[str, list[str], list[str]]:
+    """(source, text nodes, stripped <p> texts) from the Murderbot EPUB.
+
+    Falls back to a synthetic book when the EPUB isn't checked out.
+    """
+    from lxml import etree
+
+    if MURDERBOT_EPUB.exists():
+        nodes, paragraphs = [], []
+        with zipfile.ZipFile(MURDERBOT_EPUB) as zf:
+            for name in zf.namelist():
+                if not name.endswith((".xhtml", ".html", ".htm")):
+                    continue
+                root = etree.fromstring(zf.read(name))
+                for elem in root.iter():
+                    nodes.extend(t for t in (elem.text, elem.tail) if t)
+                    if isinstance(elem.tag, str) and elem.tag.endswith("}p"):
+                        paragraphs.append("".join(elem.itertext()).strip())
+        return "Murderbot", nodes, paragraphs
+
+    from wordfreq import top_n_list
+    rng = random.Random(0)
+    vocab = top_n_list("en", 5000) + ["#1", "[sic]", "e-mail@host", "*", "_"]
+    paragraphs = [" ".join(rng.choices(vocab, k=rng.randint(3, 80))) for _ in range(3000)]
+    paragraphs += [f"Chapter {i}" for i in range(30)]
+    nodes = [f"\n    {p}\n  " for p in paragraphs]
+    return "synthetic book (Murderbot EPUB not found)", nodes, paragraphs
+
+
+def _escape_typst_replace_chain(text: str) -> str:
+    """The original escaper: eleven str.replace calls and a re.sub."""
+    for char in "\\#@$<>[]*_`":
+        text = text.replace(char, "\\" + char)
+    return re.sub(r"\s+", " ", text)
+
+
+_OLD_HEADING_PATTERNS = [rf"^{p}$" for p in epub2print.CHAPTER_HEADING_PATTERNS]
+
+
+def _is_chapter_heading_one_by_one(text: str) -> bool:
+    """The original classifier: try each heading pattern in turn."""
+    if not text or len(text) > 50:
+        return False
+    return any(re.match(p, text, re.IGNORECASE) for p in _OLD_HEADING_PATTERNS)
+
+
+@benchmark
+def bench_escape_headings() -> None:
+    """Typst escaping and chapter-heading detection on every text node / paragraph."""
+    source, nodes, paragraphs = _book_texts()
+    parser = epub2print.EPUBParser.__new__(epub2print.EPUBParser)
+    print(f"escaping + heading detection ({source}: {len(nodes)} text nodes, "
+          f"{len(paragraphs)} paragraphs)")
+
+    old = _time(lambda: [_escape_typst_replace_chain(t) for t in nodes])
+    new = _time(lambda: [parser._escape_typst(t) for t in nodes])
+    _report("_escape_typst", old, new)
+    assert [_escape_typst_replace_chain(t) for t in nodes] == [parser._escape_typst(t) for t in nodes]
+
+    old = _time(lambda: [_is_chapter_heading_one_by_one(t) for t in paragraphs])
+    new = _time(lambda: [parser._is_chapter_heading(t) for t in paragraphs])
+    _report("_is_chapter_heading", old, new)
+    assert ([_is_chapter_heading_one_by_one(t) for t in paragraphs]
+            == [parser._is_chapter_heading(t) for t in paragraphs])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark epub2print hot paths")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
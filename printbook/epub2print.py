@@ -32,21 +32,72 @@ uv run epub2print.py mybook.epub --font ./MyFont.ttf --page-size a4
 
 # Exclude high-ink images (e.g., dark photos that waste printer ink)
 uv run epub2print.py mybook.epub --max-ink 0.3
+
+# Convert chapters on 4 worker processes
+uv run epub2print.py mybook.epub --jobs 4
+
+# Greyscale images at 200 dpi for a mono laser printer
+uv run epub2print.py mybook.epub --mono --image-dpi 200
+
+# Compare index sizes in seconds from the cached candidate pool
+uv run epub2print.py mybook.epub --index-sweep 20,40,80,120
+
+# Parses are cached: re-running with a different --font, --page-size or
+# --pages-per-signature skips straight to typesetting (--no-cache to disable)
+uv run epub2print.py mybook.epub --font ./Other.ttf
+
+# Convert a whole library, 4 books at a time, at most 2 Typst compiles at once
+uv run epub2print.py batch ~/books -o ~/print --jobs 4 --typst-jobs 2
+
+# Keep warm workers running and take jobs over HTTP on localhost:8765
+uv run epub2print.py serve --jobs 2
+curl -d '{"epub": "/home/me/mybook.epub"}' localhost:8765/jobs
+curl --data-binary @mybook.epub -H 'Content-Type: application/epub+zip' localhost:8765/jobs
+curl localhost:8765/jobs/1        # status; /jobs/1/pdf downloads an uploaded job's PDF
+curl localhost:8765/status        # queue depth and per-job latency
+
+# Check where every page of a 900-page book lands, before any PDF work
+uv run epub2print.py plan 900 --a3-mode
+uv run epub2print.py plan reading.pdf --json > plan.json
 """
 
+from __future__ import annotations
+
 import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
 import math
+import multiprocessing
+import os
+import pickle
+import queue
 import re
+import shutil
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 import zipfile
-from collections import Counter
+from array import array
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from fontTools import ttLib
-from lxml import etree
-from pypdf import PdfReader, PdfWriter, PageObject, Transformation
+# lxml, pypdf, fontTools, PIL, wordfreq and nltk are imported where they're
+# used, so --help, batch/serve dispatch and runs that skip a stage (e.g.
+# --no-impose, no --font, no --index) don't pay for them
+if TYPE_CHECKING:
+    from lxml import etree
+    from pypdf import PageObject, PdfReader, PdfWriter, Transformation
+    from pypdf.generic import IndirectObject
 
 
 # Scene signal word lexicon — clusters of these in a paragraph trigger index markers
@@ -80,6 +131,8 @@ SCENE_SIGNALS: dict[str, set[str]] = {
 # Minimum number of signal words in a paragraph to trigger a scene index marker
 SCENE_SIGNAL_THRESHOLD = 3
 
+_SCENE_WORDS = frozenset().union(*SCENE_SIGNALS.values())
+
 
 # Proper noun rarity ceiling for scoring.  Words with zipf >= 5.0
 # (War=5.46, King=5.17) score 0 and are excluded.  Character names
@@ -88,18 +141,15 @@ SCENE_SIGNAL_THRESHOLD = 3
 _PROPER_NOUN_RARITY_CEILING = 5.0
 
 
-# Contraction suffixes to strip (with both straight and curly apostrophes).
-# Order matters: check longer suffixes first.
-_CONTRACTION_SUFFIXES = ("'ll", "\u2019ll", "'ve", "\u2019ve", "'re", "\u2019re",
-                         "'d", "\u2019d", "'t", "\u2019t",
-                         "'s", "\u2019s")
-
-# Contraction-only suffixes (excluding possessive 's).
-_CONTRACTION_ONLY_SUFFIXES = ("'ll", "\u2019ll", "'ve", "\u2019ve", "'re", "\u2019re",
-                              "'d", "\u2019d", "'t", "\u2019t")
-
 _VOWELS = frozenset('aeiouy')
 
+# Index tokens are runs of letters and apostrophes; shorter runs can't
+# hold an index candidate or a scene signal word, so are never matched.
+# _SUFFIX_RE finds a trailing contraction ('ll, 've, 're, 'd, 't) or
+# possessive ('s) on an edge-stripped token, straight or curly.
+_TOKEN_RE = re.compile(r"[A-Za-z'\u2019]{3,}")
+_SUFFIX_RE = re.compile(r"['\u2019](ll|ve|re|d|t|s)\Z")
+
 
 def _is_adjacent_to_separator(pos: int, raw_word: str, full_text: str) -> bool:
     """Check if a word is adjacent to `.`, `@`, or `/` (email/URL context)."""
@@ -128,11 +178,166 @@ def _clean_word(raw: str) -> str:
     # Strip leading/trailing apostrophes and curly quotes
     w = raw.strip("'\u2019")
     # Strip contraction / possessive suffixes
-    for suffix in _CONTRACTION_SUFFIXES:
-        if w.endswith(suffix):
-            w = w[:-len(suffix)]
-            break
-    return w
+    m = _SUFFIX_RE.search(w)
+    return w[:m.start()] if m else w
+
+
+def _scene_categories(words: set[str]) -> list[str]:
+    """Scene categories with at least SCENE_SIGNAL_THRESHOLD words in *words*."""
+    return [
+        category for category, signals in SCENE_SIGNALS.items()
+        if len(words & signals) >= SCENE_SIGNAL_THRESHOLD
+    ]
+
+
+class LRUCache:
+    """Thread-safe bounded memo of a one-argument function, with hit counts."""
+
+    def __init__(self, func: Callable[[Hashable], object], maxsize: int):
+        self._func = func
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, key: Hashable):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return self._data[key]
+        value = self._func(key)
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def items(self) -> list[tuple[str, object]]:
+        """Cached entries, least recently used first."""
+        with self._lock:
+            return list(self._data.items())
+
+    def update(self, entries: dict[str, object]) -> None:
+        """Preload entries without counting them as lookups."""
+        with self._lock:
+            self._data.update(entries)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_SNOWBALL_LANGUAGES = {"en": "english"}
+
+
+class WordLookups:
+    """Memoized wordfreq zipf and Snowball stem lookups for one language.
+
+    Shared by every IndexTracker in the process (see word_lookups()).
+    load()/save() keep a per-language table in the cache directory, so a
+    warm run answers most lookups without loading wordfreq at all.
+    """
+
+    def __init__(self, lang: str = "en", maxsize: int = 200_000):
+        self.lang = lang
+        self.zipf = LRUCache(self._lookup_zipf, maxsize)
+        self.stem = LRUCache(self._lookup_stem, maxsize)
+        self._zipf_frequency = None
+        self._stemmer = None
+        self._loaded: set[Path] = set()  # cache dirs already preloaded
+
+    def _lookup_zipf(self, word: str) -> float:
+        if self._zipf_frequency is None:
+            from wordfreq import zipf_frequency
+            self._zipf_frequency = zipf_frequency
+        return self._zipf_frequency(word, self.lang)
+
+    def _lookup_stem(self, word: str) -> str:
+        if self._stemmer is None:
+            from nltk.stem.snowball import SnowballStemmer
+            self._stemmer = SnowballStemmer(_SNOWBALL_LANGUAGES[self.lang])
+        return self._stemmer.stem(word)
+
+    def warm(self) -> None:
+        """Import wordfreq and the stemmer now rather than on the first miss
+        (for long-lived workers)."""
+        self._lookup_zipf("the")
+        self._lookup_stem("the")
+
+    def summary(self) -> str:
+        return (
+            f"zipf {self.zipf.misses} looked up (reused {self.zipf.hits}), "
+            f"stems {self.stem.misses} computed (reused {self.stem.hits})"
+        )
+
+    def _table_path(self, cache_dir: Path) -> Path:
+        return cache_dir / "words" / f"{self.lang}.pickle"
+
+    @staticmethod
+    def _versions() -> dict[str, str]:
+        """Library versions the cached values depend on."""
+        from importlib.metadata import PackageNotFoundError, version
+        versions = {}
+        for package in ("wordfreq", "nltk"):
+            try:
+                versions[package] = version(package)
+            except PackageNotFoundError:
+                versions[package] = ""
+        return versions
+
+    def load(self, cache_dir: Path) -> int:
+        """Preload the on-disk table; returns the number of entries loaded.
+
+        Each directory is only read once per process.
+        """
+        if cache_dir in self._loaded:
+            return 0
+        self._loaded.add(cache_dir)
+        try:
+            with open(self._table_path(cache_dir), "rb") as f:
+                data = pickle.load(f)
+            if data["versions"] != self._versions():
+                return 0
+            self.zipf.update(data["zipf"])
+            self.stem.update(data["stem"])
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            return 0
+        return len(data["zipf"]) + len(data["stem"])
+
+    def save(self, cache_dir: Path) -> None:
+        """Write the cached lookups back, if this run added any."""
+        if not (self.zipf.misses or self.stem.misses):
+            return
+        data = {
+            "versions": self._versions(),
+            "zipf": dict(self.zipf.items()),
+            "stem": dict(self.stem.items()),
+        }
+        path = self._table_path(cache_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+_word_lookups: dict[str, WordLookups] = {}
+_word_lookups_lock = threading.Lock()
+
+
+def word_lookups(lang: str = "en") -> WordLookups:
+    """The process-wide WordLookups for *lang*."""
+    with _word_lookups_lock:
+        if lang not in _word_lookups:
+            _word_lookups[lang] = WordLookups(lang)
+        return _word_lookups[lang]
 
 
 @dataclass
@@ -146,6 +351,101 @@ class CandidateWord:
     position: int       # character offset in un-escaped text
 
 
+class RareCandidates:
+    """Compact store of CandidateWord occurrences.
+
+    Each distinct surface form's (word, lower, stem, zipf) is stored once;
+    occurrences are three parallel typed arrays of form id, chapter index
+    and position.  Iterating or indexing yields CandidateWord objects.
+    """
+
+    def __init__(self):
+        self.forms: list[tuple[str, str, str, float]] = []
+        self._form_ids: dict[tuple[str, str, str, float], int] = {}
+        self.form_ids = array('I')
+        self.chapter_idxs = array('i')
+        self.positions = array('I')
+
+    def add(self, word: str, lower: str, stem: str, zipf: float,
+            chapter_idx: int, position: int) -> None:
+        form = (word, lower, stem, zipf)
+        form_id = self._form_ids.get(form)
+        if form_id is None:
+            form_id = self._form_ids[form] = len(self.forms)
+            self.forms.append(form)
+        self.form_ids.append(form_id)
+        self.chapter_idxs.append(chapter_idx)
+        self.positions.append(position)
+
+    def append(self, cand: CandidateWord) -> None:
+        self.add(cand.word, cand.lower, cand.stem, cand.zipf,
+                 cand.chapter_idx, cand.position)
+
+    def __len__(self) -> int:
+        return len(self.form_ids)
+
+    def __getitem__(self, i: int) -> CandidateWord:
+        return CandidateWord(*self.forms[self.form_ids[i]],
+                             self.chapter_idxs[i], self.positions[i])
+
+    def __iter__(self) -> Iterator[CandidateWord]:
+        forms = self.forms
+        for form_id, chapter_idx, position in zip(
+            self.form_ids, self.chapter_idxs, self.positions,
+        ):
+            yield CandidateWord(*forms[form_id], chapter_idx, position)
+
+    def to_data(self) -> dict:
+        return {
+            "forms": self.forms,
+            "form_ids": self.form_ids.tobytes(),
+            "chapter_idxs": self.chapter_idxs.tobytes(),
+            "positions": self.positions.tobytes(),
+        }
+
+    @classmethod
+    def from_data(cls, data: dict) -> 'RareCandidates':
+        rare = cls()
+        rare.forms = [tuple(form) for form in data["forms"]]
+        rare._form_ids = {form: i for i, form in enumerate(rare.forms)}
+        rare.form_ids.frombytes(data["form_ids"])
+        rare.chapter_idxs.frombytes(data["chapter_idxs"])
+        rare.positions.frombytes(data["positions"])
+        return rare
+
+
+@dataclass
+class IndexCandidates:
+    """The pass-1 candidate pool of an IndexTracker.
+
+    Chapter indices are relative to the tracker that collected them:
+    -1 means "before the first heading", i.e. the chapter that was
+    already open when collection started.
+    """
+    noun_candidates: dict[str, set[int]] = field(default_factory=dict)
+    rare_candidates: RareCandidates = field(default_factory=RareCandidates)
+    stem_counts: dict[str, Counter[str]] = field(default_factory=dict)
+    chapters_started: int = 0   # number of new_chapter() calls
+
+    def to_data(self) -> dict:
+        """Plain builtins form, for caching on disk."""
+        return {
+            "nouns": {word: sorted(idxs) for word, idxs in self.noun_candidates.items()},
+            "rare": self.rare_candidates.to_data(),
+            "stems": {stem: dict(forms) for stem, forms in self.stem_counts.items()},
+            "chapters_started": self.chapters_started,
+        }
+
+    @classmethod
+    def from_data(cls, data: dict) -> 'IndexCandidates':
+        return cls(
+            noun_candidates={word: set(idxs) for word, idxs in data["nouns"].items()},
+            rare_candidates=RareCandidates.from_data(data["rare"]),
+            stem_counts={stem: Counter(forms) for stem, forms in data["stems"].items()},
+            chapters_started=data["chapters_started"],
+        )
+
+
 class IndexTracker:
     """Tracks index state and identifies interesting words during Typst generation.
 
@@ -160,41 +460,101 @@ class IndexTracker:
     """
 
     def __init__(self):
-        from wordfreq import zipf_frequency
-        from nltk.stem.snowball import SnowballStemmer
-        self._zipf = zipf_frequency
-        self._stemmer = SnowballStemmer('english')
+        self._lookups = word_lookups('en')
         # Proper noun collection (two-pass)
         self.noun_candidates: dict[str, set[int]] = {}   # word → {chapter_idxs}
         self._noun_chapter_seen: set[str] = set()        # per-chapter dedup
         self._chapter_idx = -1
         # Rare word two-pass state
-        self.rare_candidates: list[CandidateWord] = []
+        self.rare_candidates = RareCandidates()
         self.stem_counts: dict[str, Counter[str]] = {}  # stem → {surface_form: count}
+        # Chapters per rare word and per stem, kept up to date with
+        # rare_candidates so scoring never rescans the candidate list
+        self.word_chapters: dict[str, set[int]] = {}    # lower → {chapter_idxs}
+        self.stem_chapters: dict[str, set[int]] = {}    # stem → {chapter_idxs}
+        # Scene signal words seen in each open paragraph (innermost last)
+        self._paragraph_words: list[set[str]] = []
 
     def new_chapter(self) -> None:
         """Reset per-chapter state, increment chapter index."""
         self._noun_chapter_seen = set()
         self._chapter_idx += 1
 
+    def candidates(self) -> IndexCandidates:
+        """The candidate pool collected so far (shares this tracker's state)."""
+        return IndexCandidates(
+            noun_candidates=self.noun_candidates,
+            rare_candidates=self.rare_candidates,
+            stem_counts=self.stem_counts,
+            chapters_started=self._chapter_idx + 1,
+        )
+
+    def take_candidates(self) -> IndexCandidates:
+        """Return the candidates collected so far and reset to a fresh tracker.
+
+        Used by chapter workers: each spine document is collected by a
+        fresh tracker and the parent merges the pools back in spine order
+        with merge_candidates().
+        """
+        candidates = self.candidates()
+        self.noun_candidates = {}
+        self._noun_chapter_seen = set()
+        self._chapter_idx = -1
+        self.rare_candidates = RareCandidates()
+        self.stem_counts = {}
+        self.word_chapters = {}
+        self.stem_chapters = {}
+        return candidates
+
+    def merge_candidates(self, candidates: IndexCandidates) -> None:
+        """Append a candidate pool collected by another tracker.
+
+        The pool's chapters are renumbered to follow this tracker's
+        current chapter, so merging per-document pools in spine order
+        gives exactly the state a single tracker would have built.
+        """
+        offset = self._chapter_idx + 1
+        for word, chapter_idxs in candidates.noun_candidates.items():
+            merged = self.noun_candidates.setdefault(word, set())
+            merged.update(idx + offset for idx in chapter_idxs)
+        for cand in candidates.rare_candidates:
+            self._add_rare(cand.word, cand.lower, cand.stem, cand.zipf,
+                           cand.chapter_idx + offset, cand.position)
+        for stem, form_counts in candidates.stem_counts.items():
+            self.stem_counts.setdefault(stem, Counter()).update(form_counts)
+        if candidates.chapters_started:
+            self._noun_chapter_seen = set()
+            self._chapter_idx += candidates.chapters_started
+
     def check_scene_signals(self, plain_text: str) -> list[str]:
         """Check if a paragraph contains a cluster of scene signal words.
 
         Returns list of matched category names (e.g. ["Intimate", "Violence"]).
         """
-        words_lower = set(re.findall(r"[a-z]+", plain_text.lower()))
-        results = []
-        for category, signals in SCENE_SIGNALS.items():
-            hits = words_lower & signals
-            if len(hits) >= SCENE_SIGNAL_THRESHOLD:
-                results.append(category)
-        return results
+        return _scene_categories(set(re.findall(r"[a-z]+", plain_text.lower())))
+
+    def begin_paragraph(self) -> None:
+        """Start collecting scene signal words from annotate_text().
+
+        Only annotated fragments count, each tokenized on its own (unlike
+        check_scene_signals() on the paragraph's whole text).
+        """
+        self._paragraph_words.append(set())
+
+    def end_paragraph(self) -> list[str]:
+        """Finish a paragraph; returns its scene categories like check_scene_signals()."""
+        words = self._paragraph_words.pop()
+        if self._paragraph_words:
+            self._paragraph_words[-1] |= words
+        return _scene_categories(words)
 
     def annotate_text(self, text: str, escaped: str) -> str:
         """Collect index candidates from text (pass 1 — no modification).
 
         Scans text for proper nouns and rare words, recording them as
-        candidates.  Returns escaped unchanged; actual #index[] markers
+        candidates, and notes scene signal words for the open paragraph.
+        Each token is split into word and contraction suffix once and fed
+        to all three.  Returns escaped unchanged; actual #index[] markers
         are inserted in pass 2 by postprocess_index_markers().
 
         Args:
@@ -207,13 +567,29 @@ class IndexTracker:
         if not text or not text.strip():
             return escaped
 
-        for match in re.finditer(r"[A-Za-z'\u2019]+", text):
+        scene_words = self._paragraph_words[-1] if self._paragraph_words else None
+        for match in _TOKEN_RE.finditer(text):
             raw_word = match.group()
-            word_start = match.start()
-
-            is_noun = self._check_proper_noun(raw_word, word_start, text)
-            if not is_noun:
-                self.collect_word(raw_word, word_start, text)
+            if scene_words is not None:
+                lower = raw_word.lower()
+                if "'" in lower or "\u2019" in lower:
+                    scene_words.update(_SCENE_WORDS.intersection(re.split(r"['\u2019]", lower)))
+                elif lower in _SCENE_WORDS:
+                    scene_words.add(lower)
+
+            word = raw_word.strip("'\u2019")
+            m = _SUFFIX_RE.search(word)
+            if m:
+                if m.group(1) != "s":
+                    continue  # contraction (Don't, I'll, Hadn't): not a word
+                word = word[:m.start()]
+            pos = match.start()
+            if (len(word) < 3 or not word.isalpha()
+                    or _is_adjacent_to_separator(pos, raw_word, text)):
+                continue
+            lower = word.lower()
+            if not self._record_noun(word, lower, pos, text) and len(word) >= 4:
+                self._record_rare(word, lower, pos)
 
         return escaped
 
@@ -226,75 +602,55 @@ class IndexTracker:
         # Skip contraction fragments: if the raw token ends with a
         # contraction suffix, the cleaned result (Hadn, Couldn, etc.)
         # is a meaningless fragment, not a real word.
-        stripped = raw_word.strip("'\u2019")
-        for suffix in _CONTRACTION_ONLY_SUFFIXES:
-            if stripped.endswith(suffix):
-                return  # contraction fragment
+        m = _SUFFIX_RE.search(raw_word.strip("'\u2019"))
+        if m and m.group(1) != "s":
+            return
 
         clean = _clean_word(raw_word)
-        lower = clean.lower()
-
         if len(clean) < 4 or not clean.isalpha():
             return
         if _is_adjacent_to_separator(pos, raw_word, full_text):
             return
+        self._record_rare(clean, clean.lower(), pos)
 
-        zipf = self._zipf(lower, 'en')
+    def _record_rare(self, word: str, lower: str, pos: int) -> None:
+        """Record *word* as a rare word candidate unless it's too common."""
+        zipf = self._lookups.zipf(lower)
         if zipf >= 4.0:
             return  # too common
 
-        stem = self._stemmer.stem(lower)
+        stem = self._lookups.stem(lower)
 
         # Track stem → surface form counts
         if stem not in self.stem_counts:
             self.stem_counts[stem] = Counter()
         self.stem_counts[stem][lower] += 1
 
-        self.rare_candidates.append(CandidateWord(
-            word=clean,
-            lower=lower,
-            stem=stem,
-            zipf=zipf,
-            chapter_idx=self._chapter_idx,
-            position=pos,
-        ))
+        self._add_rare(word, lower, stem, zipf, self._chapter_idx, pos)
+
+    def _add_rare(self, word: str, lower: str, stem: str, zipf: float,
+                  chapter_idx: int, position: int) -> None:
+        """Record a rare word candidate and its chapter aggregates."""
+        self.rare_candidates.add(word, lower, stem, zipf, chapter_idx, position)
+        self.word_chapters.setdefault(lower, set()).add(chapter_idx)
+        self.stem_chapters.setdefault(stem, set()).add(chapter_idx)
 
-    def _check_proper_noun(self, raw_word: str, pos: int, full_text: str) -> bool:
+    def _record_noun(self, word: str, lower: str, pos: int, full_text: str) -> bool:
         """Check if a word is a proper noun and record it as a candidate.
 
-        Collects proper noun candidates for later scoring.  No zipf ceiling;
-        scoring in select_all() handles ranking naturally.
+        *word* is an alphabetic token of 3+ letters with edge quotes and
+        possessive already stripped.  Collects proper noun candidates for
+        later scoring.  No zipf ceiling; scoring in select_all() handles
+        ranking naturally.
 
         Returns True if the word was recorded as a noun candidate.
         """
-        # Strip edge quotes
-        word = raw_word.strip("'\u2019")
-
-        # If the word is a contraction (Don't, I'll, etc.), skip entirely
-        for suffix in _CONTRACTION_ONLY_SUFFIXES:
-            if word.endswith(suffix):
-                return False
-
-        # Strip possessive 's / \u2019s
-        for suffix in ("'s", "\u2019s"):
-            if word.endswith(suffix):
-                word = word[:-len(suffix)]
-                break
-
-        if len(word) < 3:
-            return False
-        # Must be purely alphabetic (filters C'mon, O'Brien-style words)
-        if not word.isalpha():
-            return False
-        if _is_adjacent_to_separator(pos, raw_word, full_text):
-            return False
-
         # Must be Title-case (not ALL CAPS)
         if not (word[0].isupper() and (len(word) == 1 or not word[1:].isupper())):
             return False
 
         # Must contain at least one vowel (filters interjections: Mmhmm, Pfft, Hmph)
-        if not any(c in _VOWELS for c in word.lower()):
+        if not any(c in _VOWELS for c in lower):
             return False
 
         if not self._is_mid_sentence(pos, full_text):
@@ -322,40 +678,41 @@ class IndexTracker:
             all_scored: full scored list for printing, each entry is
                 (score, category, display_word, lower, zipf, spread).
         """
+        all_scored = self.score_all()
+        return self.select(all_scored, budget), all_scored
+
+    def score_all(self) -> list[tuple[float, str, str, str, float, int]]:
+        """Score every candidate (nouns + rare words), best first.
+
+        Each entry is (score, category, display_word, lower, zipf, spread).
+        The ranking doesn't depend on the budget, so one scoring run can
+        be cut at any number of index sizes with select().
+        """
         all_scored: list[tuple[float, str, str, str, float, int]] = []
 
         # --- Score rare words (grouped by stem) ---
-        if self.rare_candidates:
-            stem_groups: dict[str, list[CandidateWord]] = {}
-            for cand in self.rare_candidates:
-                stem_groups.setdefault(cand.stem, []).append(cand)
-
-            for stem, candidates in stem_groups.items():
-                form_counts = self.stem_counts.get(stem, Counter())
-                display_lower = (
-                    form_counts.most_common(1)[0][0]
-                    if form_counts else candidates[0].lower
-                )
-                display_word = display_lower.capitalize()
-
-                zipf = self._zipf(display_lower, 'en')
-                rarity = max(0.0, 4.0 - zipf)
-                if rarity == 0:
-                    continue
+        for stem, chapters in self.stem_chapters.items():
+            form_counts = self.stem_counts[stem]
+            display_lower = form_counts.most_common(1)[0][0]
+            display_word = display_lower.capitalize()
+
+            zipf = self._lookups.zipf(display_lower)
+            rarity = max(0.0, 4.0 - zipf)
+            if rarity == 0:
+                continue
 
-                chapters = {c.chapter_idx for c in candidates}
-                spread = len(chapters)
-                count = sum(form_counts.values())
-                usedness = min(math.log2(count + 1), 3.0)
-                score = rarity * usedness * (1 + 0.2 * min(spread, 5))
+            spread = len(chapters)
+            count = sum(form_counts.values())
+            usedness = min(math.log2(count + 1), 3.0)
+            score = rarity * usedness * (1 + 0.2 * min(spread, 5))
 
-                all_scored.append(
-                    (score, "word", display_word, display_lower, zipf, spread)
-                )
+            all_scored.append(
+                (score, "word", display_word, display_lower, zipf, spread)
+            )
 
         # --- Score proper nouns ---
         for word, chapter_idxs in self.noun_candidates.items():
-            zipf = self._zipf(word.lower(), 'en')
+            zipf = self._lookups.zipf(word.lower())
             rarity = max(0.0, _PROPER_NOUN_RARITY_CEILING - zipf)
             if rarity == 0:
                 continue
@@ -371,9 +728,15 @@ class IndexTracker:
             lower = entry[3]
             if lower not in best_by_lower or entry[0] > best_by_lower[lower][0]:
                 best_by_lower[lower] = entry
-        all_scored = sorted(best_by_lower.values(), key=lambda x: x[0], reverse=True)
+        return sorted(best_by_lower.values(), key=lambda x: x[0], reverse=True)
+
+    def select(
+        self, all_scored: list[tuple[float, str, str, str, float, int]], budget: int,
+    ) -> dict[str, tuple[str, set[int]]]:
+        """Pick the top *budget* entries of a score_all() ranking.
 
-        # --- Select top N ---
+        Returns {lowercase_word: (DisplayForm, {chapter_indices})}.
+        """
         selected: dict[str, tuple[str, set[int]]] = {}
         for i, (score, cat, display, lower, zipf, spread) in enumerate(all_scored):
             if i >= budget:
@@ -383,14 +746,11 @@ class IndexTracker:
                 chapter_idxs = self.noun_candidates.get(display, set())
                 chapters = set(sorted(chapter_idxs)[:3])
             else:
-                # Rare words: find all chapters from candidates
-                chapters: set[int] = set()
-                for cand in self.rare_candidates:
-                    if cand.lower == lower:
-                        chapters.add(cand.chapter_idx)
+                # Rare words: every chapter the display form appeared in
+                chapters = set(self.word_chapters.get(lower, ()))
             selected[lower] = (display, chapters)
 
-        return selected, all_scored
+        return selected
 
     def _is_mid_sentence(self, pos: int, text: str) -> bool:
         """Check if position is mid-sentence (not after sentence-ending punctuation)."""
@@ -415,21 +775,91 @@ class IndexTracker:
 
 def print_index_scores(
     all_scored: list[tuple[float, str, str, str, float, int]],
-    budget: int,
+    budget: int | list[int],
 ) -> None:
-    """Print the full scored index list showing what's selected vs excluded."""
+    """Print the full scored index list showing what's selected vs excluded.
+
+    *budget* may be a list of index sizes to mark a cutoff line for each.
+    """
     if not all_scored:
         print("  No index candidates found.")
         return
 
-    print(f"  Index: {len(all_scored)} candidates scored, selecting top {budget}")
+    budgets = sorted(set(budget)) if isinstance(budget, list) else [budget]
+    sizes = ", ".join(str(b) for b in budgets)
+    print(f"  Index: {len(all_scored)} candidates scored, selecting top {sizes}")
     print(f"  {'Score':>7s}  {'Cat':<4s}  {'Word':<20s}  {'Zipf':>4s}  {'Spread':>6s}")
     for i, (score, cat, display, lower, zipf, spread) in enumerate(all_scored):
-        if i == budget:
-            print(f"  {'---- index-size cutoff (' + str(budget) + ') ----':^53s}")
+        if i in budgets:
+            print(f"  {'---- index-size cutoff (' + str(i) + ') ----':^53s}")
         print(f"  {score:7.2f}  {cat:<4s}  {display:<20s}  {zipf:4.2f}  {spread:6d}")
 
 
+def sweep_index_sizes(
+    index_tracker: IndexTracker,
+    chapters: list['Chapter'],
+    budgets: list[int],
+) -> None:
+    """Compare several --index-size values from a single scoring run.
+
+    Scores the tracker's candidate pool once, prints the ranking with a
+    cutoff line per budget, then runs pass 2 on a copy of the chapters
+    for each budget and summarizes what each size would produce.
+    """
+    all_scored = index_tracker.score_all()
+    print_index_scores(all_scored, budgets)
+    if not all_scored:
+        return
+
+    print(f"  {'Size':>6s}  {'Nouns':>5s}  {'Words':>5s}  {'Min score':>9s}  {'Markers':>7s}")
+    for budget in sorted(set(budgets)):
+        top = all_scored[:budget]
+        selected = index_tracker.select(all_scored, budget)
+        scratch = [Chapter(title=ch.title, content=ch.read()) for ch in chapters]
+        before = sum(ch.content.count("#index[") for ch in scratch)
+        postprocess_index_markers(scratch, selected)
+        markers = sum(ch.content.count("#index[") for ch in scratch) - before
+        nouns = sum(1 for entry in top if entry[1] == "noun")
+        min_score = f"{top[-1][0]:9.2f}" if top else f"{'-':>9s}"
+        print(f"  {budget:6d}  {nouns:5d}  {len(top) - nouns:5d}  "
+              f"{min_score}  {markers:7d}")
+
+
+_BRACKET_RE = re.compile(r'[\[\]]')
+_WORD_RUN_RE = re.compile(r'\w+')
+# Index words as IndexTracker produces them: letters with inner apostrophes
+_INDEX_WORD_RE = re.compile(r"[a-z]+(?:['\u2019][a-z]+)*")
+# Non-ASCII letters that re.IGNORECASE matches against ASCII ones
+# (lower() alone would miss these, or change the length for U+0130).
+_ASCII_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u212a': 'k'})
+
+
+def _outside_brackets(content: str, pos: int, cache: list[int]) -> bool:
+    """True unless the next bracket at or after *pos* is a closing ``]``.
+
+    Same test as the lookahead ``(?![^[]*])``, but *cache* holds
+    ``[searched_from, found_at]`` so nearby queries don't rescan.
+    """
+    if not cache[0] <= pos <= cache[1]:
+        m = _BRACKET_RE.search(content, pos)
+        cache[0], cache[1] = pos, m.start() if m else len(content)
+    return cache[1] == len(content) or content[cache[1]] != ']'
+
+
+def _next_occurrence(
+    content: str, word: str, pos: int, points: set[int],
+) -> tuple[int, int] | None:
+    """First match of *word* at or after *pos* not split by a marker point."""
+    pattern = re.compile(
+        rf'(?<![#\[])(\b{re.escape(word)}\b)(?![^\[]*\])', re.IGNORECASE,
+    )
+    while m := pattern.search(content, pos):
+        if not any(m.start() < p < m.end() for p in points):
+            return m.start(), m.end()
+        pos = m.start() + 1
+    return None
+
+
 def postprocess_index_markers(
     chapters: list['Chapter'],
     selected: dict[str, tuple[str, set[int]]],
@@ -438,7 +868,12 @@ def postprocess_index_markers(
 
     Pass 2: for each selected entry (proper noun or rare word), finds its
     first occurrence in each chapter and inserts #index[Display] after it.
-    Modifies chapters in place.
+    Modifies chapters in place; streamed chapters are read from disk and
+    only the files that gain a marker are rewritten.
+
+    Each chapter is walked once, word by word, looking entries up by
+    their first word run, and rebuilt once.  The result is the same as
+    inserting the entries one at a time in *selected* order.
 
     Args:
         chapters: List of Chapter objects with Typst content.
@@ -448,25 +883,71 @@ def postprocess_index_markers(
     if not selected:
         return
 
-    for word_lower, (display, chapter_idxs) in selected.items():
-        # Match the word at a word boundary, but not inside existing
-        # #index[...] blocks or other Typst markup.
-        pattern = re.compile(
-            rf'(?<![#\[])(\b{re.escape(word_lower)}\b)(?![^\[]*\])',
-            re.IGNORECASE,
-        )
+    words = [w.lower() for w in selected]
+    displays = [display for display, _ in selected.values()]
+    # Entries keyed by their first word run, longest entry first; anything
+    # unusual is searched for on its own.
+    by_first_run: dict[str, list[int]] = {}
+    searched: list[int] = []
+    for i in sorted(range(len(words)), key=lambda i: -len(words[i])):
+        if _INDEX_WORD_RE.fullmatch(words[i]):
+            by_first_run.setdefault(_WORD_RUN_RE.match(words[i]).group(), []).append(i)
+        else:
+            searched.append(i)
+
+    wanted: dict[int, list[int]] = {}
+    for i, (_, chapter_idxs) in enumerate(selected.values()):
         for ch_idx in chapter_idxs:
-            if ch_idx < 0 or ch_idx >= len(chapters):
+            if 0 <= ch_idx < len(chapters):
+                wanted.setdefault(ch_idx, []).append(i)
+
+    for ch_idx, entries in wanted.items():
+        content = chapters[ch_idx].read()
+        folded = content.translate(_ASCII_FOLD).lower()
+        todo = set(entries)
+        first: dict[int, tuple[int, int]] = {}
+        for i in todo.intersection(searched):
+            if span := _next_occurrence(content, words[i], 0, set()):
+                first[i] = span
+        todo.difference_update(searched)
+
+        cache = [0, -1]
+        for m in _WORD_RUN_RE.finditer(folded) if todo else ():
+            candidates = by_first_run.get(m.group())
+            start = m.start()
+            if not candidates or content[start - 1:start] in ('#', '['):
                 continue
-            chapter = chapters[ch_idx]
-            m = pattern.search(chapter.content)
-            if m:
-                insert_pos = m.end()
-                chapter.content = (
-                    chapter.content[:insert_pos]
-                    + f"#index[{display}]"
-                    + chapter.content[insert_pos:]
-                )
+            for i in candidates:
+                end = start + len(words[i])
+                if (i in todo and folded.startswith(words[i], start)
+                        and not _WORD_RUN_RE.match(folded, end)
+                        and _outside_brackets(content, end, cache)):
+                    first[i] = (start, end)
+                    todo.discard(i)
+            if not todo:
+                break
+
+        # An earlier entry's marker landing inside a later entry's match
+        # splits that occurrence; fall back to its next one.
+        inserted: list[tuple[int, int, str]] = []
+        points: set[int] = set()
+        for order, i in enumerate(entries):
+            span = first.get(i)
+            if span and any(span[0] < p < span[1] for p in points):
+                span = _next_occurrence(content, words[i], span[0] + 1, points)
+            if span:
+                inserted.append((span[1], -order, displays[i]))
+                points.add(span[1])
+
+        if inserted:
+            inserted.sort()
+            parts, prev = [], 0
+            for pos, _, display in inserted:
+                parts.append(content[prev:pos])
+                parts.append(f"#index[{display}]")
+                prev = pos
+            parts.append(content[prev:])
+            chapters[ch_idx].write("".join(parts))
 
 
 # Namespaces used in EPUB/XHTML
@@ -480,12 +961,136 @@ NAMESPACES = {
 }
 
 
+# Paragraph texts that count as chapter headings.  Each pattern must match
+# the ENTIRE (stripped) text, case-insensitively.  Add more with
+# register_heading_pattern(); all of them are tried in one combined regex.
+CHAPTER_HEADING_PATTERNS: list[str] = [
+    r'Chapter\s+(\d+|One|Two|Three|Four|Five|Six|Seven|Eight|Nine|Ten|Eleven|Twelve|\w+)',
+    r'Part\s+(\d+|One|Two|Three|Four|Five|Six|Seven|Eight|Nine|Ten|I+|IV|V|VI+)',
+    r'\d+',  # Bare chapter numbers (e.g. "1", "23")
+    r'Prologue',
+    r'Epilogue',
+    r'Introduction',
+    r'Acknowledgments',
+    r'Acknowledgements',
+    r'About the Author',
+    r"Author'?s? Note",
+]
+_chapter_heading_re: re.Pattern | None = None
+_BARE_NUMBER_RE = re.compile(r'\d+')
+
+
+def register_heading_pattern(pattern: str) -> None:
+    """Treat paragraphs whose whole text matches *pattern* as chapter headings."""
+    global _chapter_heading_re
+    CHAPTER_HEADING_PATTERNS.append(pattern)
+    _chapter_heading_re = None
+
+
+def _chapter_heading_matcher() -> re.Pattern:
+    """CHAPTER_HEADING_PATTERNS as one compiled regex (rebuilt after registering)."""
+    global _chapter_heading_re
+    if _chapter_heading_re is None:
+        _chapter_heading_re = re.compile(
+            "|".join(f"(?:{p})" for p in CHAPTER_HEADING_PATTERNS), re.IGNORECASE,
+        )
+    return _chapter_heading_re
+
+
+# Characters with meaning in Typst markup, escaped with a backslash
+_TYPST_SPECIALS = "\\#@$<>[]*_`"
+_TYPST_SPECIAL_RE = re.compile(f"[{re.escape(_TYPST_SPECIALS)}]")
+_TYPST_ESCAPES = str.maketrans({c: "\\" + c for c in _TYPST_SPECIALS})
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write *data* to *path* via a temp file, so readers (and hard links
+    to the old file) never see a partial write."""
+    tmp = _tmp_sibling(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _tmp_sibling(path: Path) -> Path:
+    """A temp name next to *path*, unique per process and thread."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link *src* to *dst*, copying if linking isn't possible.
+
+    An existing *dst* is replaced, never written through (it may itself
+    be a link into the cache).
+    """
+    tmp = _tmp_sibling(dst)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        _copy_file(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """Copy *src* to *dst* in the kernel: copy_file_range (which reflinks
+    on filesystems that support it), else shutil's sendfile path."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fin, open(dst, "wb") as fout:
+                remaining = os.fstat(fin.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if not copied:
+                        break
+                    remaining -= copied
+            return
+        except OSError:
+            pass  # e.g. across filesystems on older kernels
+    shutil.copyfile(src, dst)
+
+
+def _place_file(src: Path, dst: Path, move: bool = False) -> None:
+    """Put *src* at *dst* without reading it into Python.
+
+    With *move*, a rename when both are on one filesystem. *dst* only
+    ever appears complete.
+    """
+    if move:
+        try:
+            os.replace(src, dst)
+            return
+        except OSError:
+            pass  # across filesystems: copy instead
+    tmp = _tmp_sibling(dst)
+    try:
+        _copy_file(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if move:
+        src.unlink()
+
+
 @dataclass
 class Chapter:
     """Represents a chapter extracted from EPUB."""
     title: str
-    content: str  # Typst content
+    content: str  # Typst content ("" when it lives in *path*)
     images: dict[str, bytes] = field(default_factory=dict)
+    path: Path | None = None  # Typst content file in a streamed build
+
+    def read(self) -> str:
+        """The chapter's Typst content, from disk if it was streamed there."""
+        if self.path is None:
+            return self.content
+        return self.path.read_bytes().decode("utf-8")
+
+    def write(self, content: str) -> None:
+        """Replace the chapter's Typst content (on disk if streamed)."""
+        if self.path is None:
+            self.content = content
+        else:
+            _write_atomic(self.path, content.encode("utf-8"))
 
 
 @dataclass
@@ -495,46 +1100,194 @@ class Book:
     author: str
     chapters: list[Chapter]
     images: dict[str, bytes] = field(default_factory=dict)
+    # Images already written to the build directory (streamed builds)
+    image_files: list[Path] = field(default_factory=list)
+
+
+# Images are shrunk to fit this box before measuring ink coverage.  The
+# average darkness survives box-filter downscaling almost unchanged.
+_INK_SAMPLE_SIZE = (256, 256)
+
+
+def _image_digest(data: bytes) -> str:
+    """Content hash used to key image caches."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _content_addressed_name(digest: str, src: str) -> str:
+    """Stable build-directory file name for an image.
+
+    Derived from the content digest; the source extension is kept
+    because Typst picks the decoder from it.
+    """
+    suffix = re.sub(r"[^a-z0-9.]", "", Path(src).suffix.lower())
+    if suffix == ".jpeg":
+        suffix = ".jpg"
+    return f"img-{digest[:20]}{suffix}"
+
+
+def _measure_ink_coverage(img_data: bytes) -> float:
+    """Average darkness of an image (0.0 = white, 1.0 = black).
+
+    Decodes JPEGs at reduced scale, box-filters the image down to
+    _INK_SAMPLE_SIZE and takes the mean from PIL's native histogram.
+    """
+    try:
+        from PIL import Image, ImageStat
+
+        img = Image.open(io.BytesIO(img_data))
+        img.draft("L", _INK_SAMPLE_SIZE)  # no-op for anything but JPEG
+        # Box filtering commutes with the (linear) RGB→L conversion, so
+        # shrink first; other modes (palette, alpha, CMYK…) convert first.
+        if img.mode not in ("L", "RGB"):
+            img = img.convert("L")
+        img.thumbnail(_INK_SAMPLE_SIZE, Image.Resampling.BOX)
+        gray = img.convert("L")
+        # Invert so 0=white, 1=black (ink coverage)
+        return 1.0 - ImageStat.Stat(gray).mean[0] / 255.0
+    except Exception:
+        # If we can't analyze the image, assume it's okay to include
+        return 0.0
+
+
+@dataclass
+class DocumentStoreStats:
+    """Hit/miss counters for a DocumentStore."""
+    decompress_hits: int = 0
+    decompress_misses: int = 0
+    parse_hits: int = 0
+    parse_misses: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"parsed {self.parse_misses} (reused {self.parse_hits}), "
+            f"decompressed {self.decompress_misses} (reused {self.decompress_hits})"
+        )
+
+
+class DocumentStore:
+    """Per-conversion cache of decompressed and parsed EPUB zip members.
+
+    Footnote collection, TOC detection and chapter conversion all look at
+    the same XHTML files.  The store decompresses and parses each member
+    at most once and hands every caller the same tree, so callers must
+    treat the returned elements as read-only.
+    """
+
+    def __init__(self, zf: zipfile.ZipFile):
+        self.zip = zf
+        self.stats = DocumentStoreStats()
+        self._data: dict[str, bytes] = {}
+        # name → parsed root, or the exception parsing raised
+        self._trees: dict[str, etree._Element | Exception] = {}
+
+    def read(self, name: str) -> bytes:
+        """Return the decompressed bytes of a zip member (KeyError if missing)."""
+        data = self._data.get(name)
+        if data is not None:
+            self.stats.decompress_hits += 1
+            return data
+        data = self.zip.read(name)
+        self.stats.decompress_misses += 1
+        self._data[name] = data
+        return data
+
+    def parse(self, name: str) -> etree._Element:
+        """Return the parsed root of a zip member.
+
+        Raises KeyError if the member is missing, and re-raises the original
+        parse error (e.g. etree.XMLSyntaxError) on every call for a member
+        that failed to parse.
+        """
+        tree = self._trees.get(name)
+        if tree is not None:
+            self.stats.parse_hits += 1
+            if isinstance(tree, Exception):
+                raise tree
+            return tree
+        from lxml import etree
+
+        data = self.read(name)
+        self.stats.parse_misses += 1
+        try:
+            tree = etree.fromstring(data)
+        except Exception as exc:
+            tree = exc
+        # The tree is what gets reused; the raw markup isn't needed again
+        self._data.pop(name, None)
+        self._trees[name] = tree
+        if isinstance(tree, Exception):
+            raise tree
+        return tree
+
+    def discard(self, name: str) -> None:
+        """Drop the cached data and tree of one member."""
+        self._data.pop(name, None)
+        self._trees.pop(name, None)
+
+    def clear(self) -> None:
+        """Drop cached data and trees (counters are kept)."""
+        self._data.clear()
+        self._trees.clear()
+
+
+@dataclass
+class DocumentAnalysis:
+    """What EPUBParser needs from one XHTML document, gathered in one tree walk."""
+    body: etree._Element | None = None
+    title: str = ""             # heading-derived title candidate ("" if none)
+    toc_paragraphs: int = 0     # non-empty <p> elements in the body
+    toc_chapter_links: int = 0  # ... of which are chapter-heading links to other files
+    footnotes: dict[str, str] = field(default_factory=dict)
+    # stripped text of every <p> in the body, reused during conversion
+    paragraph_text: dict[etree._Element, str] = field(default_factory=dict)
+    # ... and those whose text is a chapter heading
+    heading_paragraphs: set[etree._Element] = field(default_factory=set)
 
 
 class EPUBParser:
     """Parses EPUB files and extracts content."""
 
     def __init__(self, epub_path: Path, max_ink: float | None = None,
-                 index_tracker: IndexTracker | None = None):
+                 index_tracker: IndexTracker | None = None, jobs: int = 1):
         self.epub_path = epub_path
         self.index_tracker = index_tracker
+        self.jobs = jobs  # worker processes for chapter conversion (1 = serial)
         self.zip = zipfile.ZipFile(epub_path, "r")
+        self.documents = DocumentStore(self.zip)
+        self._analyses: dict[str, DocumentAnalysis] = {}  # zip path → analysis
+        self._paragraph_text: dict[etree._Element, str] = {}  # of the current document
+        self._heading_paragraphs: set[etree._Element] = set()
         self.opf_path: str = ""
         self.opf_dir: str = ""
         self.footnotes: dict[str, str] = {}  # id -> footnote content
         self.max_ink = max_ink  # Maximum ink coverage (0.0-1.0) for images, None = no limit
+        self._ink_cache: dict[str, float] = {}  # image digest → ink coverage
 
-    def _calculate_ink_coverage(self, img_data: bytes) -> float:
+    def _calculate_ink_coverage(self, img_data: bytes, digest: str | None = None) -> float:
         """Calculate the ink coverage of an image (0.0 = white, 1.0 = black).
         
-        Uses the average darkness of pixels as a proxy for ink usage.
+        Memoized by content hash, so cover art and ornaments repeated
+        across chapters are only analyzed once.  Pass *digest* if the
+        caller already has the image's _image_digest().
         """
-        try:
-            from PIL import Image
-            import io
-            
-            img = Image.open(io.BytesIO(img_data))
-            # Convert to grayscale
-            gray = img.convert("L")
-            # Get pixel data
-            pixels = list(gray.getdata())
-            # Calculate average darkness (0=black, 255=white)
-            # Invert so 0=white, 1=black (ink coverage)
-            avg_brightness = sum(pixels) / len(pixels)
-            ink_coverage = 1.0 - (avg_brightness / 255.0)
-            return ink_coverage
-        except Exception:
-            # If we can't analyze the image, assume it's okay to include
-            return 0.0
+        if digest is None:
+            digest = _image_digest(img_data)
+        ink = self._ink_cache.get(digest)
+        if ink is None:
+            ink = _measure_ink_coverage(img_data)
+            self._ink_cache[digest] = ink
+        return ink
+
+    def parse(self, build_dir: Path | None = None) -> Book:
+        """Parse the EPUB and return a Book object.
+
+        With *build_dir*, each chapter's Typst is written to
+        ``chapters/NNNN.typ`` and each image into *build_dir* as soon as
+        it is converted, so the Book holds only titles and paths.
+        """
+        from lxml import etree
 
-    def parse(self) -> Book:
-        """Parse the EPUB and return a Book object."""
         container_xml = self.zip.read("META-INF/container.xml")
         container = etree.fromstring(container_xml)
         rootfile = container.find(
@@ -587,15 +1340,60 @@ class EPUBParser:
         content_items = [h for h in content_items if not self._is_toc_file(h)]
 
         # Second pass: parse chapters
-        chapters = []
-        images = {}
-        for href in content_items:
-            chapter, chapter_images = self._parse_document(href)
-            if chapter and chapter.content.strip():
-                chapters.append(chapter)
-                images.update(chapter_images)
-
-        return Book(title=title, author=author, chapters=chapters, images=images)
+        if self.jobs > 1 and len(content_items) > 1:
+            results = self._parse_documents_parallel(content_items)
+        else:
+            results = (self._parse_document(href) for href in content_items)
+
+        book = Book(title=title, author=author, chapters=[])
+        if build_dir is not None:
+            (build_dir / "chapters").mkdir(parents=True, exist_ok=True)
+        written = set()
+        for chapter, chapter_images in results:
+            if not (chapter and chapter.content.strip()):
+                continue
+            if build_dir is None:
+                book.chapters.append(chapter)
+                book.images.update(chapter_images)
+                continue
+            # Atomic writes, in case a half-loaded cache entry left hard
+            # links to cached files behind
+            chapter.path = build_dir / "chapters" / f"{len(book.chapters):04d}.typ"
+            _write_atomic(chapter.path, chapter.content.encode("utf-8"))
+            chapter.content = ""
+            book.chapters.append(chapter)
+            for name, data in chapter_images.items():
+                if name not in written:
+                    written.add(name)
+                    _write_atomic(build_dir / name, data)
+                    book.image_files.append(build_dir / name)
+
+        # Trees are only needed while parsing; free them before typesetting
+        self._analyses.clear()
+        self.documents.clear()
+
+        return book
+
+    def _parse_documents_parallel(
+        self, hrefs: list[str],
+    ) -> Iterator[tuple[Chapter | None, dict[str, bytes]]]:
+        """Convert spine documents in a process pool, yielding in spine order.
+
+        Each worker collects index candidates with its own tracker; the
+        pools are merged here in spine order so the result is identical to
+        the serial path.
+        """
+        initargs = (
+            self.epub_path, self.max_ink, self.index_tracker is not None,
+            self.opf_path, self.opf_dir, self.toc_titles, self.footnotes,
+        )
+        with ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=_init_chapter_worker, initargs=initargs,
+        ) as pool:
+            for chapter, images, candidates in pool.map(_convert_chapter_worker, hrefs):
+                if candidates is not None:
+                    self.index_tracker.merge_candidates(candidates)
+                yield chapter, images
 
     def _parse_toc_titles(self) -> dict[str, str]:
         """Parse the NCX table of contents to build a href -> title mapping.
@@ -603,6 +1401,8 @@ class EPUBParser:
         This provides chapter titles as a fallback when they can't be detected
         from heading tags (e.g. EPUBs that use styled <p>/<span> for headings).
         """
+        from lxml import etree
+
         titles = {}
         # Try NCX first
         try:
@@ -647,41 +1447,16 @@ class EPUBParser:
         TOC files are characterized by having multiple chapter-heading-like
         paragraphs that are all links to other files.
         """
-        full_path = self._resolve_path(href)
+        from lxml import etree
+
         try:
-            content = self.zip.read(full_path)
-            doc = etree.fromstring(content)
+            analysis = self._analyze(self._resolve_path(href))
         except (KeyError, etree.XMLSyntaxError):
             return False
-        
-        body = doc.find(".//{http://www.w3.org/1999/xhtml}body")
-        if body is None:
-            return False
-        
-        # Count chapter-like link entries vs total paragraphs
-        chapter_links = 0
-        total_paragraphs = 0
-        
-        for p in body.iter("{http://www.w3.org/1999/xhtml}p"):
-            text = self._extract_text(p).strip()
-            if not text:
-                continue
-            total_paragraphs += 1
-            
-            # Check if this paragraph is a chapter-heading-like link
-            if self._is_chapter_heading(text):
-                # Check if the paragraph is primarily a link to another file
-                for a in p.iter("{http://www.w3.org/1999/xhtml}a"):
-                    a_href = a.get("href", "")
-                    a_text = self._extract_text(a).strip()
-                    # If the link text matches the paragraph and links to another file
-                    if a_text == text and a_href and not a_href.startswith("#"):
-                        href_file = a_href.split("#")[0] if "#" in a_href else a_href
-                        # Link points to a different file (not same file anchor)
-                        if href_file and href_file != Path(href).name:
-                            chapter_links += 1
-                            break
-        
+
+        chapter_links = analysis.toc_chapter_links
+        total_paragraphs = analysis.toc_paragraphs
+
         # If more than half the paragraphs are chapter links, it's a TOC
         if total_paragraphs > 0 and chapter_links >= 3 and chapter_links / total_paragraphs > 0.3:
             return True
@@ -693,102 +1468,196 @@ class EPUBParser:
         for filename in self.zip.namelist():
             if filename.endswith((".html", ".xhtml")):
                 try:
-                    content = self.zip.read(filename)
-                    self._extract_footnotes_from_content(content, filename)
+                    analysis = self._analyze(filename)
                 except Exception:
                     continue
+                self.footnotes.update(analysis.footnotes)
 
     def _extract_footnotes_from_content(self, content: bytes, filename: str) -> None:
         """Extract footnotes from HTML content."""
+        from lxml import etree
+
         try:
             doc = etree.fromstring(content)
         except Exception:
             return
+        self.footnotes.update(self._analyze_tree(doc, filename).footnotes)
+
+    def _analyze(self, full_path: str) -> DocumentAnalysis:
+        """Return the (cached) analysis of a zip member.
 
-        # Get base filename for reference
+        Raises KeyError or the parse error like DocumentStore.parse().
+        """
+        analysis = self._analyses.get(full_path)
+        if analysis is None:
+            doc = self.documents.parse(full_path)
+            analysis = self._analyze_tree(doc, full_path)
+            self._analyses[full_path] = analysis
+        return analysis
+
+    def _analyze_tree(self, doc: etree._Element, filename: str) -> DocumentAnalysis:
+        """Gather everything the parser needs from a document in one tree walk.
+
+        Collects the body, the title candidate, TOC-likeness statistics,
+        footnotes and the stripped text of every paragraph, which
+        _convert_element reuses instead of re-extracting it.
+        """
+        xhtml = "{http://www.w3.org/1999/xhtml}"
+        epub_type_attr = "{http://www.idpf.org/2007/ops}type"
         base_name = Path(filename).name
+        analysis = DocumentAnalysis()
+        xhtml_body = plain_body = None
+        # First h1/h2/h3 and first chapter-heading <p> per namespace
+        title_elems: dict[str, etree._Element] = {}
+        heading_paragraph: dict[str, str] = {}
 
-        # Look for elements with footnote IDs or classes
         for elem in doc.iter():
+            tag = elem.tag
+            if not isinstance(tag, str):
+                continue  # comments and processing instructions
+
+            # Footnote containers can sit anywhere, including outside the body
             elem_id = elem.get("id", "")
-            elem_class = elem.get("class", "")
-            epub_type = elem.get("{http://www.idpf.org/2007/ops}type", "")
+            if elem_id:
+                self._collect_footnote(elem, elem_id, base_name, analysis.footnotes)
 
-            # Check if this is a footnote container
-            is_footnote = (
-                "footnote" in elem_class.lower()
-                or "footnote" in epub_type.lower()
-                or "endnote" in epub_type.lower()
-                or (elem_id and "footnote" in elem_id.lower())
-            )
+            if tag.startswith(xhtml):
+                ns, local = xhtml, tag[len(xhtml):]
+            else:
+                ns, local = "", tag
+
+            if local == "body" and elem is not doc:
+                if ns and xhtml_body is None:
+                    xhtml_body = elem
+                elif not ns and plain_body is None:
+                    plain_body = elem
+                continue
+            # Everything after the (last-in-<html>) body start is inside it
+            if xhtml_body is None and plain_body is None:
+                continue
 
-            if is_footnote and elem_id:
-                # Extract text, removing the footnote marker (*, †, etc.)
+            if local in ("h1", "h2", "h3"):
+                title_elems.setdefault(local + ns, elem)
+            elif local == "p":
                 text = self._extract_text(elem).strip()
-                # Remove common footnote markers at start
-                text = re.sub(r"^[\*†‡§¶#]+\s*", "", text)
-                text = re.sub(r"^\d+\.?\s*", "", text)
-
-                if text:
-                    # Store with various key formats for matching
-                    self.footnotes[elem_id] = text
-                    self.footnotes[f"{base_name}#{elem_id}"] = text
-                    # Also store by any internal anchor IDs
-                    for anchor in elem.findall(".//{http://www.w3.org/1999/xhtml}a"):
-                        anchor_id = anchor.get("id", "")
-                        if anchor_id:
-                            self.footnotes[anchor_id] = text
-                            self.footnotes[f"{base_name}#{anchor_id}"] = text
+                analysis.paragraph_text[elem] = text
+                if not text:
+                    continue
+                is_heading = self._is_chapter_heading(text)
+                if is_heading:
+                    analysis.heading_paragraphs.add(elem)
+                    heading_paragraph.setdefault(ns, text)
+                if ns and xhtml_body is not None:
+                    analysis.toc_paragraphs += 1
+                    if is_heading and self._is_chapter_link(elem, text, base_name):
+                        analysis.toc_chapter_links += 1
+
+        analysis.body = xhtml_body if xhtml_body is not None else plain_body
+
+        # Title priority: h1, h2, h3 (XHTML before un-namespaced), then
+        # chapter-heading paragraphs (common in Calibre-converted EPUBs)
+        for tag in ("h1", "h2", "h3"):
+            for ns in (xhtml, ""):
+                elem = title_elems.get(tag + ns)
+                if elem is not None:
+                    analysis.title = self._extract_text(elem).strip()
+                    return analysis
+        analysis.title = heading_paragraph.get(xhtml) or heading_paragraph.get("", "")
+        return analysis
+
+    def _collect_footnote(
+        self, elem: etree._Element, elem_id: str, base_name: str,
+        footnotes: dict[str, str],
+    ) -> None:
+        """Record elem in footnotes if it is a footnote container."""
+        elem_class = elem.get("class", "")
+        epub_type = elem.get("{http://www.idpf.org/2007/ops}type", "")
+
+        # Check if this is a footnote container
+        is_footnote = (
+            "footnote" in elem_class.lower()
+            or "footnote" in epub_type.lower()
+            or "endnote" in epub_type.lower()
+            or (elem_id and "footnote" in elem_id.lower())
+        )
+        if not (is_footnote and elem_id):
+            return
+
+        # Extract text, removing the footnote marker (*, †, etc.)
+        text = self._extract_text(elem).strip()
+        # Remove common footnote markers at start
+        text = re.sub(r"^[\*†‡§¶#]+\s*", "", text)
+        text = re.sub(r"^\d+\.?\s*", "", text)
+
+        if text:
+            # Store with various key formats for matching
+            footnotes[elem_id] = text
+            footnotes[f"{base_name}#{elem_id}"] = text
+            # Also store by any internal anchor IDs
+            for anchor in elem.findall(".//{http://www.w3.org/1999/xhtml}a"):
+                anchor_id = anchor.get("id", "")
+                if anchor_id:
+                    footnotes[anchor_id] = text
+                    footnotes[f"{base_name}#{anchor_id}"] = text
+
+    def _is_chapter_link(self, p: etree._Element, text: str, base_name: str) -> bool:
+        """Check if a heading-like paragraph is a link to another file."""
+        for a in p.iter("{http://www.w3.org/1999/xhtml}a"):
+            a_href = a.get("href", "")
+            a_text = self._extract_text(a).strip()
+            # If the link text matches the paragraph and links to another file
+            if a_text == text and a_href and not a_href.startswith("#"):
+                href_file = a_href.split("#")[0] if "#" in a_href else a_href
+                # Link points to a different file (not same file anchor)
+                if href_file and href_file != base_name:
+                    return True
+        return False
 
     def _parse_document(self, href: str) -> tuple[Chapter | None, dict[str, bytes]]:
-        """Parse an XHTML document into a Chapter."""
+        """Parse an XHTML document into a Chapter.
+
+        Each document is converted once, so its tree and analysis are
+        dropped afterwards rather than held until the whole book is done.
+        """
         full_path = self._resolve_path(href)
         try:
-            content = self.zip.read(full_path)
+            return self._convert_document(href, full_path)
+        finally:
+            self._analyses.pop(full_path, None)
+            self.documents.discard(full_path)
+
+    def _convert_document(
+        self, href: str, full_path: str,
+    ) -> tuple[Chapter | None, dict[str, bytes]]:
+        try:
+            analysis = self._analyze(full_path)
         except KeyError:
             return None, {}
 
-        doc = etree.fromstring(content)
-        body = doc.find(".//xhtml:body", namespaces=NAMESPACES)
-        if body is None:
-            body = doc.find(".//{http://www.w3.org/1999/xhtml}body")
-        if body is None:
-            # Try without namespace
-            body = doc.find(".//body")
+        body = analysis.body
         if body is None:
             return None, {}
 
         # Find chapter title from content, falling back to NCX TOC
-        title = self._find_title(body)
+        title = analysis.title
         toc_title = self.toc_titles.get(href, "")
         # Prefer the NCX title over a bare number (e.g. "Chapter 1" vs "1")
-        if not title or (re.match(r'^\d+$', title) and toc_title):
+        if not title or (_BARE_NUMBER_RE.fullmatch(title) and toc_title):
             title = toc_title or title
 
         # Convert body to Typst, passing the TOC title so bare-number
         # paragraphs can be replaced with the proper chapter name
         images = {}
-        typst_content = self._element_to_typst(body, href, images, toc_title=toc_title)
+        self._paragraph_text = analysis.paragraph_text
+        self._heading_paragraphs = analysis.heading_paragraphs
+        try:
+            typst_content = self._element_to_typst(body, href, images, toc_title=toc_title)
+        finally:
+            self._paragraph_text = {}
+            self._heading_paragraphs = set()
 
         return Chapter(title=title, content=typst_content), images
 
-    def _find_title(self, body: etree._Element) -> str:
-        """Extract chapter title from body."""
-        # Look for h1, h2, or elements with heading classes
-        for tag in ["h1", "h2", "h3"]:
-            for ns in ["{http://www.w3.org/1999/xhtml}", ""]:
-                elem = body.find(f".//{ns}{tag}")
-                if elem is not None:
-                    return self._extract_text(elem).strip()
-        
-        # Look for chapter patterns in paragraphs (common in Calibre-converted EPUBs)
-        for ns in ["{http://www.w3.org/1999/xhtml}", ""]:
-            for p in body.findall(f".//{ns}p"):
-                text = self._extract_text(p).strip()
-                if self._is_chapter_heading(text):
-                    return text
-        return ""
-
     def _is_chapter_heading(self, text: str) -> bool:
         """Check if text looks like a chapter heading."""
         if not text:
@@ -797,22 +1666,7 @@ class EPUBParser:
         if len(text) > 50:
             return False
         # Common chapter patterns - must match the ENTIRE text
-        patterns = [
-            r'^Chapter\s+(\d+|One|Two|Three|Four|Five|Six|Seven|Eight|Nine|Ten|Eleven|Twelve|\w+)$',
-            r'^Part\s+(\d+|One|Two|Three|Four|Five|Six|Seven|Eight|Nine|Ten|I+|IV|V|VI+)$',
-            r'^\d+$',  # Bare chapter numbers (e.g. "1", "23")
-            r'^Prologue$',
-            r'^Epilogue$',
-            r'^Introduction$',
-            r'^Acknowledgments$',
-            r'^Acknowledgements$',
-            r'^About the Author$',
-            r"^Author'?s? Note$",
-        ]
-        for pattern in patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        return _chapter_heading_matcher().fullmatch(text) is not None
 
     def _extract_text(self, elem: etree._Element) -> str:
         """Extract all text from an element."""
@@ -875,12 +1729,18 @@ class EPUBParser:
             return ""
 
         elif tag == "p":
-            # Check if this paragraph is actually a chapter heading
-            raw_text = self._extract_text(elem).strip()
+            # Check if this paragraph is actually a chapter heading (the
+            # document analysis has usually classified it already)
+            raw_text = self._paragraph_text.get(elem)
+            if raw_text is None:
+                raw_text = self._extract_text(elem).strip()
+                is_heading = self._is_chapter_heading(raw_text)
+            else:
+                is_heading = elem in self._heading_paragraphs
             
-            if self._is_chapter_heading(raw_text):
+            if is_heading:
                 # Use the NCX TOC title if available (e.g. "Chapter 1" instead of bare "1")
-                if toc_title and re.match(r'^\d+$', raw_text):
+                if toc_title and _BARE_NUMBER_RE.fullmatch(raw_text):
                     heading_text = toc_title
                 else:
                     heading_text = raw_text
@@ -891,13 +1751,21 @@ class EPUBParser:
                     result.append(self.index_tracker.heading_marker(heading_text))
                 return ""
             
-            # Check for scene signals before converting the paragraph
+            # Scene signals are gathered while converting the paragraph,
+            # from the text fragments passed through annotate_text(): a word
+            # split by inline markup counts as its parts, and text emitted
+            # unannotated (footnote links and bodies) doesn't count. Their
+            # markers go before anything the paragraph emits.
             if self.index_tracker:
-                scenes = self.index_tracker.check_scene_signals(raw_text)
-                for scene in scenes:
-                    result.append(f'#index("Scenes", "{scene}")')
+                self.index_tracker.begin_paragraph()
+                scene_pos = len(result)
 
             content = self._convert_children(elem, doc_href, images, result)
+            if self.index_tracker:
+                result[scene_pos:scene_pos] = [
+                    f'#index("Scenes", "{scene}")'
+                    for scene in self.index_tracker.end_paragraph()
+                ]
             if content.strip():
                 result.append(f"\n{content}\n")
             return ""
@@ -959,40 +1827,14 @@ class EPUBParser:
         elif tag == "img":
             src = elem.get("src", "")
             if src:
-                img_path = self._resolve_image_path(doc_href, src)
-                try:
-                    img_data = self.zip.read(img_path)
-                    # Check ink coverage if threshold is set
-                    if self.max_ink is not None:
-                        ink = self._calculate_ink_coverage(img_data)
-                        if ink > self.max_ink:
-                            # Skip this image - too much ink
-                            return ""
-                    img_name = Path(src).name.replace(" ", "_")
-                    images[img_name] = img_data
-                    result.append(f'\n#image("{img_name}", width: 80%)\n')
-                except KeyError:
-                    pass
+                self._add_image(doc_href, src, images, result)
             return ""
 
         elif tag == "image":
             # SVG image element with xlink:href
             href = elem.get("{http://www.w3.org/1999/xlink}href", "")
             if href:
-                img_path = self._resolve_image_path(doc_href, href)
-                try:
-                    img_data = self.zip.read(img_path)
-                    # Check ink coverage if threshold is set
-                    if self.max_ink is not None:
-                        ink = self._calculate_ink_coverage(img_data)
-                        if ink > self.max_ink:
-                            # Skip this image - too much ink
-                            return ""
-                    img_name = Path(href).name.replace(" ", "_")
-                    images[img_name] = img_data
-                    result.append(f'\n#image("{img_name}", width: 80%)\n')
-                except KeyError:
-                    pass
+                self._add_image(doc_href, href, images, result)
             return ""
 
         elif tag in ("ul", "ol"):
@@ -1027,6 +1869,32 @@ class EPUBParser:
             # Default: just process children
             return self._convert_children(elem, doc_href, images, result)
 
+    def _add_image(
+        self, doc_href: str, src: str, images: dict[str, bytes], result: list[str],
+    ) -> None:
+        """Register an image by content and emit its #image() call.
+
+        Images are stored under a name derived from their content digest,
+        so the same picture referenced under different names is stored
+        (and embedded) once, and different pictures that happen to share
+        a basename can't overwrite each other.
+        """
+        img_path = self._resolve_image_path(doc_href, src)
+        try:
+            img_data = self.documents.read(img_path)
+        except KeyError:
+            return
+        digest = _image_digest(img_data)
+        # Check ink coverage if threshold is set
+        if self.max_ink is not None:
+            ink = self._calculate_ink_coverage(img_data, digest)
+            if ink > self.max_ink:
+                # Skip this image - too much ink
+                return
+        img_name = _content_addressed_name(digest, src)
+        images.setdefault(img_name, img_data)
+        result.append(f'\n#image("{img_name}", width: 80%)\n')
+
     def _convert_children(
         self,
         elem: etree._Element,
@@ -1059,21 +1927,20 @@ class EPUBParser:
 
     def _escape_typst(self, text: str) -> str:
         """Escape special Typst characters."""
-        # Escape special characters that have meaning in Typst
-        text = text.replace("\\", "\\\\")
-        text = text.replace("#", "\\#")
-        text = text.replace("@", "\\@")
-        text = text.replace("$", "\\$")
-        text = text.replace("<", "\\<")
-        text = text.replace(">", "\\>")
-        text = text.replace("[", "\\[")
-        text = text.replace("]", "\\]")
-        text = text.replace("*", "\\*")
-        text = text.replace("_", "\\_")
-        text = text.replace("`", "\\`")
-        # Normalize whitespace
-        text = re.sub(r"\s+", " ", text)
-        return text
+        # Escape special characters that have meaning in Typst (most text
+        # has none, and the check is much cheaper than translating)
+        if _TYPST_SPECIAL_RE.search(text):
+            text = text.translate(_TYPST_ESCAPES)
+        # Normalize whitespace: every run becomes one space, ends included
+        words = text.split()
+        if not words:
+            return " " if text else ""
+        collapsed = " ".join(words)
+        if text[0].isspace():
+            collapsed = " " + collapsed
+        if text[-1].isspace():
+            collapsed += " "
+        return collapsed
 
     def _resolve_image_path(self, doc_href: str, img_src: str) -> str:
         """Resolve image path relative to document."""
@@ -1099,57 +1966,316 @@ class EPUBParser:
         return self._resolve_path(resolved)
 
 
+# Per-process parser used by _convert_chapter_worker (set by _init_chapter_worker)
+_worker_parser: EPUBParser | None = None
+
+
+def _init_chapter_worker(
+    epub_path: Path, max_ink: float | None, generate_index: bool,
+    opf_path: str, opf_dir: str, toc_titles: dict[str, str],
+    footnotes: dict[str, str],
+) -> None:
+    """Process-pool initializer: open the EPUB once per worker."""
+    global _worker_parser
+    tracker = IndexTracker() if generate_index else None
+    parser = EPUBParser(epub_path, max_ink=max_ink, index_tracker=tracker)
+    parser.opf_path = opf_path
+    parser.opf_dir = opf_dir
+    parser.toc_titles = toc_titles
+    parser.footnotes = footnotes
+    _worker_parser = parser
+
+
+def _convert_chapter_worker(
+    href: str,
+) -> tuple[Chapter | None, dict[str, bytes], IndexCandidates | None]:
+    """Convert one spine document, returning its index candidates too."""
+    parser = _worker_parser
+    chapter, images = parser._parse_document(href)
+    # Documents are only converted once, so don't keep their trees around
+    parser._analyses.clear()
+    parser.documents.clear()
+    candidates = None
+    if parser.index_tracker:
+        candidates = parser.index_tracker.take_candidates()
+    return chapter, images, candidates
+
+
+# Paper widths in mm for the page sizes we typeset (Typst paper names).
+PAPER_WIDTHS_MM: dict[str, float] = {
+    "a3": 297, "a4": 210, "a5": 148, "a6": 105, "b5": 176,
+    "us-letter": 215.9, "letter": 215.9, "us-legal": 215.9,
+}
+
+# Horizontal page margins (inside + outside) set in TypstGenerator._generate_setup
+_TEXT_MARGINS_MM = 25
+
+# Images are placed at `width: 80%` of the text block
+_IMAGE_WIDTH_FRACTION = 0.8
+
+# Bump when prepare_image() output changes, to invalidate the disk cache
+_IMAGE_PREP_VERSION = 1
+
+
+def _default_cache_dir() -> Path:
+    """Per-user cache directory ($XDG_CACHE_HOME/epub2print)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "epub2print"
+
+
+@dataclass(frozen=True)
+class ImagePrepSettings:
+    """How images are prepared for print before Typst compilation."""
+    page_size: str = "a5"
+    dpi: int = 300
+    grayscale: bool = False
+    jpeg_quality: int = 85
+
+    @property
+    def max_width_px(self) -> int:
+        """Pixel width of an image placed at full size on the page."""
+        paper_mm = PAPER_WIDTHS_MM.get(self.page_size.lower(), PAPER_WIDTHS_MM["a4"])
+        width_mm = (paper_mm - _TEXT_MARGINS_MM) * _IMAGE_WIDTH_FRACTION
+        return math.ceil(width_mm / 25.4 * self.dpi)
+
+    def cache_key(self, digest: str) -> str:
+        """Disk cache key for an image with content digest *digest*."""
+        mode = "gray" if self.grayscale else "color"
+        return (f"{digest}-v{_IMAGE_PREP_VERSION}-{self.max_width_px}px"
+                f"-{mode}-q{self.jpeg_quality}")
+
+
+@dataclass
+class ImagePrepResult:
+    """Outcome of preparing one image."""
+    name: str
+    original_bytes: int
+    prepared_bytes: int
+    seconds: float
+    cached: bool = False
+
+
+def prepare_image(data: bytes, settings: ImagePrepSettings) -> bytes:
+    """Downsample, optionally greyscale, and recompress an image for print.
+
+    The format (and so the file extension Typst sees) is kept.  Returns
+    *data* unchanged for formats we don't rewrite (SVG, GIF, …), for
+    unreadable images, and when recompressing wouldn't make it smaller.
+    """
+    try:
+        from PIL import Image, ImageOps
+
+        img = Image.open(io.BytesIO(data))
+        fmt = img.format
+        if fmt not in ("JPEG", "PNG"):
+            return data
+        max_width = settings.max_width_px
+        if fmt == "JPEG":
+            # Decode at reduced scale; both sides stay >= max_width so an
+            # EXIF rotation below can't leave the image too narrow
+            img.draft("L" if settings.grayscale else img.mode, (max_width, max_width))
+        img = ImageOps.exif_transpose(img)
+
+        resized = img.width > max_width
+        if resized:
+            height = max(1, round(img.height * max_width / img.width))
+            img = img.resize((max_width, height), Image.Resampling.LANCZOS)
+
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        if settings.grayscale:
+            img = img.convert("LA" if has_alpha and fmt == "PNG" else "L")
+        elif fmt == "JPEG" and img.mode not in ("L", "RGB"):
+            img = img.convert("RGB")
+
+        buf = io.BytesIO()
+        if fmt == "JPEG":
+            img.save(buf, format="JPEG", quality=settings.jpeg_quality, optimize=True)
+        else:
+            img.save(buf, format="PNG", optimize=True)
+        prepared = buf.getvalue()
+    except Exception:
+        return data
+    if not resized and len(prepared) >= len(data):
+        return data
+    return prepared
+
+
+def _prepare_image_file(
+    path: Path, settings: ImagePrepSettings, cache_dir: Path | None,
+) -> ImagePrepResult:
+    """Prepare one image file in place, going through the disk cache."""
+    start = time.perf_counter()
+    data = path.read_bytes()
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = cache_dir / (settings.cache_key(_image_digest(data)) + path.suffix)
+        if cache_file.exists():
+            prepared = cache_file.read_bytes()
+            _write_atomic(path, prepared)
+            return ImagePrepResult(path.name, len(data), len(prepared),
+                                   time.perf_counter() - start, cached=True)
+
+    prepared = prepare_image(data, settings)
+    if prepared is not data:
+        # Replace rather than overwrite: *path* may be hard-linked to the
+        # parse cache
+        _write_atomic(path, prepared)
+    if cache_file is not None:
+        _write_atomic(cache_file, prepared)
+    return ImagePrepResult(path.name, len(data), len(prepared),
+                           time.perf_counter() - start)
+
+
+def prepare_images(
+    paths: list[Path], settings: ImagePrepSettings,
+    cache_dir: Path | None = None, jobs: int | None = None,
+) -> list[ImagePrepResult]:
+    """Prepare image files for print in place, using a thread pool.
+
+    PIL releases the GIL while decoding, resampling and encoding, so
+    threads scale without shipping image bytes between processes.
+    Results are cached in *cache_dir* keyed by source hash and settings.
+    """
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(
+            lambda path: _prepare_image_file(path, settings, cache_dir), paths,
+        ))
+
+
+def print_image_prep_report(results: list[ImagePrepResult]) -> None:
+    """Print per-image sizes and timings, and the total saved."""
+    for r in results:
+        source = "cached" if r.cached else f"{r.seconds * 1000:.0f} ms"
+        print(f"  {r.name}: {r.original_bytes // 1024} KiB → "
+              f"{r.prepared_bytes // 1024} KiB ({source})")
+    before = sum(r.original_bytes for r in results)
+    after = sum(r.prepared_bytes for r in results)
+    total = sum(r.seconds for r in results)
+    print(f"  Images: {len(results)} prepared, saved {(before - after) // 1024} KiB "
+          f"({before // 1024} → {after // 1024} KiB) in {total:.2f} s of worker time")
+
+
+# "path|mtime|size" → family name, see font_family_name()
+_font_family_names: dict[str, str] = {}
+_font_family_names_lock = threading.Lock()
+
+
+def _read_font_family_name(font_path: Path) -> str:
+    """Read name ID 1 from a TTF/OTF/TTC file, loading only the name table."""
+    from fontTools import ttLib
+
+    try:
+        # lazy: tables are only read when accessed; fontNumber picks the
+        # first face of a collection and is ignored otherwise
+        with ttLib.TTFont(font_path, lazy=True, fontNumber=0) as font:
+            names = font["name"].names
+            # Name ID 1 is the font family name; prefer the Windows platform
+            for record in names:
+                if record.nameID == 1 and record.platformID == 3:
+                    return record.toUnicode()
+            # Fallback: try any platform
+            for record in names:
+                if record.nameID == 1:
+                    return record.toUnicode()
+    except Exception:
+        pass
+    # Last resort: use filename stem
+    return font_path.stem
+
+
+def font_family_name(font_path: Path, cache_dir: Path | None = None) -> str:
+    """The family name of a font file, cached by path, mtime and size.
+
+    Names are memoized per process and, with *cache_dir*, kept in
+    ``fonts.json`` there, so a run with a cached font never opens it.
+    """
+    try:
+        stat = font_path.stat()
+    except OSError:
+        return font_path.stem
+    key = f"{font_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}"
+    with _font_family_names_lock:
+        name = _font_family_names.get(key)
+    if name is not None:
+        return name
+
+    table_path = cache_dir / "fonts.json" if cache_dir else None
+    table = {}
+    if table_path is not None:
+        try:
+            table = json.loads(table_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+    name = table.get(key) if isinstance(table, dict) else None
+    if not isinstance(name, str):
+        name = _read_font_family_name(font_path)
+        if table_path is not None:
+            table = table if isinstance(table, dict) else {}
+            table[key] = name
+            table_path.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(table_path, json.dumps(table, indent=1).encode("utf-8"))
+    with _font_family_names_lock:
+        _font_family_names[key] = name
+    return name
+
+
 class TypstGenerator:
     """Generates Typst source from a Book."""
 
     def __init__(
         self, book: Book, font_path: Path | None = None, page_size: str = "a5",
-        generate_index: bool = False,
+        generate_index: bool = False, font_cache_dir: Path | None = None,
     ):
         self.book = book
         self.font_path = font_path
         self.page_size = page_size
         self.generate_index = generate_index
+        self.font_cache_dir = font_cache_dir  # see font_family_name()
 
     def generate(self) -> str:
         """Generate complete Typst source."""
-        parts = []
+        stream = io.StringIO()
+        self.write(stream)
+        return stream.getvalue()
 
+    def write(self, stream: io.TextIOBase) -> None:
+        """Write complete Typst source to *stream*.
+
+        Chapters streamed to disk are copied through in chunks, so the
+        whole book is never held in memory as one string.
+        """
         # Document setup
-        parts.append(self._generate_setup())
+        stream.write(self._generate_setup())
 
         # Title page
-        parts.append(self._generate_title_page())
+        stream.write("\n")
+        stream.write(self._generate_title_page())
 
         # Table of contents
-        parts.append(self._generate_toc())
+        stream.write("\n")
+        stream.write(self._generate_toc())
 
         # Chapters
         for chapter in self.book.chapters:
-            parts.append(self._generate_chapter(chapter))
+            stream.write("\n")
+            if chapter.path is None:
+                stream.write(self._generate_chapter(chapter))
+                continue
+            stream.write("\n")
+            with open(chapter.path, encoding="utf-8", newline="") as f:
+                shutil.copyfileobj(f, stream)
+            stream.write("\n")
 
         # Index page (if enabled)
         if self.generate_index:
-            parts.append(self._generate_index_page())
-
-        return "\n".join(parts)
+            stream.write("\n")
+            stream.write(self._generate_index_page())
 
     def _get_font_family_name(self, font_path: Path) -> str:
         """Extract the font family name from a TTF/OTF file."""
-        try:
-            font = ttLib.TTFont(font_path)
-            # Name ID 1 is the font family name
-            for record in font["name"].names:
-                if record.nameID == 1 and record.platformID == 3:  # Windows platform
-                    return record.toUnicode()
-            # Fallback: try any platform
-            for record in font["name"].names:
-                if record.nameID == 1:
-                    return record.toUnicode()
-        except Exception:
-            pass
-        # Last resort: use filename stem
-        return font_path.stem
+        return font_family_name(font_path, self.font_cache_dir)
 
     def _generate_setup(self) -> str:
         """Generate document setup."""
@@ -1288,16 +2414,68 @@ class TypstGenerator:
         return text.replace("\\", "\\\\").replace('"', '\\"')
 
 
-class Impositioner:
-    """Imposes PDF pages for booklet printing."""
+# How source pages are drawn onto imposed sheets: "xobject" wraps each page
+# as a Form XObject that sheets place with a matrix, "merge" copies and
+# transforms the page's content stream into the sheet
+IMPOSITION_BACKENDS = ("xobject", "merge")
+
+
+def _pdf_number(value: float) -> str:
+    """*value* as a PDF number (no exponent; rotate() leaves ~1e-17 residues)."""
+    value = round(value, 6)
+    return f"{value:.6f}".rstrip("0").rstrip(".") if value else "0"
 
-    def __init__(self, pages_per_signature: int = 16):
-        self.pages_per_signature = pages_per_signature
-        # Must be multiple of 4
-        if self.pages_per_signature % 4 != 0:
-            self.pages_per_signature = ((self.pages_per_signature // 4) + 1) * 4
 
-    def _get_booklet_order(self, num_pages: int) -> list[int]:
+@dataclass(frozen=True)
+class ImpositionPlan:
+    """Which source page goes where on every imposed sheet, as plain data.
+
+    sides[k] is output page k, i.e. side k % 2 (front, back) of sheet
+    k // 2. Each side has one entry per slot in SLOTS[mode], holding a
+    0-based source page number or None for a blank. In A5-to-A3 mode the
+    slots are the A5 pages of two rotated A4 spreads. Get plans from
+    for_pages(), which memoizes them.
+    """
+
+    SLOTS = {
+        "booklet": ("left", "right"),
+        "a5_to_a3": ("left-bottom", "left-top", "right-bottom", "right-top"),
+    }
+
+    mode: str
+    num_pages: int
+    pages_per_signature: int
+    sides: tuple[tuple[int | None, ...], ...]
+
+    @classmethod
+    def for_pages(cls, mode: str, num_pages: int, pages_per_signature: int) -> ImpositionPlan:
+        """The plan for *num_pages* source pages (memoized by its parameters)."""
+        return _imposition_plans((mode, num_pages, pages_per_signature))
+
+    @classmethod
+    def _build(cls, mode: str, num_pages: int, pages_per_signature: int) -> ImpositionPlan:
+        if mode not in cls.SLOTS:
+            raise ValueError(f"unknown imposition mode: {mode}")
+        if pages_per_signature <= 0 or pages_per_signature % 4:
+            raise ValueError(f"pages per signature must be a multiple of 4: {pages_per_signature}")
+
+        # Booklet pages are source pages; A3 booklet pages are spreads of two
+        per_virtual = 1 if mode == "booklet" else 2
+        num_virtual = -(-num_pages // per_virtual)
+        order = cls._booklet_order(pages_per_signature)
+        sides = []
+        # Pad to multiple of signature size
+        for sig_start in range(0, num_virtual, pages_per_signature):
+            for side_idx in range(0, len(order), 2):
+                slots = []
+                for virtual in (sig_start + order[side_idx], sig_start + order[side_idx + 1]):
+                    for page in range(virtual * per_virtual, (virtual + 1) * per_virtual):
+                        slots.append(page if page < num_pages else None)
+                sides.append(tuple(slots))
+        return cls(mode, num_pages, pages_per_signature, tuple(sides))
+
+    @staticmethod
+    def _booklet_order(num_pages: int) -> list[int]:
         """
         Get page order for booklet imposition.
         
@@ -1317,57 +2495,278 @@ class Impositioner:
             order.extend([left, right])
         return order
 
-    def _impose_virtual_pages(
+    @property
+    def sides_per_signature(self) -> int:
+        return self.pages_per_signature // 2
+
+    @property
+    def signatures(self) -> int:
+        return len(self.sides) // self.sides_per_signature
+
+    @property
+    def sheets(self) -> int:
+        return len(self.sides) // 2
+
+    def signature_sides(self, signature: int) -> tuple[tuple[int | None, ...], ...]:
+        """The sides of *signature* (0-based), in output order."""
+        start = signature * self.sides_per_signature
+        return self.sides[start:start + self.sides_per_signature]
+
+    def to_json(self) -> dict:
+        """The plan with 1-based page numbers (null for blanks), sheet by sheet."""
+        def pages(side):
+            return [None if page is None else page + 1 for page in side]
+
+        return {
+            "mode": self.mode,
+            "pages": self.num_pages,
+            "pages_per_signature": self.pages_per_signature,
+            "signatures": self.signatures,
+            "slots": list(self.SLOTS[self.mode]),
+            "sheets": [
+                {
+                    "sheet": sheet + 1,
+                    "signature": sheet * 2 // self.sides_per_signature + 1,
+                    "front": pages(self.sides[sheet * 2]),
+                    "back": pages(self.sides[sheet * 2 + 1]),
+                }
+                for sheet in range(self.sheets)
+            ],
+        }
+
+    def describe(self) -> str:
+        """A table of every sheet side, with 1-based pages ("-" = blank)."""
+        half = len(self.SLOTS[self.mode]) // 2
+        width = len(str(self.num_pages))
+        lines = [
+            f"{self.mode}: {self.num_pages} pages, {self.pages_per_signature} pages per "
+            f"signature (signatures: {self.signatures}, sheets: {self.sheets})",
+            f"{'sig':>4s} {'sheet':>5s} {'side':<5s}  slots: {', '.join(self.SLOTS[self.mode])}",
+        ]
+        for k, side in enumerate(self.sides):
+            cells = [f"{'-' if page is None else page + 1:>{width}}" for page in side]
+            lines.append(
+                f"{k // self.sides_per_signature + 1:>4d} {k // 2 + 1:>5d} "
+                f"{('front', 'back')[k % 2]:<5s}  "
+                f"{' '.join(cells[:half])} | {' '.join(cells[half:])}"
+            )
+        return "\n".join(lines)
+
+
+# Plans only depend on their parameters; a batch of books with the same
+# page count (or one book re-imposed) shares them
+_imposition_plans = LRUCache(lambda key: ImpositionPlan._build(*key), maxsize=256)
+
+
+class Impositioner:
+    """Imposes PDF pages for booklet printing."""
+
+    def __init__(self, pages_per_signature: int = 16, backend: str = "xobject", jobs: int = 1):
+        if backend not in IMPOSITION_BACKENDS:
+            raise ValueError(f"unknown imposition backend: {backend}")
+        self.backend = backend
+        self.jobs = jobs  # worker processes, each imposing a range of signatures (1 = serial)
+        self.pages_per_signature = pages_per_signature
+        # Must be multiple of 4
+        if self.pages_per_signature % 4 != 0:
+            self.pages_per_signature = ((self.pages_per_signature // 4) + 1) * 4
+
+    def plan(self, mode: str, num_pages: int) -> ImpositionPlan:
+        """The imposition plan for *num_pages* source pages in *mode*."""
+        return ImpositionPlan.for_pages(mode, num_pages, self.pages_per_signature)
+
+    @staticmethod
+    def _form_xobject(writer: PdfWriter, page: PageObject) -> IndirectObject:
+        """Wrap *page* as a Form XObject in *writer*.
+
+        The content is copied as bytes, never parsed; its resources (fonts,
+        images) are cloned by reference, so the writer stores each once.
+        The bounding box is the crop box, which merging clips to as well.
+        """
+        from pypdf.generic import ArrayObject, DecodedStreamObject, FloatObject, NameObject
+
+        contents = page.get_contents()
+        form = DecodedStreamObject()
+        form.set_data(contents.get_data() if contents is not None else b"")
+        form[NameObject("/Type")] = NameObject("/XObject")
+        form[NameObject("/Subtype")] = NameObject("/Form")
+        form[NameObject("/BBox")] = ArrayObject(FloatObject(v) for v in page.cropbox)
+        if "/Resources" in page:
+            form[NameObject("/Resources")] = page.raw_get("/Resources").clone(writer)
+        return writer._add_object(form.flate_encode())
+
+    def _place_pages(
         self,
         writer: PdfWriter,
-        virtual_pages: list[PageObject | None],
-        page_width: float,
-        page_height: float,
+        target: PageObject,
+        placements: list[tuple[PageObject, Transformation]],
+    ) -> None:
+        """Draw each (page, transformation) onto *target*, over its content."""
+        if self.backend == "merge":
+            for page, transformation in placements:
+                target.merge_transformed_page(page, transformation)
+            return
+
+        from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+        xobjects = DictionaryObject()
+        operations = []
+        for page, transformation in placements:
+            name = NameObject(f"/P{len(xobjects)}")
+            xobjects[name] = self._form_xobject(writer, page)
+            matrix = " ".join(_pdf_number(v) for v in transformation.ctm)
+            operations.append(f"q {matrix} cm {name} Do Q")
+        content = DecodedStreamObject()
+        content.set_data("\n".join(operations).encode())
+        # Left direct: add_page() makes the sheet's content indirect
+        target[NameObject("/Contents")] = content.flate_encode()
+        target[NameObject("/Resources")] = DictionaryObject({NameObject("/XObject"): xobjects})
+
+    def _execute(
+        self,
+        writer: PdfWriter,
+        reader: PdfReader,
+        plan: ImpositionPlan,
+        layout: tuple[float, float, tuple[Transformation, ...]],
+        signatures: range | None = None,
     ) -> None:
         """
-        Impose virtual pages as a booklet.
+        Impose *plan* (only the given *signatures*, if any) into *writer*.
         
-        Takes a list of virtual pages (which may be None for blanks) and
-        arranges them 2-up for booklet printing.
+        *layout* is the sheet size and each slot's transformation. Every
+        source page is placed on its sheet exactly once, one signature at
+        a time: each sheet's content is compressed as soon as it is made,
+        and afterwards the reader forgets the objects it parsed. The writer
+        has copied what it needs; anything shared with a later signature
+        (fonts, images) is re-read on demand and still de-duplicated by
+        the writer.
         """
-        num_pages = len(virtual_pages)
-        
-        # Pad to multiple of signature size
-        padded_total = (
-            (num_pages + self.pages_per_signature - 1)
-            // self.pages_per_signature
-            * self.pages_per_signature
+        from pypdf import PageObject
+
+        sheet_width, sheet_height, slots = layout
+        if signatures is None:
+            signatures = range(plan.signatures)
+
+        for signature in signatures:
+            for side in plan.signature_sides(signature):
+                sheet = PageObject.create_blank_page(width=sheet_width, height=sheet_height)
+                self._place_pages(writer, sheet, [
+                    (reader.pages[page], transformation)
+                    for page, transformation in zip(side, slots)
+                    if page is not None
+                ])
+                sheet = writer.add_page(sheet)
+                if self.backend == "merge":
+                    # Compress only once the sheet belongs to the writer
+                    sheet.compress_content_streams()
+            # A private pypdf cache; if a release renames it, imposition
+            # still works, it just keeps parsed objects until the end
+            resolved = getattr(reader, "resolved_objects", None)
+            if resolved is not None:
+                resolved.clear()
+
+    @staticmethod
+    def _write(writer: PdfWriter, output_pdf: Path) -> None:
+        """Write the imposed PDF atomically, so a failure leaves no partial file."""
+        tmp = _tmp_sibling(output_pdf)
+        try:
+            with open(tmp, "wb") as f:
+                writer.write(f)
+            os.replace(tmp, output_pdf)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _booklet_layout(self, reader: PdfReader) -> tuple[float, float, tuple[Transformation, ...]]:
+        """Sheet size and slots for booklet mode: two pages side by side."""
+        from pypdf import Transformation
+
+        page_width = float(reader.pages[0].mediabox.width)
+        page_height = float(reader.pages[0].mediabox.height)
+        # Sheet is 2x page width
+        return (
+            page_width * 2,
+            page_height,
+            (Transformation(), Transformation().translate(tx=page_width)),
         )
+
+    def _a5_to_a3_layout(self, reader: PdfReader) -> tuple[float, float, tuple[Transformation, ...]]:
+        """Sheet size and slots for A3 mode: two rotated A4 spreads of A5 pages.
+
+        Each A5 page gets the composite of its place in the spread, the
+        spread's rotation and the spread's place on the sheet, so spreads
+        are never built.
+        """
+        from pypdf import Transformation
+
+        a5_width = float(reader.pages[0].mediabox.width)
+        a5_height = float(reader.pages[0].mediabox.height)
+
+        # A4 spread = 2 A5 pages side by side (landscape)
+        a4_landscape_height = a5_height
         
-        # Extend with None for padding
-        virtual_pages = virtual_pages + [None] * (padded_total - num_pages)
-        
-        # Process each signature
-        for sig_start in range(0, padded_total, self.pages_per_signature):
-            sheet_order = self._get_booklet_order(self.pages_per_signature)
-
-            for sheet_idx in range(0, len(sheet_order), 2):
-                left_idx = sig_start + sheet_order[sheet_idx]
-                right_idx = sig_start + sheet_order[sheet_idx + 1]
-
-                # Create new sheet (2x page width)
-                sheet = PageObject.create_blank_page(
-                    width=page_width * 2, height=page_height
-                )
-
-                # Add left page
-                if left_idx < len(virtual_pages) and virtual_pages[left_idx] is not None:
-                    sheet.merge_transformed_page(
-                        virtual_pages[left_idx], Transformation()
-                    )
+        # After 90° rotation: portrait A4
+        a4_portrait_width = a5_height
+        a4_portrait_height = a5_width * 2
 
-                # Add right page
-                if right_idx < len(virtual_pages) and virtual_pages[right_idx] is not None:
-                    sheet.merge_transformed_page(
-                        virtual_pages[right_idx], Transformation().translate(tx=page_width)
-                    )
+        # Rotate 90° counter-clockwise around origin, then translate to fit
+        # After 90° CCW: (x,y) → (-y, x)
+        # Content spans x from -height to 0, so translate by (height, 0)
+        rotate = Transformation().rotate(90).translate(tx=a4_landscape_height, ty=0)
+        # First A5 page at the spread's origin (ending up at the bottom),
+        # second beside it (the top)
+        spread = (rotate, Transformation().translate(tx=a5_width).transform(rotate))
+
+        # Landscape A3 output: 2 portrait A4 spreads side by side
+        return (
+            a4_portrait_width * 2,
+            a4_portrait_height,
+            spread + tuple(slot.translate(tx=a4_portrait_width) for slot in spread),
+        )
+
+    def _impose_part(
+        self, mode: str, input_pdf: Path, output_pdf: Path, signatures: range | None = None,
+    ) -> None:
+        """Impose *signatures* (default: all) of *input_pdf* in *mode* to *output_pdf*."""
+        from pypdf import PdfReader, PdfWriter
+
+        reader = PdfReader(input_pdf)
+        writer = PdfWriter()
+        plan = self.plan(mode, len(reader.pages))
+        layout = getattr(self, f"_{mode}_layout")(reader)
+        self._execute(writer, reader, plan, layout, signatures)
+        self._write(writer, output_pdf)
+
+    def _impose(self, mode: str, input_pdf: Path, output_pdf: Path) -> None:
+        """Impose in one process, or split the signatures across self.jobs.
+
+        Each worker writes the sheets of a contiguous range of signatures
+        to its own part file; the parts are concatenated in order, and
+        resources that every part copied (fonts, images) are merged back
+        into one object each.
+        """
+        from pypdf import PdfReader, PdfWriter
+
+        if self.jobs > 1:
+            num_signatures = self.plan(mode, len(PdfReader(input_pdf).pages)).signatures
+        if self.jobs <= 1 or num_signatures <= 1:
+            self._impose_part(mode, input_pdf, output_pdf)
+            return
 
-                writer.add_page(sheet)
+        chunks = min(self.jobs, num_signatures)
+        ranges = [range(num_signatures * n // chunks, num_signatures * (n + 1) // chunks)
+                  for n in range(chunks)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            parts = [Path(tmpdir) / f"{n:04d}.pdf" for n in range(chunks)]
+            with ProcessPoolExecutor(max_workers=chunks) as pool:
+                # list() to re-raise any worker's exception
+                list(pool.map(self._impose_part, itertools.repeat(mode),
+                              itertools.repeat(input_pdf), parts, ranges))
+            writer = PdfWriter()
+            for part in parts:
+                writer.append(part)
+            writer.compress_identical_objects()
+            self._write(writer, output_pdf)
 
     def impose_booklet(self, input_pdf: Path, output_pdf: Path) -> None:
         """
@@ -1376,90 +2775,190 @@ class Impositioner:
         Pages are arranged so that when printed duplex and folded,
         they create a booklet with correct page order.
         """
-        reader = PdfReader(input_pdf)
-        writer = PdfWriter()
-
-        page_width = float(reader.pages[0].mediabox.width)
-        page_height = float(reader.pages[0].mediabox.height)
-
-        # Use source pages directly as virtual pages
-        virtual_pages = list(reader.pages)
-        
-        self._impose_virtual_pages(writer, virtual_pages, page_width, page_height)
-
-        with open(output_pdf, "wb") as f:
-            writer.write(f)
+        self._impose("booklet", input_pdf, output_pdf)
 
     def impose_a5_to_a3(self, input_pdf: Path, output_pdf: Path) -> None:
         """
         Impose A5 pages for A3 duplex printing.
         
         Process:
-        1. Combine A5 pages 2-up into A4 spreads (landscape)
+        1. Pair A5 pages 2-up into A4 spreads (landscape)
         2. Rotate each spread 90° to become portrait A4 pages
         3. Use standard booklet imposition on those A4 pages
         
+        The spreads are never built: each A5 page gets the composite of
+        all three steps and is placed on its A3 sheet in one go.
+        
         Output is landscape A3 sheets. When printed duplex and folded,
         the result is a booklet with A5-sized pages.
         """
-        reader = PdfReader(input_pdf)
-        writer = PdfWriter()
+        self._impose("a5_to_a3", input_pdf, output_pdf)
 
-        total_pages = len(reader.pages)
-        a5_width = float(reader.pages[0].mediabox.width)
-        a5_height = float(reader.pages[0].mediabox.height)
 
-        # A4 spread = 2 A5 pages side by side (landscape)
-        a4_landscape_width = a5_width * 2
-        a4_landscape_height = a5_height
-        
-        # After 90° rotation: portrait A4
-        a4_portrait_width = a5_height
-        a4_portrait_height = a5_width * 2
+# Bump whenever EPUBParser output or the cached data layout changes,
+# to invalidate cached parses
+PARSER_VERSION = 4
 
-        # Create A4 spreads from consecutive A5 pages, then rotate 90°
-        rotated_spreads = []
-        for i in range(0, total_pages, 2):
-            # Create landscape A4 spread
-            spread = PageObject.create_blank_page(
-                width=a4_landscape_width, height=a4_landscape_height
-            )
-            
-            # Left A5 page
-            spread.merge_transformed_page(
-                reader.pages[i], Transformation()
-            )
-            
-            # Right A5 page (if exists)
-            if i + 1 < total_pages:
-                spread.merge_transformed_page(
-                    reader.pages[i + 1], Transformation().translate(tx=a5_width)
-                )
-            
-            # Create rotated version (portrait A4)
-            rotated = PageObject.create_blank_page(
-                width=a4_portrait_width, height=a4_portrait_height
-            )
-            # Rotate 90° counter-clockwise around origin, then translate to fit
-            # After 90° CCW: (x,y) → (-y, x)
-            # Content spans x from -height to 0, so translate by (height, 0)
-            rotated.merge_transformed_page(
-                spread,
-                Transformation()
-                .rotate(90)
-                .translate(tx=a4_landscape_height, ty=0)
-            )
-            
-            rotated_spreads.append(rotated)
 
-        # Use standard booklet imposition on the rotated A4 pages
-        # This will create landscape A3 output (2 portrait A4s side by side)
-        self._impose_virtual_pages(
-            writer, rotated_spreads, a4_portrait_width, a4_portrait_height
-        )
+def _file_digest(path: Path) -> str:
+    """Content hash of a file, read in chunks."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of parsed books and their pass-1 index candidates.
+
+    Entries are keyed by the EPUB's content hash, PARSER_VERSION and the
+    options that change parser output (--max-ink, --index), so re-runs
+    that only change typesetting or imposition skip parsing entirely.
+
+    Each entry is a directory: ``book.pickle`` (metadata and index
+    candidates, builtins only, so it loads no matter how the module was
+    imported), ``chapters/NNNN.typ`` and ``images/<name>``. Loading into
+    a build directory hard-links the files instead of reading them.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.dir = cache_dir / "parse"
+
+    def key(self, epub_path: Path, max_ink: float | None, generate_index: bool) -> str:
+        options = f"{_file_digest(epub_path)}|v{PARSER_VERSION}|ink={max_ink}|index={generate_index}"
+        return hashlib.blake2b(options.encode(), digest_size=16).hexdigest()
 
-        with open(output_pdf, "wb") as f:
-            writer.write(f)
+    def load(
+        self, key: str, build_dir: Path | None = None,
+    ) -> tuple[Book, IndexCandidates | None] | None:
+        """Return the cached (book, candidates), or None on a miss.
+
+        With *build_dir*, chapter and image files are linked into it as
+        in EPUBParser.parse(build_dir); otherwise they are read into memory.
+        """
+        entry = self.dir / key
+        try:
+            with open(entry / "book.pickle", "rb") as f:
+                data = pickle.load(f)
+            book = Book(title=data["title"], author=data["author"], chapters=[])
+            if build_dir is not None:
+                (build_dir / "chapters").mkdir(parents=True, exist_ok=True)
+            for i, title in enumerate(data["chapters"]):
+                name = f"{i:04d}.typ"
+                if build_dir is None:
+                    content = (entry / "chapters" / name).read_bytes().decode("utf-8")
+                    book.chapters.append(Chapter(title=title, content=content))
+                else:
+                    path = build_dir / "chapters" / name
+                    _link_or_copy(entry / "chapters" / name, path)
+                    book.chapters.append(Chapter(title=title, content="", path=path))
+            for name in data["images"]:
+                if build_dir is None:
+                    book.images[name] = (entry / "images" / name).read_bytes()
+                else:
+                    _link_or_copy(entry / "images" / name, build_dir / name)
+                    book.image_files.append(build_dir / name)
+            candidates = data["index"] and IndexCandidates.from_data(data["index"])
+        except (OSError, UnicodeDecodeError, pickle.UnpicklingError, EOFError,
+                KeyError, TypeError):
+            return None
+        return book, candidates
+
+    def save(self, key: str, book: Book, candidates: IndexCandidates | None) -> None:
+        """Store *book*, linking streamed chapter and image files."""
+        images = [path.name for path in book.image_files] + list(book.images)
+        data = {
+            "title": book.title,
+            "author": book.author,
+            "chapters": [ch.title for ch in book.chapters],
+            "images": images,
+            "index": candidates.to_data() if candidates else None,
+        }
+        entry = self.dir / key
+        tmp = self.dir / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        (tmp / "chapters").mkdir(parents=True)
+        (tmp / "images").mkdir()
+        for i, chapter in enumerate(book.chapters):
+            dest = tmp / "chapters" / f"{i:04d}.typ"
+            if chapter.path is None:
+                dest.write_bytes(chapter.content.encode("utf-8"))
+            else:
+                _link_or_copy(chapter.path, dest)
+        for path in book.image_files:
+            _link_or_copy(path, tmp / "images" / path.name)
+        for name, image in book.images.items():
+            (tmp / "images" / name).write_bytes(image)
+        with open(tmp / "book.pickle", "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Swap out any entry already there (a broken one, or one another
+        # run stored meanwhile; entries for a key are interchangeable)
+        old = tmp.with_suffix(".old")
+        try:
+            os.rename(entry, old)
+        except OSError:
+            pass
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            pass
+        shutil.rmtree(old, ignore_errors=True)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@dataclass
+class StageTimer:
+    """Wall time per conversion stage, recorded as consecutive laps."""
+    stages: dict[str, float] = field(default_factory=dict)
+    _last: float = field(default_factory=time.perf_counter, repr=False)
+
+    def lap(self, stage: str) -> None:
+        """Charge the time since the previous lap to *stage*."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def summary(self) -> str:
+        return ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in self.stages.items())
+
+
+# Limits concurrent `typst compile` runs across batch workers (set by
+# _init_batch_worker; None means no limit)
+_typst_slots: contextlib.AbstractContextManager | None = None
+
+
+def load_book(
+    epub_path: Path,
+    max_ink: float | None = None,
+    index_tracker: IndexTracker | None = None,
+    jobs: int = 1,
+    cache_dir: Path | None = None,
+    build_dir: Path | None = None,
+) -> Book:
+    """Parse an EPUB (pass 1), reusing a cached parse when possible.
+
+    On a cache hit the cached index candidates are merged into
+    *index_tracker*, leaving it as if it had collected them itself.
+    With *build_dir*, chapters and images are streamed into it (see
+    EPUBParser.parse) rather than kept in memory.
+    """
+    cache = key = None
+    if cache_dir is not None:
+        cache = ParseCache(cache_dir)
+        key = cache.key(epub_path, max_ink, index_tracker is not None)
+        cached = cache.load(key, build_dir)
+        if cached is not None:
+            book, candidates = cached
+            if index_tracker and candidates:
+                index_tracker.merge_candidates(candidates)
+            print(f"  Reusing cached parse ({len(book.chapters)} chapters)")
+            return book
+
+    parser = EPUBParser(epub_path, max_ink=max_ink, index_tracker=index_tracker,
+                        jobs=jobs)
+    book = parser.parse(build_dir)
+    print(f"  Found {len(book.chapters)} chapters")
+    print(f"  Document cache: {parser.documents.stats.summary()}")
+    if cache is not None:
+        cache.save(key, book, index_tracker.candidates() if index_tracker else None)
+    return book
 
 
 def convert_epub_to_pdf(
@@ -1471,95 +2970,160 @@ def convert_epub_to_pdf(
     impose: bool = True,
     pages_per_signature: int = 16,
     a3_mode: bool = False,
+    impose_backend: str = "xobject",
+    impose_jobs: int = 1,
     wait: bool = False,
     max_ink: float | None = None,
     generate_index: bool = False,
     index_size: int = 120,
+    index_sweep: list[int] | None = None,
+    jobs: int = 1,
+    image_dpi: int | None = 300,
+    grayscale: bool = False,
+    cache_dir: Path | None = None,
+    timer: StageTimer | None = None,
+    workspace: Path | None = None,
 ) -> None:
-    """Convert an EPUB to a print-ready PDF."""
+    """Convert an EPUB to a print-ready PDF.
+
+    With *index_sweep*, only parses (or loads the cached parse), compares
+    the given index sizes with sweep_index_sizes() and returns.
+    Stage wall times are recorded in *timer* if given. The build happens
+    in *workspace* (kept afterwards) if given, else in a temp directory.
+    """
+    if timer is None:
+        timer = StageTimer()
 
     # Set up index tracker if requested
     index_tracker = None
-    if generate_index:
+    if generate_index or index_sweep:
         print("Index generation enabled")
         index_tracker = IndexTracker()
+        if cache_dir:
+            word_lookups('en').load(cache_dir)
+
+    # Chapters and images are streamed (or, from the parse cache, hard-linked)
+    # into the build directory, so the whole book is never held in memory
+    if workspace is not None:
+        workspace = workspace.resolve()  # Typst runs with it as cwd
+        workspace.mkdir(parents=True, exist_ok=True)
+    with (contextlib.nullcontext(str(workspace)) if workspace is not None
+          else tempfile.TemporaryDirectory()) as tmpdir:
+        tmppath = Path(tmpdir)
+        print(f"Using {'workspace' if workspace else 'temporary directory'} {tmppath}")
 
-    # Parse EPUB
-    print(f"Parsing {epub_path}...")
-    parser = EPUBParser(epub_path, max_ink=max_ink, index_tracker=index_tracker)
-    book = parser.parse()
-    print(f"  Found {len(book.chapters)} chapters")
+        # Parse EPUB
+        print(f"Parsing {epub_path}...")
+        book = load_book(epub_path, max_ink=max_ink, index_tracker=index_tracker,
+                         jobs=jobs, cache_dir=cache_dir, build_dir=tmppath)
+        timer.lap("parse")
 
-    if index_tracker:
-        noun_count = len(index_tracker.noun_candidates)
-        candidate_count = len(index_tracker.rare_candidates)
-        print(f"  Collected {noun_count} proper nouns, {candidate_count} rare word candidates")
-
-        # Score and select top entries, print scored list
-        selected, all_scored = index_tracker.select_all(budget=index_size)
-        print_index_scores(all_scored, index_size)
-        if selected:
-            postprocess_index_markers(book.chapters, selected)
-            print(f"  Selected {len(selected)} entries for index")
-
-    # Generate Typst source
-    print("Generating Typst source...")
-    generator = TypstGenerator(book, font_path, page_size, generate_index=generate_index)
-    typst_source = generator.generate()
-
-    # Create temp directory for Typst compilation
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmppath = Path(tmpdir)
-        print(f"Using temporary directory {tmppath}")
+        if index_tracker:
+            noun_count = len(index_tracker.noun_candidates)
+            candidate_count = len(index_tracker.rare_candidates)
+            print(f"  Collected {noun_count} proper nouns, {candidate_count} rare word candidates")
+
+            if index_sweep:
+                sweep_index_sizes(index_tracker, book.chapters, index_sweep)
+            else:
+                # Score and select top entries, print scored list; pass 2
+                # rewrites only the chapter files that gain markers
+                selected, all_scored = index_tracker.select_all(budget=index_size)
+                print_index_scores(all_scored, index_size)
+                if selected:
+                    postprocess_index_markers(book.chapters, selected)
+                    print(f"  Selected {len(selected)} entries for index")
+
+            lookups = word_lookups('en')
+            print(f"  Word lookups: {lookups.summary()}")
+            if cache_dir:
+                lookups.save(cache_dir)
+            timer.lap("index")
+            if index_sweep:
+                return
 
         # Write Typst source
+        print("Generating Typst source...")
+        generator = TypstGenerator(book, font_path, page_size, generate_index=generate_index,
+                                   font_cache_dir=cache_dir)
         typst_file = tmppath / "book.typ"
-        typst_file.write_text(typst_source, encoding="utf-8")
+        with open(typst_file, "w", encoding="utf-8") as f:
+            generator.write(f)
+        timer.lap("generate")
 
-        # Write images
+        # Write any images the parse kept in memory
+        image_files = list(book.image_files)
         for name, data in book.images.items():
-            (tmppath / name).write_bytes(data)
+            _write_atomic(tmppath / name, data)
+            image_files.append(tmppath / name)
+
+        # Downsample / greyscale / recompress images for print
+        if image_dpi and image_files:
+            print(f"Preparing images for print at {image_dpi} dpi...")
+            settings = ImagePrepSettings(page_size=page_size, dpi=image_dpi,
+                                         grayscale=grayscale)
+            results = prepare_images(
+                image_files, settings,
+                cache_dir=cache_dir / "images" if cache_dir else None,
+            )
+            print_image_prep_report(results)
+        timer.lap("images")
 
-        # Copy font if provided
+        # Hand the font to Typst via --font-path on a directory holding
+        # just a link to it (no multi-MB copy; the font's own directory
+        # might hold hundreds of fonts for Typst to scan)
+        font_args = []
         if font_path and font_path.exists():
-            font_dest = tmppath / font_path.name
-            font_dest.write_bytes(font_path.read_bytes())
+            fonts_dir = tmppath / "fonts"
+            shutil.rmtree(fonts_dir, ignore_errors=True)  # a kept workspace's old font
+            fonts_dir.mkdir()
+            try:
+                os.symlink(font_path.resolve(), fonts_dir / font_path.name)
+            except OSError:
+                _link_or_copy(font_path, fonts_dir / font_path.name)
+            font_args = ["--font-path", str(fonts_dir)]
+        timer.lap("generate")
 
         # Compile with Typst
         print("Compiling with Typst...")
         intermediate_pdf = tmppath / "book.pdf"
-        result = subprocess.run(
-            ["typst", "compile", str(typst_file), str(intermediate_pdf)],
-            capture_output=True,
-            text=True,
-            cwd=tmppath,
-        )
+        with _typst_slots or contextlib.nullcontext():
+            timer.lap("typst wait")
+            result = subprocess.run(
+                ["typst", "compile", *font_args, str(typst_file), str(intermediate_pdf)],
+                capture_output=True,
+                text=True,
+                cwd=tmppath,
+            )
+        timer.lap("compile")
         if result.returncode != 0:
             # Save the .typ source next to the output for debugging
             debug_typ = output_pdf.with_suffix('.typ')
-            import shutil
             shutil.copy2(typst_file, debug_typ)
             print(f"Typst compilation failed (source saved to {debug_typ}):")
             print(result.stderr)
             raise RuntimeError("Typst compilation failed")
 
-        # Save reading PDF if requested
-        if reading_pdf:
-            print(f"Saving reading PDF to {reading_pdf}...")
-            reading_pdf.write_bytes(intermediate_pdf.read_bytes())
-
-        # Impose if requested
+        # Impose if requested; the rendered PDF itself is moved (or, if
+        # it's needed twice, copied) into place rather than read back
         if impose:
             print("Imposing pages...")
-            impositioner = Impositioner(pages_per_signature)
+            impositioner = Impositioner(pages_per_signature, impose_backend, impose_jobs)
             if a3_mode:
                 impositioner.impose_a5_to_a3(intermediate_pdf, output_pdf)
             else:
                 impositioner.impose_booklet(intermediate_pdf, output_pdf)
             print(f"Saved imposed PDF to {output_pdf}")
+            if reading_pdf:
+                print(f"Saving reading PDF to {reading_pdf}...")
+                _place_file(intermediate_pdf, reading_pdf, move=True)
         else:
-            output_pdf.write_bytes(intermediate_pdf.read_bytes())
+            if reading_pdf:
+                print(f"Saving reading PDF to {reading_pdf}...")
+                _place_file(intermediate_pdf, reading_pdf)
+            _place_file(intermediate_pdf, output_pdf, move=True)
             print(f"Saved PDF to {output_pdf}")
+        timer.lap("impose")
 
         
 
@@ -1567,23 +3131,682 @@ def convert_epub_to_pdf(
             input("Press Enter to exit...")
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Convert EPUB to print-ready PDF",
-        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-    )
-    parser.add_argument("epub", type=Path, help="Input EPUB file")
-    parser.add_argument( "-o", "--output", type=Path, help="Output PDF file (default: <epub-name>.pdf)" )
+@dataclass
+class BatchResult:
+    """Outcome of one book in a batch conversion."""
+    epub_path: Path
+    output_pdf: Path
+    seconds: float = 0.0
+    stages: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+    log: str = ""  # the book's console output, kept for failures
+
+
+def find_epubs(paths: list[Path]) -> list[Path]:
+    """Expand directories to the EPUBs under them (sorted); files pass through."""
+    epubs = []
+    for path in paths:
+        if path.is_dir():
+            epubs.extend(sorted(path.rglob("*.epub")))
+        else:
+            epubs.append(path)
+    return epubs
+
+
+# Where a batch worker reports each book it starts (set by _init_batch_worker),
+# so that when a worker dies the parent knows which books were running
+_batch_started = None
+
+
+def _init_batch_worker(
+    typst_slots, cache_dir: Path | None, generate_index: bool, started=None,
+) -> None:
+    """Process-pool initializer: pay per-process setup once per worker."""
+    global _typst_slots, _batch_started
+    _typst_slots = typst_slots
+    _batch_started = started
+    # Dependencies are imported lazily; warm workers load them up front
+    import fontTools.ttLib  # noqa: F401
+    import lxml.etree  # noqa: F401
+    import pypdf  # noqa: F401
+    if generate_index:
+        lookups = word_lookups('en')
+        lookups.warm()
+        if cache_dir:
+            lookups.load(cache_dir)
+
+
+def _convert_batch_book(
+    epub_path: Path, output_pdf: Path, options: dict, book: int | None = None,
+) -> BatchResult:
+    """Convert one book in a batch worker, capturing its output and any error."""
+    if _batch_started is not None:
+        _batch_started.put(book)
+    timer = StageTimer()
+    log = io.StringIO()
+    start = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(log):
+            convert_epub_to_pdf(epub_path, output_pdf, timer=timer, **options)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    return BatchResult(epub_path, output_pdf, time.perf_counter() - start,
+                       timer.stages, error, log.getvalue() if error else "")
+
+
+def _run_batch_pool(
+    books: list[tuple[Path, Path]],
+    indices: list[int],
+    jobs: int | None,
+    typst_jobs: int,
+    options: dict,
+    results: dict[int, BatchResult],
+) -> list[int] | None:
+    """Convert books[i] for each i in *indices* on a new pool into *results*.
+
+    Returns None if the pool survived, else the books that were running
+    when a worker died (their results, and those of books that never
+    started, are left out).
+    """
+    context = multiprocessing.get_context()
+    # Fresh per pool: a dead worker may have held a Typst slot
+    typst_slots = context.BoundedSemaphore(typst_jobs)
+    started = context.SimpleQueue()
+    initargs = (typst_slots, options.get("cache_dir"), options.get("generate_index", False),
+                started)
+    broken = False
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context,
+        initializer=_init_batch_worker, initargs=initargs,
+    ) as pool:
+        futures = {
+            pool.submit(_convert_batch_book, *books[i], options, i): i for i in indices
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:  # a worker died; sorted out by the caller
+                broken = True
+                continue
+            except Exception as exc:
+                result = BatchResult(*books[i], error=f"{type(exc).__name__}: {exc}")
+            print_batch_result(result)
+            results[i] = result
+    if not broken:
+        return None
+    running = set()
+    while not started.empty():
+        running.add(started.get())
+    return sorted(running - results.keys())
+
+
+def convert_batch(
+    books: list[tuple[Path, Path]],
+    jobs: int | None = None,
+    typst_jobs: int = 2,
+    **options,
+) -> list[BatchResult]:
+    """Convert (epub, output pdf) pairs on a process pool.
+
+    Books run one per worker (chapters are converted serially within a
+    book), at most *typst_jobs* `typst compile` processes run at once,
+    and a failing book is reported without stopping the others. That
+    includes a book whose worker dies (a crash, the OOM killer): the
+    books that were running alongside it are retried one at a time to
+    find the culprit, and the rest go to a fresh pool. *options* are
+    passed on to convert_epub_to_pdf(). Results are in input order.
+    """
+    results: dict[int, BatchResult] = {}
+    pending = list(range(len(books)))
+    while pending:
+        running = _run_batch_pool(books, pending, jobs, typst_jobs, options, results)
+        if running is None:
+            break
+        # Alone, a book that kills its worker again is the one to blame; if
+        # workers die before starting any book, fail the rest of the batch
+        retry = len(running) > 1
+        for i in running or [i for i in pending if i not in results]:
+            if retry and _run_batch_pool(books, [i], 1, typst_jobs, options, results) is None:
+                continue
+            results[i] = BatchResult(*books[i], error="BrokenProcessPool: the worker "
+                                     "converting this book died")
+            print_batch_result(results[i])
+        pending = [i for i in pending if i not in results]
+    return [results[i] for i in range(len(books))]
+
+
+def print_batch_result(result: BatchResult) -> None:
+    """Print one book's outcome and stage timings (seconds)."""
+    if result.error is None:
+        stages = StageTimer(result.stages).summary()
+        print(f"  ok    {result.epub_path.name}: {result.seconds:.1f} s ({stages})")
+        return
+    print(f"  FAIL  {result.epub_path.name}: {result.error}")
+    for line in result.log.splitlines()[-10:]:
+        print(f"          {line}")
+
+
+def print_batch_summary(results: list[BatchResult], seconds: float) -> None:
+    """Print the batch totals: books converted, failures and time per stage."""
+    failed = [r for r in results if r.error is not None]
+    totals = StageTimer()
+    for result in results:
+        for stage, stage_seconds in result.stages.items():
+            totals.stages[stage] = totals.stages.get(stage, 0.0) + stage_seconds
+    print(f"Converted {len(results) - len(failed)}/{len(results)} books "
+          f"in {seconds:.1f} s")
+    if totals.stages:
+        print(f"  Worker time by stage: {totals.summary()}")
+    if failed:
+        print(f"  Failed: {', '.join(str(r.epub_path) for r in failed)}")
+
+
+def _add_conversion_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by single-book and batch conversion."""
     parser.add_argument( "--font", type=Path, default="Dyslexie-Regular.ttf", help="Path to a local font file to use" )
     parser.add_argument( "--page-size", default="a5", help="Page size (e.g., a5, a4, letter)", )
-    parser.add_argument( "--reading-pdf", type=Path, help="Also save the intermediate (non-imposed) reading PDF", )
     parser.add_argument( "--no-impose", action="store_true", help="Don't impose pages; output the reading PDF directly", ) 
     parser.add_argument( "--pages-per-signature", type=int, default=32, help="Pages per signature (must be multiple of 4)", )
     parser.add_argument( "--a3-mode", action="store_true", help="Use A5-to-A3 duplex imposition mode", )
-    parser.add_argument( "--wait", action="store_true", help="Wait for user input before exiting (for debugging)", )
+    parser.add_argument( "--impose-backend", choices=IMPOSITION_BACKENDS, default="xobject", help="Place pages as shared Form XObjects, or merge their content into each sheet", )
     parser.add_argument( "--max-ink", type=float, default=0.4, help="Exclude images with ink coverage above this threshold (0.0-1.0, e.g., 0.3 for 30%%)", )
     parser.add_argument( "--index", action="store_true", help="Generate a back-of-book index (proper nouns, rare words, scene markers)", )
     parser.add_argument( "--index-size", type=int, default=40, help="Number of scored index entries (proper nouns + rare words) to include", )
+    parser.add_argument( "--image-dpi", type=int, default=300, help="Downsample images to this resolution at their printed size", )
+    parser.add_argument( "--mono", action="store_true", help="Convert images to greyscale (for black-and-white printing)", )
+    parser.add_argument( "--keep-images", action="store_true", help="Embed images unchanged instead of preparing them for print", )
+    parser.add_argument( "--cache-dir", type=Path, default=_default_cache_dir(), help="Directory for cached intermediate results", )
+    parser.add_argument( "--no-cache", action="store_true", help="Don't read or write the cache directory", )
+
+
+def _conversion_options(args: argparse.Namespace) -> dict:
+    """convert_epub_to_pdf() keyword arguments for the shared options."""
+    return dict(
+        font_path=args.font,
+        page_size=args.page_size,
+        impose=not args.no_impose,
+        pages_per_signature=args.pages_per_signature,
+        a3_mode=args.a3_mode,
+        impose_backend=args.impose_backend,
+        max_ink=args.max_ink,
+        generate_index=args.index,
+        index_size=args.index_size,
+        image_dpi=None if args.keep_images else args.image_dpi,
+        grayscale=args.mono,
+        cache_dir=None if args.no_cache else args.cache_dir,
+    )
+
+
+def batch_main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="epub2print.py batch",
+        description="Convert many EPUBs to print-ready PDFs on a worker pool",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("paths", type=Path, nargs="+", help="EPUB files and/or directories to search for EPUBs")
+    parser.add_argument( "-o", "--output-dir", type=Path, help="Directory for the PDFs (default: next to each EPUB)" )
+    parser.add_argument( "--jobs", "-j", type=int, default=os.cpu_count(), help="Books converted in parallel (one worker process each)", )
+    parser.add_argument( "--typst-jobs", type=int, default=2, help="Maximum concurrent typst compile processes", )
+    _add_conversion_arguments(parser)
+    args = parser.parse_args(argv)
+
+    epubs = find_epubs(args.paths)
+    if not epubs:
+        parser.error("no EPUB files found")
+    if args.output_dir:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        outputs = [args.output_dir / f"{epub.stem}.pdf" for epub in epubs]
+    else:
+        outputs = [epub.with_suffix(".pdf") for epub in epubs]
+    duplicates = {out for out in outputs if outputs.count(out) > 1}
+    if duplicates:
+        parser.error(f"several books would write {', '.join(map(str, sorted(duplicates)))}")
+
+    print(f"Converting {len(epubs)} books on {args.jobs} workers "
+          f"({args.typst_jobs} Typst compiles at a time)...")
+    start = time.perf_counter()
+    results = convert_batch(list(zip(epubs, outputs)), jobs=args.jobs,
+                            typst_jobs=args.typst_jobs, **_conversion_options(args))
+    print_batch_summary(results, time.perf_counter() - start)
+    return 1 if any(r.error is not None for r in results) else 0
+
+
+@dataclass
+class ConversionJob:
+    """A conversion submitted to a ConversionDaemon."""
+    id: str
+    epub_path: Path
+    output_pdf: Path
+    options: dict
+    status: str = "queued"  # queued → running → done | failed
+    submitted: float = field(default_factory=time.time)
+    started: float | None = None
+    finished: float | None = None
+    result: BatchResult | None = None
+
+    def to_json(self) -> dict:
+        now = time.time()
+        started = self.started or now
+        data = {
+            "id": self.id,
+            "epub": str(self.epub_path),
+            "output": str(self.output_pdf),
+            "status": self.status,
+            "queued_seconds": round(started - self.submitted, 3),
+            "run_seconds": round((self.finished or now) - started, 3) if self.started else 0.0,
+        }
+        if self.result is not None:
+            data["stages"] = {k: round(v, 3) for k, v in self.result.stages.items()}
+            data["error"] = self.result.error
+            if self.result.error:
+                data["log"] = self.result.log
+        return data
+
+
+class ConversionDaemon:
+    """A queue of conversion jobs run on long-lived, warm worker processes.
+
+    *concurrency* dispatcher threads each hand one job at a time to a
+    process pool of the same size, so at most that many books convert at
+    once and the rest wait in the queue. Workers are initialized once
+    (see _init_batch_worker) and keep their imports, word lookups and
+    font metadata across jobs. Jobs use *options* (convert_epub_to_pdf()
+    keyword arguments), optionally overridden per job. A worker that dies
+    takes the pool with it: the pool is replaced and the jobs it was
+    running are retried. Finished jobs beyond the last *history* are
+    forgotten, along with their spooled files. Unless *allow_paths*, jobs
+    may only write (their PDF, workspace, cache) inside *spool_dir*.
+    """
+
+    # Per-job options that name files; JSON gives them as strings
+    PATH_OPTIONS = frozenset({"font_path", "reading_pdf", "cache_dir", "workspace"})
+    WRITTEN_PATH_OPTIONS = frozenset({"reading_pdf", "cache_dir", "workspace"})
+
+    def __init__(
+        self, options: dict, concurrency: int = 2, typst_jobs: int = 2,
+        spool_dir: Path | None = None, history: int = 1000, allow_paths: bool = False,
+    ):
+        self.options = options
+        self.allow_paths = allow_paths
+        self.concurrency = concurrency
+        self.spool_dir = spool_dir or Path(tempfile.mkdtemp(prefix="epub2print-"))
+        self.jobs: dict[str, ConversionJob] = {}
+        self._queue: queue.Queue[ConversionJob | None] = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.history = history
+        self._latencies: deque[float] = deque(maxlen=history)  # submit → finish
+        self.typst_jobs = typst_jobs
+        self._pool = self._make_pool(concurrency, typst_jobs)
+        self._threads = [threading.Thread(target=self._dispatch, daemon=True)
+                         for _ in range(concurrency)]
+
+    def _make_pool(self, workers: int, typst_jobs: int) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context()
+        initargs = (context.BoundedSemaphore(typst_jobs), self.options.get("cache_dir"),
+                    self.options.get("generate_index", False))
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=context,
+            initializer=_init_batch_worker, initargs=initargs,
+        )
+
+    def start(self) -> None:
+        """Start every worker (so the first jobs don't pay for imports) and
+        the dispatcher threads."""
+        for future in [self._pool.submit(time.sleep, 0.1) for _ in range(self.concurrency)]:
+            future.result()
+        for thread in self._threads:
+            thread.start()
+
+    def close(self) -> None:
+        """Finish queued jobs, then stop the dispatchers and workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            if thread.ident is not None:  # started
+                thread.join()
+        self._pool.shutdown()
+
+    def submit(
+        self, epub_path: Path | None = None, output_pdf: Path | None = None,
+        options: dict | None = None, epub_data: bytes | None = None,
+    ) -> ConversionJob:
+        """Queue a conversion of *epub_path*, or of uploaded *epub_data*
+        (spooled, with the PDF written next to it).
+
+        Raises ValueError for options convert_epub_to_pdf() doesn't take
+        here, or for paths to write outside the spool directory (unless
+        allow_paths).
+        """
+        unknown = set(options or {}) - set(self.options)
+        if unknown:
+            raise ValueError(f"unknown option(s): {', '.join(sorted(unknown))}")
+        options = {k: Path(v) if k in self.PATH_OPTIONS and v is not None else v
+                   for k, v in (options or {}).items()}
+        for name in self.WRITTEN_PATH_OPTIONS & options.keys():
+            if options[name] is not None:
+                self._check_writable(name, options[name])
+        if epub_data is None and epub_path is None:
+            raise ValueError("no EPUB given")
+        if output_pdf is not None and epub_data is None:
+            self._check_writable("output", output_pdf)
+        job_id = str(next(self._ids))
+        if epub_data is not None:
+            epub_path = self.spool_dir / f"{job_id}.epub"
+            epub_path.write_bytes(epub_data)
+            output_pdf = self.spool_dir / f"{job_id}.pdf"
+        elif output_pdf is None:
+            output_pdf = (epub_path.with_suffix(".pdf") if self.allow_paths
+                          else self.spool_dir / f"{job_id}.pdf")
+        job = ConversionJob(job_id, epub_path, output_pdf, {**self.options, **options})
+        with self._lock:
+            self.jobs[job_id] = job
+            finished = [old for old in self.jobs.values() if old.status in ("done", "failed")]
+            forget = finished[:max(0, len(self.jobs) - self.history)]
+            for old in forget:
+                del self.jobs[old.id]
+        for old in forget:
+            (self.spool_dir / f"{old.id}.epub").unlink(missing_ok=True)
+            (self.spool_dir / f"{old.id}.pdf").unlink(missing_ok=True)
+        self._queue.put(job)
+        return job
+
+    def _check_writable(self, name: str, path: Path) -> None:
+        if not (self.allow_paths or path.resolve().is_relative_to(self.spool_dir.resolve())):
+            raise ValueError(f"{name} must be inside the spool directory {self.spool_dir}")
+
+    def _dispatch(self) -> None:
+        while (job := self._queue.get()) is not None:
+            job.status, job.started = "running", time.time()
+            pool = self._pool
+            try:
+                job.result = pool.submit(
+                    _convert_batch_book, job.epub_path, job.output_pdf, job.options,
+                ).result()
+            except BrokenProcessPool:
+                # A worker died, failing every job running on the pool:
+                # replace the pool (once, whichever dispatcher gets here
+                # first) and retry this job alone, so only a job that
+                # kills its worker again fails
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = self._make_pool(self.concurrency, self.typst_jobs)
+                pool.shutdown(wait=False)
+                job.result = self._run_alone(job)
+            except Exception as exc:
+                job.result = BatchResult(job.epub_path, job.output_pdf,
+                                         error=f"{type(exc).__name__}: {exc}")
+            job.finished = time.time()
+            job.status = "failed" if job.result.error else "done"
+            with self._lock:
+                self._latencies.append(job.finished - job.submitted)
+
+    def _run_alone(self, job: ConversionJob) -> BatchResult:
+        """Run *job* on a one-off single-worker pool."""
+        with self._make_pool(1, 1) as pool:
+            try:
+                return pool.submit(
+                    _convert_batch_book, job.epub_path, job.output_pdf, job.options,
+                ).result()
+            except Exception as exc:  # the worker died again
+                return BatchResult(job.epub_path, job.output_pdf,
+                                   error=f"{type(exc).__name__}: {exc}")
+
+    def status(self) -> dict:
+        """Queue depth, job counts and latency (submit → finish) percentiles."""
+        with self._lock:
+            counts = Counter(job.status for job in self.jobs.values())
+            latencies = sorted(self._latencies)
+        latency = {"count": len(latencies)}
+        if latencies:
+            latency.update(
+                mean=round(sum(latencies) / len(latencies), 3),
+                p50=round(latencies[len(latencies) // 2], 3),
+                p95=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                max=round(latencies[-1], 3),
+            )
+        return {
+            "queue_depth": counts["queued"],
+            "running": counts["running"],
+            "done": counts["done"],
+            "failed": counts["failed"],
+            "concurrency": self.concurrency,
+            "latency_seconds": latency,
+        }
+
+
+def make_http_server(
+    daemon: ConversionDaemon, host: str = "127.0.0.1", port: int = 8765,
+    max_body: int = 256 * 1024 * 1024,
+    allowed_hosts: Iterable[str] = (), allowed_origins: Iterable[str] = (),
+):
+    """An HTTP front end for *daemon* (serve_forever() to run it).
+
+    POST /jobs with a JSON body {"epub": path, "output": path, "options":
+    {...}} (Content-Type: application/json) or a raw EPUB (Content-Type:
+    application/epub+zip) of at most *max_body* bytes queues a job; GET
+    /jobs/<id> reports it, GET /jobs/<id>/pdf returns the PDF and GET
+    /status reports the queue. EPUB paths are read as the daemon's user,
+    so only listen on interfaces you trust.
+
+    Requests must name *host*, localhost or one of *allowed_hosts* in
+    their Host header (against DNS rebinding), and browsers may only call
+    from the daemon's own origin or one of *allowed_origins*, which also
+    get CORS headers.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit
+
+    hosts = {host, "localhost", "127.0.0.1", "::1", *allowed_hosts}
+    origins = set(allowed_origins)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, code: int, data: dict) -> None:
+            body = json.dumps(data).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def end_headers(self) -> None:
+            origin = self.headers.get("Origin") if hasattr(self, "headers") else None
+            if origin in origins:
+                self.send_header("Access-Control-Allow-Origin", origin)
+                self.send_header("Vary", "Origin")
+            super().end_headers()
+
+        def _forbidden(self) -> bool:
+            """Answer 403 (and return True) unless Host and Origin are allowed."""
+            try:
+                hostname = urlsplit("//" + self.headers.get("Host", "")).hostname
+            except ValueError:
+                hostname = None
+            origin = self.headers.get("Origin")
+            if hostname in hosts and (origin is None or origin in origins):
+                return False
+            self.close_connection = True  # rather than read any body
+            self._send_json(403, {"error": "host or origin not allowed"})
+            return True
+
+        def do_OPTIONS(self) -> None:  # CORS preflight
+            if self._forbidden():
+                return
+            if self.headers.get("Origin") is None:
+                return self._send_json(403, {"error": "not a CORS preflight"})
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Methods", "GET, POST")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+            self.end_headers()
+
+        def do_GET(self) -> None:
+            if self._forbidden():
+                return
+            parts = self.path.strip("/").split("/")
+            if parts == ["status"]:
+                return self._send_json(200, daemon.status())
+            job = daemon.jobs.get(parts[1]) if parts[0] == "jobs" and len(parts) > 1 else None
+            if job is None or len(parts) > 3 or parts[2:] not in ([], ["pdf"]):
+                return self._send_json(404, {"error": "not found"})
+            if parts[2:] == []:
+                return self._send_json(200, job.to_json())
+            if job.status != "done":
+                return self._send_json(409, {"error": f"job is {job.status}"})
+            body = job.output_pdf.read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            if self._forbidden():
+                return
+            if self.path.strip("/") != "jobs":
+                self.close_connection = True
+                return self._send_json(404, {"error": "not found"})
+            content_type = self.headers.get_content_type()
+            if content_type not in ("application/json", "application/epub+zip"):
+                self.close_connection = True
+                return self._send_json(415, {"error": "send application/json or "
+                                                      "application/epub+zip"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                if length < 0:
+                    raise ValueError(f"bad Content-Length: {length}")
+            except ValueError as exc:
+                self.close_connection = True
+                return self._send_json(400, {"error": str(exc)})
+            if length > max_body:
+                self.close_connection = True
+                return self._send_json(413, {"error": f"body over {max_body} bytes"})
+            body = self.rfile.read(length)
+            try:
+                if content_type == "application/epub+zip":
+                    job = daemon.submit(epub_data=body)
+                else:
+                    request = json.loads(body)
+                    options = request.get("options", {})
+                    job = daemon.submit(
+                        Path(request["epub"]),
+                        Path(request["output"]) if request.get("output") else None,
+                        options,
+                    )
+            except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                return self._send_json(400, {"error": str(exc)})
+            self._send_json(202, job.to_json())
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    bound = server.server_address[1]
+    origins.update(f"http://[{h}]:{bound}" if ":" in h else f"http://{h}:{bound}"
+                   for h in hosts)
+    return server
+
+
+def serve_main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="epub2print.py serve",
+        description="Run a conversion daemon that takes jobs over HTTP",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument( "--host", default="127.0.0.1", help="Interface to listen on" )
+    parser.add_argument( "--port", type=int, default=8765, help="Port to listen on" )
+    parser.add_argument( "--jobs", "-j", type=int, default=2, help="Books converted at once (warm worker processes)", )
+    parser.add_argument( "--typst-jobs", type=int, default=2, help="Maximum concurrent typst compile processes", )
+    parser.add_argument( "--spool-dir", type=Path, help="Where uploaded EPUBs and their PDFs are kept (default: a new temporary directory)", )
+    parser.add_argument( "--history", type=int, default=1000, help="Finished jobs remembered (older ones and their spooled files are deleted)", )
+    parser.add_argument( "--max-upload-mb", type=int, default=256, help="Largest request body accepted", )
+    parser.add_argument( "--allow-host", action="append", default=[], help="Also accept requests addressed to this host name (repeatable; needed when listening beyond localhost)", )
+    parser.add_argument( "--allow-origin", action="append", default=[], help="Let browser pages from this origin (e.g. http://localhost:3000) call the API (repeatable)", )
+    parser.add_argument( "--allow-any-path", action="store_true", help="Let jobs write their PDF (and cache, workspace) outside the spool directory", )
+    _add_conversion_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.spool_dir:
+        args.spool_dir.mkdir(parents=True, exist_ok=True)
+    # Per-job only: a request may ask for the reading PDF or a kept workspace
+    options = {**_conversion_options(args), "reading_pdf": None, "workspace": None}
+    daemon = ConversionDaemon(options, concurrency=args.jobs,
+                              typst_jobs=args.typst_jobs, spool_dir=args.spool_dir,
+                              history=args.history, allow_paths=args.allow_any_path)
+    print(f"Starting {args.jobs} workers...")
+    daemon.start()
+    server = make_http_server(daemon, args.host, args.port,
+                              max_body=args.max_upload_mb * 1024 * 1024,
+                              allowed_hosts=args.allow_host, allowed_origins=args.allow_origin)
+    print(f"Listening on http://{args.host}:{server.server_address[1]} "
+          f"(spool: {daemon.spool_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Finishing queued jobs...")
+    finally:
+        server.server_close()
+        daemon.close()
+    return 0
+
+
+def _index_sizes(value: str) -> list[int]:
+    """argparse type for --index-sweep: comma-separated sizes of at least 1."""
+    try:
+        sizes = [int(n) for n in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a list of integers: {value!r}") from None
+    if any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError(f"index sizes must be at least 1: {value!r}")
+    return sizes
+
+
+def plan_main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="epub2print.py plan",
+        description="Show where every page lands on the imposed sheets, without touching a PDF's content",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("source", help="Number of pages, or a reading PDF to count the pages of")
+    parser.add_argument( "--pages-per-signature", type=int, default=32, help="Pages per signature (must be multiple of 4)", )
+    parser.add_argument( "--a3-mode", action="store_true", help="Use A5-to-A3 duplex imposition mode", )
+    parser.add_argument( "--json", action="store_true", help="Print the plan as JSON" )
+    args = parser.parse_args(argv)
+
+    if args.source.isdigit():
+        num_pages = int(args.source)
+    else:
+        from pypdf import PdfReader
+
+        num_pages = len(PdfReader(args.source).pages)
+    plan = Impositioner(args.pages_per_signature).plan(
+        "a5_to_a3" if args.a3_mode else "booklet", num_pages)
+    print(json.dumps(plan.to_json(), indent=2) if args.json else plan.describe())
+    return 0
+
+
+# Subcommands; anything else is a single EPUB to convert
+COMMANDS: dict[str, Callable[[list[str]], int]] = {
+    "batch": batch_main, "serve": serve_main, "plan": plan_main,
+}
+
+
+def main():
+    if sys.argv[1:2] and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(
+        description="Convert EPUB to print-ready PDF",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("epub", type=Path, help="Input EPUB file (or 'batch' / 'serve' / 'plan', see '<command> --help')")
+    parser.add_argument( "-o", "--output", type=Path, help="Output PDF file (default: <epub-name>.pdf)" )
+    parser.add_argument( "--reading-pdf", type=Path, help="Also save the intermediate (non-imposed) reading PDF", )
+    parser.add_argument( "--wait", action="store_true", help="Wait for user input before exiting (for debugging)", )
+    parser.add_argument( "--index-sweep", type=_index_sizes, metavar="SIZES", help="Compare comma-separated index sizes (e.g. 20,40,80) and exit without typesetting", )
+    parser.add_argument( "--jobs", "-j", type=int, default=1, help="Worker processes for chapter conversion (output is identical to -j 1)", )
+    parser.add_argument( "--impose-jobs", type=int, default=1, help="Worker processes for imposition, each imposing a range of signatures (output is identical to 1, up to PDF object numbering)", )
+    parser.add_argument( "--workspace", type=Path, help="Build in this directory and keep it (Typst source, chapters, images) instead of a temporary one", )
+    _add_conversion_arguments(parser)
 
     args = parser.parse_args()
 
@@ -1594,16 +3817,13 @@ def main():
     convert_epub_to_pdf(
         epub_path=args.epub,
         output_pdf=args.output,
-        font_path=args.font,
-        page_size=args.page_size,
         reading_pdf=args.reading_pdf,
-        impose=not args.no_impose,
-        pages_per_signature=args.pages_per_signature,
-        a3_mode=args.a3_mode,
         wait=args.wait,
-        max_ink=args.max_ink,
-        generate_index=args.index,
-        index_size=args.index_size,
+        index_sweep=args.index_sweep,
+        jobs=args.jobs,
+        impose_jobs=args.impose_jobs,
+        workspace=args.workspace,
+        **_conversion_options(args),
     )
 
 if __name__ == "__main__":
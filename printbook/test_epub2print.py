@@ -1,17 +1,38 @@
 #!/usr/bin/env python3
 """Tests for epub2print.py"""
 
+import io
+import multiprocessing
+import os
 import pytest
+import re
+import sys
 import zipfile
 from pathlib import Path
 
+import epub2print
 from epub2print import (
     EPUBParser,
     TypstGenerator,
     Book,
     Chapter,
     IndexTracker,
+    IndexCandidates,
+    LRUCache,
+    WordLookups,
+    BatchResult,
+    ConversionDaemon,
+    ImagePrepSettings,
+    ParseCache,
+    convert_batch,
+    find_epubs,
+    font_family_name,
+    load_book,
+    make_http_server,
     postprocess_index_markers,
+    prepare_image,
+    prepare_images,
+    sweep_index_sizes,
     _clean_word,
 )
 
@@ -58,6 +79,97 @@ def _create_minimal_epub(tmp_path: Path, title: str = "Test Book",
     return epub_path
 
 
+def _create_rich_epub(tmp_path: Path, images: dict[str, bytes] | None = None) -> Path:
+    """Create an EPUB exercising TOC detection, footnotes and Calibre headings.
+
+    *images* maps an ``images/`` member name to its bytes; every chapter
+    references all of them.
+    """
+    images = images or {}
+    img_tags = "".join(f'<img src="../images/{name}"/>' for name in images)
+    chapters = [
+        ("Chapter One",
+         "<p>and then Kira saw the gossamer veil"
+         '<a epub:type="noteref" href="notes.xhtml#fn1">1</a>.</p>'
+         "<p>His breath caught as she touched his skin, her lips warm.</p>"),
+        ("2",
+         "<p>the ephemeral light, and <i>Kira</i> laughed at Sorcha.</p>"),
+        ("Epilogue",
+         "<p>and Sorcha found gossamer and pellucid water.</p>"),
+    ]
+    epub_path = tmp_path / "rich.epub"
+    with zipfile.ZipFile(epub_path, "w") as zf:
+        zf.writestr(
+            "META-INF/container.xml",
+            """<?xml version="1.0"?>
+            <container xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+              <rootfiles>
+                <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+              </rootfiles>
+            </container>""",
+        )
+        toc_links = "".join(
+            f'<p><a href="ch{i + 1}.xhtml">{title}</a></p>'
+            for i, (title, _) in enumerate(chapters)
+        )
+        zf.writestr(
+            "OEBPS/text/toc.xhtml",
+            f"""<?xml version="1.0"?>
+            <html xmlns="http://www.w3.org/1999/xhtml">
+              <body><p>Contents</p>{toc_links}<p><a href="ch1.xhtml">Chapter Four</a></p></body>
+            </html>""",
+        )
+        for i, (title, body) in enumerate(chapters):
+            zf.writestr(
+                f"OEBPS/text/ch{i + 1}.xhtml",
+                f"""<?xml version="1.0"?>
+                <html xmlns="http://www.w3.org/1999/xhtml"
+                      xmlns:epub="http://www.idpf.org/2007/ops">
+                  <body><div><p class="chapter">{title}</p>{body}{img_tags}</div></body>
+                </html>""",
+            )
+        zf.writestr(
+            "OEBPS/text/notes.xhtml",
+            """<?xml version="1.0"?>
+            <html xmlns="http://www.w3.org/1999/xhtml"
+                  xmlns:epub="http://www.idpf.org/2007/ops">
+              <body><aside epub:type="footnote" id="fn1"><p>1. A gauzy thing.</p></aside></body>
+            </html>""",
+        )
+        zf.writestr(
+            "OEBPS/toc.ncx",
+            """<?xml version="1.0"?>
+            <ncx xmlns="http://www.daisy.org/z3986/2005/ncx/"><navMap>
+              <navPoint><navLabel><text>Chapter Two</text></navLabel>
+                <content src="text/ch2.xhtml"/></navPoint>
+            </navMap></ncx>""",
+        )
+        for name, data in images.items():
+            zf.writestr(f"OEBPS/images/{name}", data)
+        items = "".join(
+            f'<item id="ch{i + 1}" href="text/ch{i + 1}.xhtml" media-type="application/xhtml+xml"/>'
+            for i in range(len(chapters))
+        )
+        itemrefs = "".join(f'<itemref idref="ch{i + 1}"/>' for i in range(len(chapters)))
+        zf.writestr(
+            "OEBPS/content.opf",
+            f"""<?xml version="1.0"?>
+            <package xmlns="http://www.idpf.org/2007/opf">
+              <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+                <dc:title>Rich Book</dc:title>
+                <dc:creator>Author</dc:creator>
+              </metadata>
+              <manifest>
+                <item id="toc" href="text/toc.xhtml" media-type="application/xhtml+xml"/>
+                {items}
+                <item id="notes" href="text/notes.xhtml" media-type="application/xhtml+xml"/>
+              </manifest>
+              <spine><itemref idref="toc"/>{itemrefs}<itemref idref="notes"/></spine>
+            </package>""",
+        )
+    return epub_path
+
+
 class TestChapterHeadingDetection:
     """Tests for _is_chapter_heading method."""
 
@@ -118,6 +230,16 @@ class TestChapterHeadingDetection:
     def test_invalid_chapter_headings(self, parser, text):
         assert parser._is_chapter_heading(text) is False
 
+    def test_registered_pattern(self, parser, monkeypatch):
+        monkeypatch.setattr(epub2print, "CHAPTER_HEADING_PATTERNS",
+                            list(epub2print.CHAPTER_HEADING_PATTERNS))
+        monkeypatch.setattr(epub2print, "_chapter_heading_re", None)
+        assert parser._is_chapter_heading("Interlude") is False
+        epub2print.register_heading_pattern(r"Interlude(\s+\d+)?")
+        assert parser._is_chapter_heading("INTERLUDE 2") is True
+        assert parser._is_chapter_heading("Chapter 3") is True
+        assert parser._is_chapter_heading("Interlude two") is False
+
 
 class TestTypstEscaping:
     """Tests for Typst special character escaping."""
@@ -142,12 +264,159 @@ class TestTypstEscaping:
             ("back\\slash", "back\\\\slash"),
             ("multiple  spaces", "multiple spaces"),  # whitespace normalized
             ("line\nbreak", "line break"),  # newlines normalized
+            ("  padded\t", " padded "),  # edge whitespace collapses, not stripped
+            ("non\u00a0breaking", "non breaking"),
+            ("\n\n", " "),
+            ("", ""),
         ],
     )
     def test_escape_typst(self, parser, input_text, expected):
         assert parser._escape_typst(input_text) == expected
 
 
+def _png_bytes(size: tuple[int, int], color) -> bytes:
+    """Encode a solid-colour RGB image as PNG."""
+    from PIL import Image
+    import io
+
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestInkCoverage:
+    """Tests for image ink-coverage analysis."""
+
+    @pytest.fixture
+    def parser(self, tmp_path):
+        return EPUBParser(_create_minimal_epub(tmp_path))
+
+    @pytest.mark.parametrize(
+        "color,expected",
+        [
+            ((255, 255, 255), 0.0),
+            ((0, 0, 0), 1.0),
+            ((128, 128, 128), 1.0 - 128 / 255),
+        ],
+    )
+    def test_solid_colours(self, parser, color, expected):
+        ink = parser._calculate_ink_coverage(_png_bytes((1200, 900), color))
+        assert ink == pytest.approx(expected, abs=0.01)
+
+    def test_matches_per_pixel_average(self, parser):
+        """Downscaled measurement agrees with the full-resolution average."""
+        from PIL import Image
+        import io
+
+        img = Image.effect_noise((1500, 1000), 60).convert("RGB")
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG")
+        data = buf.getvalue()
+        gray = Image.open(io.BytesIO(data)).convert("L")
+        exact = 1.0 - sum(gray.histogram()[i] * i for i in range(256)) / (
+            gray.width * gray.height * 255
+        )
+        assert parser._calculate_ink_coverage(data) == pytest.approx(exact, abs=0.01)
+
+    def test_memoized_by_content(self, parser, monkeypatch):
+        import epub2print
+
+        calls = []
+        measure = epub2print._measure_ink_coverage
+        monkeypatch.setattr(
+            epub2print, "_measure_ink_coverage",
+            lambda data: calls.append(data) or measure(data),
+        )
+        data = _png_bytes((50, 50), (0, 0, 0))
+        for _ in range(3):
+            parser._calculate_ink_coverage(bytes(data))
+        assert len(calls) == 1
+
+    def test_unreadable_image_counts_as_no_ink(self, parser):
+        assert parser._calculate_ink_coverage(b"not an image") == 0.0
+
+
+class TestImagePreparation:
+    """Tests for print-resolution image preparation."""
+
+    @staticmethod
+    def _jpeg(size, mode="RGB") -> bytes:
+        from PIL import Image
+        import io
+
+        img = Image.effect_noise(size, 40).convert(mode)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=95)
+        return buf.getvalue()
+
+    @staticmethod
+    def _open(data: bytes):
+        from PIL import Image
+        import io
+
+        return Image.open(io.BytesIO(data))
+
+    def test_max_width_follows_page_size_and_dpi(self):
+        a5 = ImagePrepSettings(page_size="a5", dpi=300).max_width_px
+        a4 = ImagePrepSettings(page_size="a4", dpi=300).max_width_px
+        assert ImagePrepSettings(page_size="a5", dpi=150).max_width_px == pytest.approx(a5 / 2, abs=1)
+        assert a4 > a5
+        # (148mm - 25mm margins) * 80% at 300 dpi
+        assert a5 == 1163
+
+    def test_large_image_downsampled(self):
+        settings = ImagePrepSettings(dpi=150)
+        data = self._jpeg((4000, 3000))
+        prepared = prepare_image(data, settings)
+        img = self._open(prepared)
+        assert img.format == "JPEG"
+        assert img.width == settings.max_width_px
+        assert img.height == round(3000 * settings.max_width_px / 4000)
+        assert len(prepared) < len(data)
+
+    def test_grayscale(self):
+        prepared = prepare_image(self._jpeg((4000, 3000)), ImagePrepSettings(grayscale=True))
+        assert self._open(prepared).mode == "L"
+
+    def test_png_stays_png(self):
+        prepared = prepare_image(_png_bytes((3000, 2000), (10, 200, 30)),
+                                 ImagePrepSettings(grayscale=True))
+        img = self._open(prepared)
+        assert img.format == "PNG"
+        assert img.mode == "L"
+
+    def test_small_image_not_enlarged(self):
+        data = _png_bytes((200, 100), (255, 255, 255))
+        prepared = prepare_image(data, ImagePrepSettings())
+        assert self._open(prepared).size == (200, 100)
+        assert len(prepared) <= len(data)
+
+    def test_unsupported_data_passed_through(self):
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg"/>'
+        assert prepare_image(svg, ImagePrepSettings()) is svg
+
+    def test_prepare_images_uses_disk_cache(self, tmp_path):
+        build = tmp_path / "build"
+        build.mkdir()
+        data = self._jpeg((3000, 2000))
+        for name in ("a.jpg", "b.jpg"):
+            (build / name).write_bytes(data)
+        cache = tmp_path / "cache"
+        settings = ImagePrepSettings(dpi=100)
+
+        first = prepare_images([build / "a.jpg"], settings, cache_dir=cache)
+        second = prepare_images([build / "b.jpg"], settings, cache_dir=cache)
+
+        assert not first[0].cached
+        assert second[0].cached
+        assert (build / "a.jpg").read_bytes() == (build / "b.jpg").read_bytes()
+        assert second[0].prepared_bytes < second[0].original_bytes
+        # Different settings don't reuse the entry
+        (build / "c.jpg").write_bytes(data)
+        third = prepare_images([build / "c.jpg"], ImagePrepSettings(dpi=120), cache_dir=cache)
+        assert not third[0].cached
+
+
 class TestEPUBParsing:
     """Tests for EPUB parsing functionality."""
 
@@ -275,6 +544,185 @@ class TestEPUBParsing:
         # The content should have "Chapter One" as a heading
         assert "= Chapter One" in book.chapters[0].content
 
+    def test_each_document_parsed_once(self, tmp_path):
+        """Footnotes, TOC detection and conversion share one parsed tree."""
+        epub_path = self.create_test_epub(
+            tmp_path,
+            [
+                ("Chapter One", "This is the first chapter."),
+                ("Chapter Two", "This is the second chapter."),
+            ],
+        )
+
+        parser = EPUBParser(epub_path)
+        parser.parse()
+
+        stats = parser.documents.stats
+        assert stats.parse_misses == 2
+        assert stats.decompress_misses == 2
+        # TOC detection and conversion reuse the footnote pass's analysis
+        assert stats.parse_hits == 0
+
+    def test_toc_footnotes_and_titles(self, tmp_path):
+        """TOC files are skipped, footnotes inlined, titles found in <p>."""
+        book = EPUBParser(_create_rich_epub(tmp_path)).parse()
+
+        assert [c.title for c in book.chapters] == [
+            "Chapter One", "Chapter Two", "Epilogue",
+        ]
+        assert "gossamer veil#footnote[A gauzy thing.]." in book.chapters[0].content
+        # Bare-number heading replaced by the NCX title
+        assert "= Chapter Two" in book.chapters[1].content
+
+    def test_identical_images_stored_once(self, tmp_path):
+        """The same image under two names is stored and referenced once."""
+        png = _png_bytes((20, 20), (255, 255, 255))
+        epub_path = _create_rich_epub(tmp_path, images={"cover.png": png, "copy.png": png})
+
+        book = EPUBParser(epub_path).parse()
+
+        assert list(book.images.values()) == [png]
+        (name,) = book.images
+        assert name.endswith(".png")
+        for chapter in book.chapters:
+            assert chapter.content.count(f'#image("{name}"') == 2
+
+    def test_images_sharing_a_basename_kept_apart(self, tmp_path):
+        """Different images with the same file name don't overwrite each other."""
+        epub_path = self.create_test_epub(
+            tmp_path,
+            [
+                ("Chapter One", 'One <img src="a/pic.png"/>'),
+                ("Chapter Two", 'Two <img src="b/pic.png"/>'),
+            ],
+        )
+        white = _png_bytes((20, 20), (255, 255, 255))
+        grey = _png_bytes((20, 20), (200, 200, 200))
+        with zipfile.ZipFile(epub_path, "a") as zf:
+            zf.writestr("OEBPS/a/pic.png", white)
+            zf.writestr("OEBPS/b/pic.png", grey)
+
+        book = EPUBParser(epub_path).parse()
+
+        assert len(book.images) == 2
+        names = [next(n for n in book.images if n in ch.content) for ch in book.chapters]
+        assert [book.images[n] for n in names] == [white, grey]
+
+    def test_streamed_parse_matches_in_memory(self, tmp_path):
+        """Streaming into a build dir writes what an in-memory parse holds."""
+        png = _png_bytes((20, 20), (255, 255, 255))
+        epub_path = _create_rich_epub(tmp_path, images={"cover.png": png})
+        build_dir = tmp_path / "build"
+
+        book = EPUBParser(epub_path).parse()
+        streamed = EPUBParser(epub_path).parse(build_dir)
+
+        assert [c.title for c in streamed.chapters] == [c.title for c in book.chapters]
+        assert all(c.content == "" for c in streamed.chapters)
+        assert [c.read() for c in streamed.chapters] == [c.content for c in book.chapters]
+        assert streamed.images == {}
+        assert {p.name: p.read_bytes() for p in streamed.image_files} == book.images
+
+    def test_parallel_parse_matches_serial(self, tmp_path):
+        """--jobs N yields the same chapters and index candidates as serial."""
+        epub_path = self.create_test_epub(
+            tmp_path,
+            [
+                ("Chapter One", "and then Kira saw the gossamer veil of Sorcha"),
+                ("Chapter Two", "the ephemeral light, and Kira laughed"),
+                ("Chapter Three", "and Sorcha found gossamer and pellucid water"),
+            ],
+        )
+
+        def parse(jobs):
+            tracker = IndexTracker()
+            book = EPUBParser(epub_path, index_tracker=tracker, jobs=jobs).parse()
+            return book, tracker
+
+        serial_book, serial = parse(1)
+        parallel_book, parallel = parse(2)
+
+        assert serial_book == parallel_book
+        assert serial.noun_candidates == parallel.noun_candidates
+        assert list(serial.noun_candidates) == list(parallel.noun_candidates)
+        assert list(serial.rare_candidates) == list(parallel.rare_candidates)
+        assert serial.stem_counts == parallel.stem_counts
+        assert serial.select_all(budget=10) == parallel.select_all(budget=10)
+
+
+class TestParseCache:
+    """Tests for the persistent parse cache."""
+
+    def test_second_load_skips_parsing(self, tmp_path, monkeypatch):
+        epub_path = _create_rich_epub(
+            tmp_path, images={"pic.png": _png_bytes((10, 10), (255, 255, 255))},
+        )
+        cache_dir = tmp_path / "cache"
+        first_tracker = IndexTracker()
+        first = load_book(epub_path, index_tracker=first_tracker, cache_dir=cache_dir)
+
+        def fail(self):
+            raise AssertionError("parsed despite cache hit")
+
+        monkeypatch.setattr(EPUBParser, "parse", fail)
+        second_tracker = IndexTracker()
+        second = load_book(epub_path, index_tracker=second_tracker, cache_dir=cache_dir)
+
+        assert second == first
+        assert second_tracker.noun_candidates == first_tracker.noun_candidates
+        assert list(second_tracker.rare_candidates) == list(first_tracker.rare_candidates)
+        assert second_tracker.stem_counts == first_tracker.stem_counts
+        assert second_tracker.select_all(10) == first_tracker.select_all(10)
+
+    def test_cached_files_linked_into_build_dir(self, tmp_path, monkeypatch):
+        """A hit links cached chapters and images into the build directory,
+        and pass 2 rewriting a chapter there doesn't leak into the cache."""
+        png = _png_bytes((10, 10), (255, 255, 255))
+        epub_path = _create_rich_epub(tmp_path, images={"pic.png": png})
+        cache_dir = tmp_path / "cache"
+        first = load_book(epub_path, cache_dir=cache_dir, build_dir=tmp_path / "b1")
+        expected = [ch.read() for ch in first.chapters]
+        first.chapters[0].write("changed")
+
+        monkeypatch.setattr(EPUBParser, "parse", lambda self, build_dir=None: 1 / 0)
+        second = load_book(epub_path, cache_dir=cache_dir, build_dir=tmp_path / "b2")
+
+        assert [ch.read() for ch in second.chapters] == expected
+        assert [p.read_bytes() for p in second.image_files] == [png]
+        second.chapters[0].write("changed")
+        assert load_book(epub_path, cache_dir=cache_dir).chapters[0].content == expected[0]
+
+    def test_parse_options_change_key(self, tmp_path):
+        epub_path = _create_minimal_epub(tmp_path)
+        cache = ParseCache(tmp_path / "cache")
+        keys = {
+            cache.key(epub_path, max_ink=None, generate_index=False),
+            cache.key(epub_path, max_ink=0.4, generate_index=False),
+            cache.key(epub_path, max_ink=None, generate_index=True),
+        }
+        assert len(keys) == 3
+        assert cache.key(epub_path, None, False) == cache.key(epub_path, None, False)
+
+    def test_epub_content_changes_key(self, tmp_path):
+        epub_path = _create_minimal_epub(tmp_path)
+        cache = ParseCache(tmp_path / "cache")
+        before = cache.key(epub_path, None, False)
+        _create_minimal_epub(tmp_path, title="Other Title")
+        assert cache.key(epub_path, None, False) != before
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        epub_path = _create_minimal_epub(tmp_path)
+        cache_dir = tmp_path / "cache"
+        cache = ParseCache(cache_dir)
+        key = cache.key(epub_path, None, False)
+        (cache.dir / key).mkdir(parents=True)
+        (cache.dir / key / "book.pickle").write_bytes(b"garbage")
+
+        assert cache.load(key) is None
+        book = load_book(epub_path, cache_dir=cache_dir)
+        assert book.title == "Test Book"
+        assert cache.load(key) is not None
+
 
 class TestTypstGeneration:
     """Tests for Typst source generation."""
@@ -313,6 +761,23 @@ class TestTypstGeneration:
         # TOC should use context and query for headings
         assert "heading.where(level: 1)" in typst
 
+    def test_write_streams_chapter_files(self, tmp_path):
+        """write() copies streamed chapters through, matching generate()."""
+        contents = ["= Chapter One\n\nSome content.", "= Chapter Two\n\nMore.\n"]
+        in_memory = Book(title="T", author="A", chapters=[
+            Chapter(title=f"Ch{i}", content=c) for i, c in enumerate(contents)
+        ])
+        streamed = Book(title="T", author="A", chapters=[])
+        for i, content in enumerate(contents):
+            path = tmp_path / f"{i:04d}.typ"
+            path.write_bytes(content.encode("utf-8"))
+            streamed.chapters.append(Chapter(title=f"Ch{i}", content="", path=path))
+
+        out = io.StringIO()
+        TypstGenerator(streamed, generate_index=True).write(out)
+
+        assert out.getvalue() == TypstGenerator(in_memory, generate_index=True).generate()
+
     def test_escape_string_in_metadata(self):
         """Test that special characters in metadata are escaped."""
         book = Book(
@@ -371,6 +836,640 @@ class TestIntegration:
         )
 
 
+@pytest.fixture
+def fake_typst(tmp_path, monkeypatch):
+    """A `typst` on PATH that writes a blank PDF, and fails if another
+    compile holds its lock (i.e. if compiles overlap). Each call's
+    arguments and --font-path listing are recorded in typst.json."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "typst"
+    script.write_text(f"""#!{sys.executable}
+import json, os, sys, time
+from pypdf import PdfWriter
+lock = os.open({str(tmp_path / "typst.lock")!r}, os.O_CREAT | os.O_EXCL)
+args = sys.argv[1:]
+fonts = sorted(os.listdir(args[args.index("--font-path") + 1])) if "--font-path" in args else []
+with open({str(tmp_path / "typst.json")!r}, "w") as f:
+    json.dump({{"args": args, "fonts": fonts}}, f)
+time.sleep(0.2)
+writer = PdfWriter()
+writer.add_blank_page(419.5, 595.3)
+writer.write(args[-1])
+os.close(lock)
+os.unlink({str(tmp_path / "typst.lock")!r})
+""")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def _batch_books(tmp_path, count):
+    """*count* minimal EPUBs in their own directories, with output paths."""
+    books = []
+    for i in range(count):
+        book_dir = tmp_path / f"book{i}"
+        book_dir.mkdir()
+        epub_path = _create_minimal_epub(book_dir, title=f"Book {i}")
+        books.append((epub_path, tmp_path / f"book{i}.pdf"))
+    return books
+
+
+class TestBatch:
+    """Tests for batch conversion on a process pool."""
+
+    def test_failing_book_does_not_stop_others(self, tmp_path, fake_typst):
+        books = _batch_books(tmp_path, 2)
+        bad = tmp_path / "bad.epub"
+        bad.write_bytes(b"not a zip")
+        books.insert(1, (bad, tmp_path / "bad.pdf"))
+
+        results = convert_batch(books, jobs=2, typst_jobs=1, impose=False, cache_dir=None)
+
+        assert [r.epub_path for r in results] == [epub for epub, _ in books]
+        assert [r.error is None for r in results] == [True, False, True]
+        assert "BadZipFile" in results[1].error
+        assert "Parsing" in results[1].log
+        assert books[0][1].exists() and books[2][1].exists()
+        assert {"parse", "compile"} <= set(results[0].stages)
+
+    def test_typst_jobs_limits_concurrent_compiles(self, tmp_path, fake_typst):
+        books = _batch_books(tmp_path, 3)
+        results = convert_batch(books, jobs=3, typst_jobs=1, impose=False, cache_dir=None)
+        assert [r.error for r in results] == [None, None, None]
+
+    @pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                        reason="workers must fork to see the patch")
+    def test_dead_worker_fails_only_its_book(self, tmp_path, fake_typst, monkeypatch):
+        books = _batch_books(tmp_path, 5)
+        convert = epub2print.convert_epub_to_pdf
+
+        def crash_on_book2(epub_path, output_pdf, **options):
+            if epub_path == books[2][0]:
+                epub2print._typst_slots.acquire()  # dies holding the only slot
+                os._exit(1)
+            return convert(epub_path, output_pdf, **options)
+
+        monkeypatch.setattr(epub2print, "convert_epub_to_pdf", crash_on_book2)
+        results = convert_batch(books, jobs=2, typst_jobs=1, impose=False, cache_dir=None)
+
+        assert [r.error is None for r in results] == [True, True, False, True, True]
+        assert "BrokenProcessPool" in results[2].error
+        assert all(pdf.exists() for i, (_, pdf) in enumerate(books) if i != 2)
+
+    def test_find_epubs(self, tmp_path):
+        (tmp_path / "lib" / "sub").mkdir(parents=True)
+        for name in ("lib/b.epub", "lib/sub/a.epub", "lib/notes.txt"):
+            (tmp_path / name).write_bytes(b"")
+        single = tmp_path / "single.epub"
+        assert find_epubs([tmp_path / "lib", single]) == [
+            tmp_path / "lib/b.epub", tmp_path / "lib/sub/a.epub", single,
+        ]
+
+
+class TestDaemon:
+    """Tests for the conversion daemon and its HTTP front end."""
+
+    OPTIONS = {"impose": False, "cache_dir": None, "page_size": "a5"}
+
+    def test_queue_drains_in_order(self, tmp_path, fake_typst):
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=tmp_path)
+        jobs = [daemon.submit(epub, out) for epub, out in _batch_books(tmp_path, 3)]
+        assert daemon.status()["queue_depth"] == 3
+
+        daemon.start()
+        daemon.close()
+
+        status = daemon.status()
+        assert (status["queue_depth"], status["done"]) == (0, 3)
+        assert status["latency_seconds"]["count"] == 3
+        assert [job.status for job in jobs] == ["done"] * 3
+        # One worker: each job started after the previous one finished
+        assert all(a.finished <= b.started for a, b in zip(jobs, jobs[1:]))
+
+    def test_unknown_option_rejected(self, tmp_path):
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=tmp_path)
+        with pytest.raises(ValueError, match="bogus"):
+            daemon.submit(tmp_path / "a.epub", options={"bogus": 1})
+        daemon.close()
+
+    def test_path_options_become_paths(self, tmp_path):
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=tmp_path)
+        job = daemon.submit(tmp_path / "a.epub", options={"cache_dir": str(tmp_path / "c")})
+        assert job.options["cache_dir"] == tmp_path / "c"
+        daemon.close()
+
+    def test_history_forgets_finished_jobs(self, tmp_path):
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=tmp_path, history=2)
+        jobs = [daemon.submit(epub_data=b"epub") for _ in range(3)]
+        assert len(daemon.jobs) == 3  # none finished yet
+        for job in jobs:
+            job.status = "done"
+            job.output_pdf.write_bytes(b"%PDF")
+
+        daemon.submit(epub_data=b"epub")
+
+        assert list(daemon.jobs) == ["3", "4"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["3.epub", "3.pdf", "4.epub"]
+        daemon.close()
+
+    def test_outputs_confined_to_spool(self, tmp_path):
+        spool = tmp_path / "spool"
+        spool.mkdir()
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=spool)
+        with pytest.raises(ValueError, match="output must be inside"):
+            daemon.submit(tmp_path / "a.epub", tmp_path / "a.pdf")
+        with pytest.raises(ValueError, match="cache_dir must be inside"):
+            daemon.submit(tmp_path / "a.epub", options={"cache_dir": str(spool / "..")})
+        assert daemon.submit(tmp_path / "a.epub").output_pdf == spool / "1.pdf"
+        daemon.close()
+
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=spool, allow_paths=True)
+        assert daemon.submit(tmp_path / "a.epub").output_pdf == tmp_path / "a.pdf"
+        daemon.close()
+
+    def test_reading_pdf_confined_to_spool(self, tmp_path, fake_typst):
+        options = {**self.OPTIONS, "reading_pdf": None, "workspace": None}
+        daemon = ConversionDaemon(options, concurrency=1, spool_dir=tmp_path)
+        (epub_path, output_pdf), = _batch_books(tmp_path, 1)
+        with pytest.raises(ValueError, match="reading_pdf must be inside"):
+            daemon.submit(epub_path, options={"reading_pdf": str(tmp_path.parent / "r.pdf")})
+        with pytest.raises(ValueError, match="workspace must be inside"):
+            daemon.submit(epub_path, options={"workspace": str(tmp_path.parent / "ws")})
+        job = daemon.submit(epub_path, output_pdf,
+                            options={"reading_pdf": str(tmp_path / "reading.pdf")})
+        daemon.start()
+        daemon.close()
+
+        assert job.status == "done"
+        assert (tmp_path / "reading.pdf").read_bytes().startswith(b"%PDF")
+
+    def test_http_rejects_bad_requests(self, tmp_path):
+        import http.client
+        import threading
+
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=1, spool_dir=tmp_path)
+        server = make_http_server(daemon, port=0, max_body=10,
+                                  allowed_origins=["http://app.example"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def send(method, path, body=b"", **headers):
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+            conn.request(method, path, body, {"Content-Type": "application/epub+zip",
+                                              **headers})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            return response
+
+        try:
+            assert send("POST", "/jobs", **{"Content-Length": "ten"}).status == 400
+            assert send("POST", "/jobs", **{"Content-Length": "-1"}).status == 400
+            assert send("POST", "/jobs", b"x" * 11).status == 413
+            assert send("POST", "/jobs", b"{}", **{"Content-Type": "text/plain"}).status == 415
+            assert send("GET", "/status", Host="evil.example").status == 403
+            assert send("GET", "/status", Origin="http://evil.example").status == 403
+            assert send("OPTIONS", "/jobs", Origin="http://evil.example").status == 403
+            assert daemon.jobs == {}
+
+            preflight = send("OPTIONS", "/jobs", Origin="http://app.example")
+            assert preflight.status == 204
+            assert preflight.headers["Access-Control-Allow-Origin"] == "http://app.example"
+            response = send("GET", "/status", Origin="http://app.example")
+            assert response.status == 200
+            assert response.headers["Access-Control-Allow-Origin"] == "http://app.example"
+            assert "Access-Control-Allow-Origin" not in send("GET", "/status").headers
+        finally:
+            server.shutdown()
+            server.server_close()
+            daemon.close()
+
+    @pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                        reason="workers must fork to see the patch")
+    def test_dead_worker_fails_only_its_job(self, tmp_path, monkeypatch):
+        import time
+
+        def convert(epub_path, output_pdf, **options):
+            if epub_path.name == "crash.epub":
+                os._exit(1)
+            time.sleep(0.2)
+            output_pdf.write_bytes(b"%PDF")
+
+        monkeypatch.setattr(epub2print, "convert_epub_to_pdf", convert)
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=2, spool_dir=tmp_path)
+        jobs = [daemon.submit(tmp_path / f"{name}.epub")
+                for name in ("a", "crash", "b", "c", "d")]
+        daemon.start()
+        daemon.close()
+
+        assert [job.status for job in jobs] == ["done", "failed", "done", "done", "done"]
+        assert "BrokenProcessPool" in jobs[1].result.error
+
+    def test_http_jobs(self, tmp_path, fake_typst):
+        import json
+        import threading
+        import time
+        import urllib.error
+        import urllib.request
+
+        daemon = ConversionDaemon(self.OPTIONS, concurrency=2, typst_jobs=1,
+                                  spool_dir=tmp_path)
+        daemon.start()
+        server = make_http_server(daemon, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def request(path, data=None, content_type="application/json"):
+            req = urllib.request.Request(url + path, data=data,
+                                         headers={"Content-Type": content_type})
+            with urllib.request.urlopen(req) as response:
+                return response.read()
+
+        try:
+            (epub_path, output_pdf), = _batch_books(tmp_path, 1)
+            by_path = json.loads(request("/jobs", json.dumps(
+                {"epub": str(epub_path), "output": str(output_pdf)}).encode()))
+            upload = json.loads(request("/jobs", epub_path.read_bytes(),
+                                        "application/epub+zip"))
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                request("/jobs", b'{"epub": "x.epub", "options": {"bogus": 1}}')
+            assert excinfo.value.code == 400
+
+            deadline = time.monotonic() + 30
+            while json.loads(request("/status"))["done"] < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+
+            assert json.loads(request(f"/jobs/{by_path['id']}"))["status"] == "done"
+            assert output_pdf.exists()
+            assert request(f"/jobs/{upload['id']}/pdf").startswith(b"%PDF")
+            status = json.loads(request("/status"))
+            assert status["queue_depth"] == 0
+            assert status["latency_seconds"]["count"] == 2
+        finally:
+            server.shutdown()
+            server.server_close()
+            daemon.close()
+
+
+def _make_font(path: Path, family: str) -> Path:
+    """A minimal TrueType font whose name table says *family*."""
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder([".notdef"])
+    fb.setupCharacterMap({})
+    fb.setupGlyf({".notdef": TTGlyphPen(None).glyph()})
+    fb.setupHorizontalMetrics({".notdef": (500, 0)})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({"familyName": family, "styleName": "Regular"})
+    fb.setupOS2()
+    fb.setupPost()
+    fb.save(path)
+    return path
+
+
+class TestFonts:
+    """Tests for font metadata lookup and how the font reaches Typst."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_memo(self, monkeypatch):
+        monkeypatch.setattr(epub2print, "_font_family_names", {})
+
+    def test_family_name(self, tmp_path):
+        font = _make_font(tmp_path / "f.ttf", "Test Family")
+        assert font_family_name(font) == "Test Family"
+        assert font_family_name(tmp_path / "missing.ttf") == "missing"
+
+    def test_cached_name_skips_reading_the_font(self, tmp_path, monkeypatch):
+        font = _make_font(tmp_path / "f.ttf", "Test Family")
+        cache_dir = tmp_path / "cache"
+        assert font_family_name(font, cache_dir) == "Test Family"
+
+        # A new process: nothing memoized, but the name is on disk
+        monkeypatch.setattr(epub2print, "_font_family_names", {})
+        monkeypatch.setattr(epub2print, "_read_font_family_name", lambda path: 1 / 0)
+        assert font_family_name(font, cache_dir) == "Test Family"
+
+    def test_changed_font_is_read_again(self, tmp_path):
+        font = _make_font(tmp_path / "f.ttf", "Old Family")
+        assert font_family_name(font, tmp_path / "cache") == "Old Family"
+        _make_font(font, "A Rather Different Family")
+        os.utime(font, ns=(1, 1))  # in case the rewrite landed in the same tick
+        assert font_family_name(font, tmp_path / "cache") == "A Rather Different Family"
+
+    def test_font_passed_to_typst_by_font_path(self, tmp_path, fake_typst):
+        import json
+
+        font = _make_font(tmp_path / "f.ttf", "Test Family")
+        epub_path = _create_minimal_epub(tmp_path)
+        epub2print.convert_epub_to_pdf(epub_path, tmp_path / "out.pdf", font_path=font,
+                                       impose=False, cache_dir=None)
+
+        typst = json.loads((tmp_path / "typst.json").read_text())
+        assert "--font-path" in typst["args"]
+        assert typst["fonts"] == ["f.ttf"]
+
+
+class TestWorkspace:
+    """Tests for the build workspace and how outputs are placed."""
+
+    def test_place_file(self, tmp_path):
+        src = tmp_path / "src.pdf"
+        src.write_bytes(b"%PDF-new")
+        dst = tmp_path / "dst.pdf"
+        dst.write_bytes(b"%PDF-old")
+
+        epub2print._place_file(src, dst)
+        assert dst.read_bytes() == b"%PDF-new" and src.exists()
+
+        moved = tmp_path / "moved.pdf"
+        epub2print._place_file(src, moved, move=True)
+        assert moved.read_bytes() == b"%PDF-new" and not src.exists()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["dst.pdf", "moved.pdf"]
+
+    @pytest.mark.parametrize("impose", [False, True])
+    def test_reading_pdf_and_output(self, tmp_path, fake_typst, impose):
+        epub_path = _create_minimal_epub(tmp_path)
+        output, reading = tmp_path / "out.pdf", tmp_path / "reading.pdf"
+        epub2print.convert_epub_to_pdf(epub_path, output, reading_pdf=reading,
+                                       impose=impose, cache_dir=None)
+        assert reading.read_bytes().startswith(b"%PDF")
+        assert output.read_bytes().startswith(b"%PDF")
+        assert (output.read_bytes() == reading.read_bytes()) is not impose
+
+    def test_chapter_jobs_do_not_parallelize_imposition(self, tmp_path, fake_typst,
+                                                         monkeypatch):
+        epub_path = _create_minimal_epub(tmp_path)
+        used = []
+
+        class Recording(epub2print.Impositioner):
+            def __init__(self, pages_per_signature, backend, jobs):
+                used.append(jobs)
+                super().__init__(pages_per_signature, backend)
+
+        monkeypatch.setattr(epub2print, "Impositioner", Recording)
+        for jobs, impose_jobs in ((2, 1), (1, 2)):
+            epub2print.convert_epub_to_pdf(epub_path, tmp_path / "out.pdf", jobs=jobs,
+                                           impose_jobs=impose_jobs, cache_dir=None)
+        assert used == [1, 2]
+
+    def test_workspace_kept_and_reused(self, tmp_path, fake_typst, monkeypatch):
+        epub_path = _create_minimal_epub(tmp_path)
+        monkeypatch.chdir(tmp_path)
+        workspace, cache_dir = Path("ws"), tmp_path / "cache"  # relative, as from the CLI
+        for _ in range(2):  # the second run links the cached parse over the first's files
+            epub2print.convert_epub_to_pdf(epub_path, tmp_path / "out.pdf", impose=False,
+                                           cache_dir=cache_dir, workspace=workspace)
+
+        assert (tmp_path / "ws" / "book.typ").exists()
+        chapter = (tmp_path / "ws" / "chapters" / "0000.typ").read_text(encoding="utf-8")
+        assert chapter == EPUBParser(epub_path).parse().chapters[0].content
+        cache = ParseCache(cache_dir)
+        cached, _ = cache.load(cache.key(epub_path, None, False))
+        assert cached.chapters[0].content == chapter
+
+
+def _numbered_pdf(path: Path, pages: int, width: float = 420, height: float = 595) -> Path:
+    """A PDF whose page n shows "pn", all pages sharing one font object."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for n in range(1, pages + 1):
+        page = writer.add_blank_page(width, height)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 50 300 Td (p{n}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+    writer.write(path)
+    return path
+
+
+class TestImposition:
+    """Tests for signature-by-signature imposition."""
+
+    @staticmethod
+    def _sheets(path: Path) -> list[list[int]]:
+        from pypdf import PdfReader
+
+        return [[int(n) for n in re.findall(r"p(\d+)", page.extract_text())]
+                for page in PdfReader(path).pages]
+
+    @pytest.mark.parametrize("backend", epub2print.IMPOSITION_BACKENDS)
+    def test_booklet_order_across_signatures(self, tmp_path, backend):
+        from pypdf import PdfReader
+
+        source = _numbered_pdf(tmp_path / "in.pdf", 10)
+        output = tmp_path / "out.pdf"
+        epub2print.Impositioner(8, backend).impose_booklet(source, output)
+
+        # Second signature is pages 9-16, of which only 9 and 10 exist
+        assert self._sheets(output) == [[8, 1], [2, 7], [6, 3], [4, 5], [9], [10], [], []]
+        reader = PdfReader(output)
+        assert {(float(p.mediabox.width), float(p.mediabox.height))
+                for p in reader.pages} == {(840, 595)}
+        # The shared font is still written once, despite releasing the reader per signature
+        assert output.read_bytes().count(b"/BaseFont /Helvetica") == 1
+
+    @pytest.mark.parametrize("backend", epub2print.IMPOSITION_BACKENDS)
+    def test_a5_to_a3_order(self, tmp_path, backend):
+        from pypdf import PdfReader
+
+        source = _numbered_pdf(tmp_path / "in.pdf", 10)
+        output = tmp_path / "out.pdf"
+        epub2print.Impositioner(8, backend).impose_a5_to_a3(source, output)
+
+        # Spreads (1,2) ... (9,10) imposed as an 8-page signature of spreads
+        assert [sorted(s) for s in self._sheets(output)] == [
+            [1, 2], [3, 4], [5, 6], [7, 8, 9, 10]]
+        assert {(float(p.mediabox.width), float(p.mediabox.height))
+                for p in PdfReader(output).pages} == {(1190, 840)}
+
+    def test_xobject_sheets_place_each_page_once(self, tmp_path):
+        from pypdf import PdfReader
+
+        source = _numbered_pdf(tmp_path / "in.pdf", 8)
+        output = tmp_path / "out.pdf"
+        epub2print.Impositioner(8).impose_booklet(source, output)
+
+        sheet = PdfReader(output).pages[0]
+        forms = sheet["/Resources"]["/XObject"]
+        assert sorted(forms) == ["/P0", "/P1"]
+        assert sheet.get_contents().get_data() == b"q 1 0 0 1 0 0 cm /P0 Do Q\nq 1 0 0 1 420 0 cm /P1 Do Q"
+        assert [float(v) for v in forms["/P1"]["/BBox"]] == [0, 0, 420, 595]
+        assert forms["/P1"].get_data() == b"BT /F1 12 Tf 50 300 Td (p1) Tj ET"
+
+    def test_a5_to_a3_places_each_page_once(self, tmp_path):
+        from pypdf import PdfReader
+
+        source = _numbered_pdf(tmp_path / "in.pdf", 10)
+        output = tmp_path / "out.pdf"
+        epub2print.Impositioner(8).impose_a5_to_a3(source, output)
+
+        # First sheet: a blank spread on the left, pages 1 and 2 on the right,
+        # each rotated into place by one matrix instead of a nested spread form
+        sheet = PdfReader(output).pages[0]
+        assert sheet.get_contents().get_data() == (
+            b"q 0 1 -1 0 1190 0 cm /P0 Do Q\nq 0 1 -1 0 1190 420 cm /P1 Do Q")
+        forms = sheet["/Resources"]["/XObject"]
+        assert [forms[name].get_data() for name in ("/P0", "/P1")] == [
+            b"BT /F1 12 Tf 50 300 Td (p1) Tj ET", b"BT /F1 12 Tf 50 300 Td (p2) Tj ET"]
+
+    @staticmethod
+    def _placements(path: Path) -> list[tuple]:
+        """Per sheet: size, content stream and the content of each placed form."""
+        from pypdf import PdfReader
+
+        sheets = []
+        for page in PdfReader(path).pages:
+            contents = page.get_contents()
+            forms = page["/Resources"].get("/XObject", {})
+            sheets.append((
+                tuple(page.mediabox),
+                contents.get_data() if contents is not None else b"",
+                {name: forms[name].get_data() for name in forms},
+            ))
+        return sheets
+
+    @pytest.mark.parametrize("backend", epub2print.IMPOSITION_BACKENDS)
+    @pytest.mark.parametrize("mode", ["impose_booklet", "impose_a5_to_a3"])
+    def test_parallel_matches_serial(self, tmp_path, backend, mode):
+        source = _numbered_pdf(tmp_path / "in.pdf", 70)  # 9 booklet / 5 A3 signatures
+        outputs = {}
+        for jobs in (1, 2, 3):
+            outputs[jobs] = tmp_path / f"out-{jobs}.pdf"
+            getattr(epub2print.Impositioner(8, backend, jobs), mode)(source, outputs[jobs])
+
+        serial = self._placements(outputs[1])
+        assert len(serial) == (36 if mode == "impose_booklet" else 20)
+        for jobs in (2, 3):
+            assert self._placements(outputs[jobs]) == serial
+            # Each part copied the shared font; the concatenation keeps one
+            assert outputs[jobs].read_bytes().count(b"/BaseFont /Helvetica") == 1
+
+    def test_plan(self):
+        plan = epub2print.ImpositionPlan.for_pages("booklet", 10, 8)
+        assert plan.sides == ((7, 0), (1, 6), (5, 2), (3, 4),
+                              (None, 8), (9, None), (None, None), (None, None))
+        assert (plan.signatures, plan.sheets) == (2, 4)
+        assert plan.signature_sides(1)[:2] == ((None, 8), (9, None))
+
+        a3 = epub2print.ImpositionPlan.for_pages("a5_to_a3", 10, 8)
+        assert a3.sides == ((None, None, 0, 1), (2, 3, None, None),
+                            (None, None, 4, 5), (6, 7, 8, 9))
+
+    def test_plan_is_memoized(self):
+        plan = epub2print.ImpositionPlan.for_pages("booklet", 900, 32)
+        assert epub2print.ImpositionPlan.for_pages("booklet", 900, 32) is plan
+        assert epub2print.Impositioner(30).plan("booklet", 900) is plan  # rounded up to 32
+        assert epub2print.ImpositionPlan.for_pages("a5_to_a3", 900, 32) is not plan
+
+    def test_plan_json(self):
+        plan = epub2print.ImpositionPlan.for_pages("booklet", 5, 4)
+        assert plan.to_json() == {
+            "mode": "booklet",
+            "pages": 5,
+            "pages_per_signature": 4,
+            "signatures": 2,
+            "slots": ["left", "right"],
+            "sheets": [
+                {"sheet": 1, "signature": 1, "front": [4, 1], "back": [2, 3]},
+                {"sheet": 2, "signature": 2, "front": [None, 5], "back": [None, None]},
+            ],
+        }
+
+    @pytest.mark.parametrize("args", [("poster", 10, 8), ("booklet", 10, 6)])
+    def test_plan_invalid(self, args):
+        with pytest.raises(ValueError):
+            epub2print.ImpositionPlan.for_pages(*args)
+
+    def test_plan_command(self, tmp_path, capsys):
+        import json
+
+        source = _numbered_pdf(tmp_path / "in.pdf", 10)
+        for arg in (str(source), "10"):
+            assert epub2print.plan_main([arg, "--pages-per-signature", "8", "--a3-mode",
+                                         "--json"]) == 0
+            assert json.loads(capsys.readouterr().out) == (
+                epub2print.ImpositionPlan.for_pages("a5_to_a3", 10, 8).to_json())
+        epub2print.plan_main(["10", "--pages-per-signature", "8"])
+        assert capsys.readouterr().out.splitlines()[-3] == "   2     3 back   10 |  -"
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            epub2print.Impositioner(8, "copy")
+
+    def test_failed_write_keeps_previous_output(self, tmp_path, monkeypatch):
+        import pypdf
+
+        source = _numbered_pdf(tmp_path / "in.pdf", 4)
+        output = tmp_path / "out.pdf"
+        output.write_bytes(b"%PDF-previous")
+
+        def fail(writer, stream):
+            stream.write(b"%PDF-partial")
+            raise OSError("disk full")
+
+        monkeypatch.setattr(pypdf.PdfWriter, "write", fail)
+        with pytest.raises(OSError):
+            epub2print.Impositioner(8).impose_booklet(source, output)
+        assert output.read_bytes() == b"%PDF-previous"
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["in.pdf", "out.pdf"]
+
+
+class TestStartup:
+    """Startup stays cheap: heavy dependencies load only where they're used."""
+
+    # Eagerly importing these took `import epub2print` from ~100 to ~270 ms
+    HEAVY = ("lxml", "pypdf", "fontTools", "PIL", "nltk", "wordfreq")
+    # `import epub2print` against `import argparse, zipfile` on the same
+    # machine: ~3.3x with lazy imports, ~20x with the heavy ones eager
+    IMPORT_RATIO_CEILING = 6
+
+    def _importtime(self, *args):
+        """{module: cumulative µs} from `python -X importtime *args`."""
+        import subprocess
+
+        env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            capture_output=True, text=True, cwd=Path(__file__).parent, env=env,
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _, cumulative, name = line.split("|")
+                if cumulative.strip().isdigit():
+                    times[name.strip()] = int(cumulative)
+        return times
+
+    def test_help_skips_heavy_dependencies(self):
+        modules = self._importtime("epub2print.py", "--help")
+        assert "argparse" in modules
+        assert not [m for m in modules if m.split(".")[0] in self.HEAVY]
+
+    def test_import_skips_heavy_dependencies(self):
+        modules = self._importtime("-c", "import epub2print")
+        assert "epub2print" in modules
+        assert not [m for m in modules if m.split(".")[0] in self.HEAVY]
+
+    def test_import_time_ceiling(self):
+        # Relative to a stdlib-only baseline so machine speed cancels out;
+        # best of three runs each to ride out scheduling noise
+        baseline = min(sum(self._importtime("-c", "import argparse, zipfile")[m]
+                           for m in ("argparse", "zipfile")) for _ in range(3))
+        ours = min(self._importtime("-c", "import epub2print")["epub2print"]
+                   for _ in range(3))
+        assert ours < self.IMPORT_RATIO_CEILING * baseline, (ours, baseline)
+
+
 class TestCleanWord:
     """Tests for _clean_word helper."""
 
@@ -612,6 +1711,167 @@ class TestIndexTracker:
         selected, _ = tracker.select_all(budget=3)
         assert len(selected) <= 3
 
+    def test_merge_candidates_renumbers_chapters(self):
+        """Per-document pools merged in order match a single tracker."""
+        documents = [
+            [None, "and then Kira saw gossamer"],
+            ["and Sorcha found gossamer"],  # continues the open chapter
+            [None, "and Kira ran", None, "the pellucid water"],
+        ]
+        serial = IndexTracker()
+        merged = IndexTracker()
+        worker = IndexTracker()
+        for doc in documents:
+            for text in doc:
+                for tracker in (serial, worker):
+                    if text is None:
+                        tracker.new_chapter()
+                    else:
+                        tracker.annotate_text(text, text)
+            merged.merge_candidates(worker.take_candidates())
+
+        assert merged.noun_candidates == serial.noun_candidates
+        assert merged.noun_candidates["Sorcha"] == {0}
+        assert list(merged.rare_candidates) == list(serial.rare_candidates)
+        assert merged.stem_counts == serial.stem_counts
+        assert merged.word_chapters == serial.word_chapters
+        assert merged.stem_chapters == serial.stem_chapters
+        assert merged._chapter_idx == serial._chapter_idx == 2
+
+    def test_chapter_aggregates_follow_candidates(self):
+        """word_chapters/stem_chapters agree with the rare candidate list."""
+        tracker = IndexTracker()
+        for text in ["the gossamer loom", "gossamers and pellucid light", "gossamer again"]:
+            tracker.new_chapter()
+            tracker.annotate_text(text, text)
+
+        for lower, chapters in tracker.word_chapters.items():
+            assert chapters == {c.chapter_idx for c in tracker.rare_candidates if c.lower == lower}
+        for stem, chapters in tracker.stem_chapters.items():
+            assert chapters == {c.chapter_idx for c in tracker.rare_candidates if c.stem == stem}
+        assert tracker.word_chapters["gossamer"] == {0, 2}
+        selected, _ = tracker.select_all(budget=10)
+        assert selected["gossamer"] == ("Gossamer", {0, 2})
+
+    def test_rare_candidates_share_forms(self):
+        """Repeated occurrences of a word store its strings once."""
+        tracker = IndexTracker()
+        tracker.new_chapter()
+        tracker.annotate_text("the gossamer loom and gossamer veils",
+                              "the gossamer loom and gossamer veils")
+        rare = tracker.rare_candidates
+        lowers = [c.lower for c in rare]
+        assert lowers.count("gossamer") == 2
+        assert len(rare.forms) == len(set(lowers)) < len(rare)
+        assert rare[lowers.index("gossamer")].position == 4
+
+        restored = IndexCandidates.from_data(tracker.candidates().to_data())
+        assert list(restored.rare_candidates) == list(rare)
+        assert list(restored.rare_candidates) == list(rare)
+
+    def test_select_cuts_one_scoring_at_any_budget(self):
+        """select() on a single score_all() run matches select_all() per budget."""
+        tracker = IndexTracker()
+        for i in range(3):
+            tracker.new_chapter()
+            tracker.annotate_text("and then Kira met Oberon by the gossamer loom",
+                                  "and then Kira met Oberon by the gossamer loom")
+        all_scored = tracker.score_all()
+        for budget in (0, 1, 2, 120):
+            assert (tracker.select(all_scored, budget), all_scored) == tracker.select_all(budget)
+
+
+class TestIndexSweep:
+    """Tests for comparing index sizes without re-typesetting."""
+
+    def test_sweep_from_cached_pool(self, tmp_path, monkeypatch, capsys):
+        epub_path = _create_rich_epub(tmp_path)
+        cache_dir = tmp_path / "cache"
+        load_book(epub_path, index_tracker=IndexTracker(), cache_dir=cache_dir)
+
+        monkeypatch.setattr(EPUBParser, "parse", lambda self: pytest.fail("re-parsed"))
+        tracker = IndexTracker()
+        book = load_book(epub_path, index_tracker=tracker, cache_dir=cache_dir)
+        before = [ch.content for ch in book.chapters]
+        capsys.readouterr()
+
+        sweep_index_sizes(tracker, book.chapters, [2, 1])
+
+        out = capsys.readouterr().out
+        assert "selecting top 1, 2" in out
+        assert "index-size cutoff (1)" in out
+        assert "index-size cutoff (2)" in out
+        rows = [line.split() for line in out.splitlines()
+                if line.split()[:1] in (["1"], ["2"])]
+        assert [row[0] for row in rows] == ["1", "2"]
+        assert int(rows[0][-1]) <= int(rows[1][-1])
+        # The book itself is left untouched
+        assert [ch.content for ch in book.chapters] == before
+
+    def test_empty_budget(self, tmp_path, capsys):
+        epub_path = _create_rich_epub(tmp_path)
+        tracker = IndexTracker()
+        book = load_book(epub_path, index_tracker=tracker, cache_dir=None)
+        capsys.readouterr()
+
+        sweep_index_sizes(tracker, book.chapters, [0, 1])
+
+        rows = [line.split() for line in capsys.readouterr().out.splitlines()
+                if line.split()[:1] == ["0"]]
+        assert rows == [["0", "0", "0", "-", "0"]]
+
+    @pytest.mark.parametrize("value", ["0,5", "-3", "a,b"])
+    def test_sweep_sizes_rejected(self, value):
+        import argparse
+
+        with pytest.raises(argparse.ArgumentTypeError):
+            epub2print._index_sizes(value)
+        assert epub2print._index_sizes("20,40") == [20, 40]
+
+
+class TestWordLookups:
+    """Tests for the memoized zipf/stem lookups."""
+
+    def test_lru_cache_counts_and_evicts(self):
+        calls = []
+        cache = LRUCache(lambda key: calls.append(key) or key.upper(), maxsize=2)
+        assert [cache("a"), cache("b"), cache("a"), cache("c")] == ["A", "B", "A", "C"]
+        assert (cache.hits, cache.misses) == (1, 3)
+        # "b" was least recently used
+        assert [key for key, _ in cache.items()] == ["a", "c"]
+        cache("b")
+        assert calls == ["a", "b", "c", "b"]
+
+    def test_lookups_memoize(self):
+        lookups = WordLookups("en")
+        assert lookups.zipf("gossamer") == lookups.zipf("gossamer") < 4.0
+        assert lookups.stem("gossamers") == lookups.stem("gossamers") == "gossam"
+        assert (lookups.zipf.hits, lookups.zipf.misses) == (1, 1)
+        assert (lookups.stem.hits, lookups.stem.misses) == (1, 1)
+
+    def test_table_preloads_next_run(self, tmp_path, monkeypatch):
+        first = WordLookups("en")
+        zipf, stem = first.zipf("gossamer"), first.stem("gossamers")
+        first.save(tmp_path)
+
+        second = WordLookups("en")
+        assert second.load(tmp_path) == 2
+        # Neither wordfreq nor the stemmer is consulted
+        second._zipf_frequency = second._stemmer = None
+        monkeypatch.setitem(sys.modules, "wordfreq", None)
+        monkeypatch.setitem(sys.modules, "nltk.stem.snowball", None)
+        assert second.zipf("gossamer") == zipf
+        assert second.stem("gossamers") == stem
+        assert second.zipf.misses == second.stem.misses == 0
+
+    def test_table_from_other_library_versions_ignored(self, tmp_path, monkeypatch):
+        first = WordLookups("en")
+        first.zipf("gossamer")
+        first.save(tmp_path)
+
+        monkeypatch.setattr(WordLookups, "_versions", staticmethod(lambda: {"wordfreq": "0"}))
+        assert WordLookups("en").load(tmp_path) == 0
+
 
 class TestPostprocessIndexMarkers:
     """Tests for the post-processing pass 2."""
@@ -663,6 +1923,21 @@ class TestPostprocessIndexMarkers:
         postprocess_index_markers(chapters, {})
         assert chapters[0].content == "hello world"
 
+    def test_rewrites_only_touched_chapter_files(self, tmp_path):
+        """Streamed chapters without a selected word are left alone on disk."""
+        chapters = []
+        for i, text in enumerate(["the gossamer wings", "nothing to see"]):
+            path = tmp_path / f"{i:04d}.typ"
+            path.write_text(text, encoding="utf-8")
+            chapters.append(Chapter(title=f"Ch{i}", content="", path=path))
+        untouched = chapters[1].path.stat()
+
+        postprocess_index_markers(chapters, {"gossamer": ("Gossamer", {0, 1})})
+
+        assert chapters[0].read() == "the gossamer#index[Gossamer] wings"
+        assert chapters[1].path.stat().st_mtime_ns == untouched.st_mtime_ns
+        assert chapters[1].path.stat().st_ino == untouched.st_ino
+
     def test_case_insensitive_matching(self):
         """Word matching is case-insensitive."""
         chapters = [
@@ -672,6 +1947,58 @@ class TestPostprocessIndexMarkers:
         postprocess_index_markers(chapters, selected)
         assert "#index[Gossamer]" in chapters[0].content
 
+    def test_overlapping_entries_match_sequential_insertion(self):
+        """Words sharing a span are resolved as if inserted one by one."""
+        chapters = [Chapter(title="Ch1", content="then O'Brien left; o'brien, Brien and O.")]
+        selected = {
+            "o": ("O", {0}),
+            "o'brien": ("O'Brien", {0}),
+            "brien": ("Brien", {0}),
+        }
+        postprocess_index_markers(chapters, selected)
+        # The "o" marker splits the first O'Brien, so that entry moves on
+        assert chapters[0].content == (
+            "then O#index[O]'Brien#index[Brien] left;"
+            " o'brien#index[O'Brien], Brien and O."
+        )
+
+    def test_matches_per_entry_insertion(self):
+        """Randomized texts give the same output as one regex per entry."""
+        import random
+        import re
+
+        def reference(chapters, selected):
+            for word_lower, (display, chapter_idxs) in selected.items():
+                pattern = re.compile(
+                    rf'(?<![#\[])(\b{re.escape(word_lower)}\b)(?![^\[]*\])',
+                    re.IGNORECASE,
+                )
+                for ch_idx in chapter_idxs:
+                    if 0 <= ch_idx < len(chapters):
+                        chapter = chapters[ch_idx]
+                        m = pattern.search(chapter.content)
+                        if m:
+                            chapter.content = (chapter.content[:m.end()]
+                                               + f"#index[{display}]"
+                                               + chapter.content[m.end():])
+
+        rng = random.Random(7)
+        vocab = ["kira", "Kira", "o", "O'Brien", "brien", "loom", "looms",
+                 "gossamer", "#emph[", "]", "[", " ", " ", ", ", "'", "#index[Kira]"]
+        keys = ["kira", "o", "o'brien", "brien", "loom", "gossamer"]
+        for _ in range(300):
+            texts = ["".join(rng.choice(vocab) for _ in range(rng.randint(0, 40)))
+                     for _ in range(3)]
+            selected = {
+                k: (k.title(), set(rng.sample(range(-1, 4), rng.randint(0, 3))))
+                for k in rng.sample(keys, rng.randint(1, len(keys)))
+            }
+            expected = [Chapter(title="", content=t) for t in texts]
+            actual = [Chapter(title="", content=t) for t in texts]
+            reference(expected, selected)
+            postprocess_index_markers(actual, selected)
+            assert actual == expected, (texts, selected)
+
 
 class TestSceneSignals:
     """Tests for scene signal detection."""
@@ -692,6 +2019,46 @@ class TestSceneSignals:
         scenes = tracker.check_scene_signals(text)
         assert scenes == []
 
+    def test_paragraph_words_collected_while_annotating(self):
+        """annotate_text() feeds the open paragraph's scene words."""
+        tracker = IndexTracker()
+        tracker.new_chapter()
+        tracker.begin_paragraph()
+        for fragment in ["His breath caught as she ", "touched", " his skin's heat"]:
+            tracker.annotate_text(fragment, fragment)
+        tracker.begin_paragraph()
+        tracker.annotate_text("her lips warm", "her lips warm")
+        assert tracker.end_paragraph() == []
+        # Nested paragraph words count towards the outer one too
+        assert tracker.end_paragraph() == ["Intimate"]
+
+    def test_scene_words_come_from_annotated_fragments(self, tmp_path):
+        """Scene words are counted per converted fragment, not in itertext()."""
+        from lxml import etree
+
+        parser = EPUBParser(_create_minimal_epub(tmp_path), index_tracker=IndexTracker())
+        parser.footnotes = {"n1": "A note"}
+
+        def scenes(xhtml):
+            content = parser._element_to_typst(etree.fromstring(xhtml), "ch1.xhtml", {})
+            return re.findall(r'#index\("Scenes", "(\w+)"\)', content)
+
+        assert scenes("<p>blood, steel, wound</p>") == ["Violence"]
+        # "gun" and "shot" count separately (the whole text says "gunshot")
+        assert scenes("<p>The <i>gun</i>shot rang; blood on steel</p>") == ["Violence"]
+        # Footnote link text is replaced by the note, never annotated
+        assert scenes('<p>Quiet.<a href="#n1">blood, steel, wound</a></p>') == []
+
+    def test_scene_marker_precedes_paragraph(self, tmp_path):
+        """Scene markers are emitted before the paragraph they describe."""
+        epub_path = _create_rich_epub(tmp_path)
+        parser = EPUBParser(epub_path, index_tracker=IndexTracker())
+        book = parser.parse()
+        content = book.chapters[0].content
+        marker = content.index('#index("Scenes", "Intimate")')
+        assert marker < content.index("His breath caught")
+        assert content.count('"Scenes"') == 1
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])